@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import Dict, List, Union
 from pydantic import AnyHttpUrl, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
@@ -28,7 +28,7 @@ class Settings(BaseSettings):
     BACKEND_CORS_ORIGINS: str | List[str] = "*"
     
     # Méthodes HTTP autorisées
-    ALLOWED_METHODS: List[str] = ["GET"]
+    ALLOWED_METHODS: List[str] = ["GET", "POST", "DELETE"]
     
     # Headers autorisés
     ALLOWED_HEADERS: List[str] = [
@@ -37,10 +37,108 @@ class Settings(BaseSettings):
         "X-OAuth-Credentials",
         "X-Mailchimp-API-Key",
         "X-Vimeo-Access-Token",
+        "X-Facebook-Page-Access-Token",
+        "X-LinkedIn-OAuth-Credentials",
         "X-Property-ID",
         "Accept",
     ]
     
+    # ========================================
+    # OAuth
+    # ========================================
+    # Fichier de persistance du cache d'access tokens (vide = mémoire seulement)
+    OAUTH_TOKEN_CACHE_PATH: str | None = None
+    # Rafraîchir le token quand il reste moins de N secondes avant expiration
+    OAUTH_TOKEN_REFRESH_MARGIN: int = 60
+    
+    # ========================================
+    # HTTP (pools de connexions vers les API amont)
+    # ========================================
+    HTTP_POOL_SIZE: int = 10           # connexions keep-alive max par hôte
+    HTTP_TIMEOUT: float = 30.0         # secondes
+    HTTP_MAX_RETRIES: int = 2          # relances sur erreur réseau / 502 / 503 / 504 (GET et POST idempotents)
+    HTTP_BACKOFF_FACTOR: float = 0.5
+    # Limiteurs de débit par API amont (token bucket + concurrence adaptative).
+    # Surcharges par API en JSON, ex. RATE_LIMITS='{"vimeo": {"rate": 2, "max_concurrency": 2}}'
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: Dict[str, Dict[str, float]] = {}
+    # Cache HTTP conditionnel (ETag / Last-Modified) : LRU mémoire borné,
+    # plus un niveau disque SQLite optionnel (HTTP_CACHE_PATH)
+    HTTP_CACHE_ENABLED: bool = True
+    HTTP_CACHE_MAX_MB: int = 64
+    HTTP_CACHE_PATH: str | None = None
+    HTTP_CACHE_DISK_MAX_MB: int = 256
+    
+    # ========================================
+    # GA4
+    # ========================================
+    # Pages récupérées en parallèle (garder <= HTTP_POOL_SIZE)
+    GA4_MAX_CONCURRENCY: int = 4
+    # Nombre max de rapports acceptés par POST /ga4/batch
+    GA4_BATCH_MAX_REPORTS: int = 25
+    # Cache local par jour des rapports GA4 (vide = désactivé)
+    GA4_CACHE_PATH: str | None = None
+    GA4_CACHE_MAX_MB: int = 200
+    # Les N derniers jours sont toujours redemandés à GA4
+    GA4_CACHE_VOLATILE_DAYS: int = 3
+    
+    # ========================================
+    # LinkedIn
+    # ========================================
+    # Cache local des posts + stats, synchro incrémentale (vide = désactivé)
+    LINKEDIN_CACHE_PATH: str | None = None
+    # Stats des posts publiés depuis moins de N jours : rafraîchies toutes les
+    # LINKEDIN_STATS_RECENT_TTL secondes ; les autres toutes les LINKEDIN_STATS_OLD_TTL
+    LINKEDIN_STATS_RECENT_DAYS: int = 30
+    LINKEDIN_STATS_RECENT_TTL: int = 3600
+    LINKEDIN_STATS_OLD_TTL: int = 7 * 86400
+    # Stats quotidiennes (/linkedin/shares) : les N derniers jours (UTC) sont toujours redemandés
+    LINKEDIN_SHARE_STATS_VOLATILE_DAYS: int = 3
+    # Lots de stats par post envoyés en parallèle ; valeurs spécifiques par
+    # version d'API en JSON, ex. LINKEDIN_STATS_CONCURRENCY_BY_VERSION='{"202601": 2}'
+    LINKEDIN_STATS_CONCURRENCY: int = 4
+    LINKEDIN_STATS_CONCURRENCY_BY_VERSION: Dict[str, int] = {}
+    
+    # ========================================
+    # Mailchimp
+    # ========================================
+    # click-details en mode batch (/batches) : suivi du job toutes les N
+    # secondes, abandon (504) au-delà de MAILCHIMP_BATCH_TIMEOUT secondes
+    MAILCHIMP_BATCH_POLL_INTERVAL: float = 5.0
+    MAILCHIMP_BATCH_TIMEOUT: float = 600.0
+    # Cache local des click-details par campagne (vide = désactivé). Campagnes
+    # de moins de N jours toujours redemandées, au plus une fois par
+    # MAILCHIMP_CLICKS_DAILY_TTL secondes jusqu'à MAILCHIMP_CLICKS_FROZEN_AFTER_DAYS, figées ensuite
+    MAILCHIMP_CACHE_PATH: str | None = None
+    MAILCHIMP_CLICKS_REFRESH_DAYS: int = 7
+    MAILCHIMP_CLICKS_FROZEN_AFTER_DAYS: int = 30
+    MAILCHIMP_CLICKS_DAILY_TTL: int = 86400
+    
+    # ========================================
+    # Vimeo
+    # ========================================
+    # Statistiques quotidiennes (/vimeo/analytics) : vidéos demandées en parallèle
+    VIMEO_ANALYTICS_CONCURRENCY: int = 4
+    # Cache local par vidéo et par jour (vide = désactivé) ; les N derniers
+    # jours (UTC) sont toujours redemandés
+    VIMEO_CACHE_PATH: str | None = None
+    VIMEO_ANALYTICS_VOLATILE_DAYS: int = 3
+    
+    # ========================================
+    # Facebook
+    # ========================================
+    # Sessions SDK (FacebookAdsApi) gardées en mémoire, une par token ; au-delà,
+    # les moins récemment utilisées sont oubliées
+    FACEBOOK_API_CACHE_SIZE: int = 64
+    
+    # ========================================
+    # Batch (POST /batch)
+    # ========================================
+    BATCH_MAX_QUERIES: int = 20
+    # Délai commun des sous-requêtes (secondes), surchargeable par requête jusqu'à BATCH_MAX_TIMEOUT
+    BATCH_TIMEOUT: float = 30.0
+    BATCH_MAX_TIMEOUT: float = 120.0
+    
     # ========================================
     # Validators
     # ========================================
@@ -1,13 +1,17 @@
 from fastapi import APIRouter, Header, Query, HTTPException, Depends
-from typing import Optional, List
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional, List
 from datetime import date
 import json
 import base64
 
+from app.config.settings import settings
 from app.models.api_model import APIResponse
+from app.utils.streaming import CSV_MEDIA_TYPE, NDJSON_MEDIA_TYPE, csv_chunks, ndjson_chunks
 from kpi_connectors.auth.oauth import OAuthCredentials, OAuthService
-from kpi_connectors.models.ga4 import GA4QueryParams
-from kpi_connectors.connectors.ga4 import GA4Service
+from kpi_connectors.models.ga4 import GA4QueryParams, GA4BatchQueryParams
+from kpi_connectors.connectors.aio.ga4 import AsyncGA4Service
+from kpi_connectors.storage.ga4_store import get_ga4_store
 
 router = APIRouter()
 
@@ -26,7 +30,7 @@ def parse_oauth_credentials(x_oauth_credentials: str = Header(...)) -> OAuthCred
         
 
 @router.get("/ga4", response_model=APIResponse)
-def get_ga4_report(
+async def get_ga4_report(
     property_id: str = Query(..., description="GA4 Property ID"),
     start_date: Optional[date] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD)"),
@@ -34,6 +38,15 @@ def get_ga4_report(
     dimensions: Optional[List[str]] = Query(None, description="List of dimensions"),
     limit: int = Query(1000, ge=1, le=10000, description="Result limit"),
     event_name: Optional[str] = Query(None, description="Filter exact eventName"),
+    format: Literal["rows", "columnar"] = Query(
+        "rows",
+        description="rows = une liste de dicts ; columnar = une colonne par "
+                    "dimension/métrique, dimensions encodées par dictionnaire",
+    ),
+    stream: Optional[Literal["ndjson", "csv"]] = Query(
+        None,
+        description="Renvoie les lignes en flux (NDJSON ou CSV) au fil de la pagination",
+    ),
     credentials: OAuthCredentials = Depends(parse_oauth_credentials)
 ):
     """
@@ -43,10 +56,18 @@ def get_ga4_report(
     - X-OAuth-Credentials: Base64 encoded JSON with OAuth credentials
    
     """
+    if stream and format == "columnar":
+        raise HTTPException(status_code=400, detail="stream is not compatible with format=columnar")
+
     try:
         # Create services
         oauth_service = OAuthService(credentials)
-        ga4_service = GA4Service(oauth_service)
+        ga4_service = AsyncGA4Service(
+            oauth_service,
+            max_workers=settings.GA4_MAX_CONCURRENCY,
+            store=get_ga4_store(),
+            volatile_days=settings.GA4_CACHE_VOLATILE_DAYS,
+        )
         
         # Build query params
         query_params = GA4QueryParams(
@@ -59,25 +80,107 @@ def get_ga4_report(
             event_name=event_name
         )
         
+        if stream:
+            pages = ga4_service.iter_report(query_params)
+            # Première page lue ici : une erreur GA4/OAuth donne encore un 400
+            first_page = await pages.__anext__()
+
+            async def batches():
+                yield first_page["rows"]
+                async for page in pages:
+                    yield page["rows"]
+
+            if stream == "csv":
+                fieldnames = first_page["dimension_headers"] + first_page["metric_headers"]
+                return StreamingResponse(csv_chunks(fieldnames, batches()), media_type=CSV_MEDIA_TYPE)
+            return StreamingResponse(ndjson_chunks(batches()), media_type=NDJSON_MEDIA_TYPE)
+
         # Execute query
-        data = ga4_service.run_report(query_params)
+        data = await ga4_service.run_report(query_params, columnar=(format == "columnar"))
+        
+        metadata = {
+            "property_id": property_id,
+            "date_range": {
+                "start": query_params.start_date or "yesterday",
+                "end": query_params.end_date or "yesterday"
+            }
+        }
+        if "cache" in data:
+            metadata["cache"] = data.pop("cache")
         
+        return APIResponse(
+            success=True,
+            data=data,
+            metadata=metadata
+        )
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+
+
+@router.post("/ga4/batch", response_model=APIResponse)
+async def run_ga4_batch_reports(
+    batch: GA4BatchQueryParams,
+    format: Literal["rows", "columnar"] = Query("rows", description="rows ou columnar (voir /ga4)"),
+    credentials: OAuthCredentials = Depends(parse_oauth_credentials)
+):
+    """
+    Run several GA4 reports in one call (GA4 batchRunReports, groups of 5)
+
+    **Body:** `{"reports": {"<name>": {<GA4QueryParams>}, ...}}`
+
+    **Headers:**
+    - X-OAuth-Credentials: Base64 encoded JSON with OAuth credentials
+    """
+    if not batch.reports:
+        raise HTTPException(status_code=400, detail="At least one report is required")
+    if len(batch.reports) > settings.GA4_BATCH_MAX_REPORTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many reports: {len(batch.reports)} (max {settings.GA4_BATCH_MAX_REPORTS})"
+        )
+
+    try:
+        oauth_service = OAuthService(credentials)
+        ga4_service = AsyncGA4Service(oauth_service, max_workers=settings.GA4_MAX_CONCURRENCY)
+
+        data = await ga4_service.batch_run_reports(batch.reports, columnar=(format == "columnar"))
+
         return APIResponse(
             success=True,
             data=data,
             metadata={
-                "property_id": property_id,
-                "date_range": {
-                    "start": query_params.start_date or "yesterday",
-                    "end": query_params.end_date or "yesterday"
-                }
+                "report_count": len(data),
+                "property_ids": sorted({p.property_id for p in batch.reports.values()}),
             }
         )
-        
+
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
-    
-    
 
+
+@router.delete("/ga4/cache", response_model=APIResponse)
+def invalidate_ga4_cache(
+    property_id: Optional[str] = Query(None, description="GA4 Property ID (vide = toutes les propriétés)"),
+    credentials: OAuthCredentials = Depends(parse_oauth_credentials)
+):
+    """
+    Invalidate the local GA4 day cache for the given credentials
+
+    **Headers:**
+    - X-OAuth-Credentials: Base64 encoded JSON with OAuth credentials
+    """
+    store = get_ga4_store()
+    if store is None:
+        return APIResponse(success=True, data={"removed_partitions": 0}, metadata={"cache_enabled": False})
+
+    removed = store.invalidate(property_id=property_id, owner=OAuthService(credentials).cache_key)
+    return APIResponse(
+        success=True,
+        data={"removed_partitions": removed},
+        metadata={"cache_enabled": True, "property_id": property_id},
+    )
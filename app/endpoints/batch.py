@@ -0,0 +1,227 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi import params as fastapi_params
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import PydanticUndefined
+from typing import Annotated, Any, Callable, Dict, Tuple
+import asyncio
+import inspect
+import time
+
+import httpx
+import requests
+
+from app.config.settings import settings
+from app.endpoints import analytics, facebook, linkedin, mailchimp, vimeo
+from app.models.api_model import APIResponse, BatchRequest
+
+"""
+POST /batch : plusieurs requêtes vers n'importe quels connecteurs en un seul
+appel (ex. tout un rafraîchissement de tableau de bord).
+
+Chaque sous-requête est exécutée par le handler de l'endpoint GET
+correspondant, avec les mêmes paramètres et la même forme de réponse. Elles
+tournent en parallèle sous un délai commun ; l'erreur d'une source est
+rapportée pour elle seule, sans faire échouer les autres.
+
+À l'échéance, les handlers async sont annulés. Les handlers sync (SDK
+Facebook) tournent dans le threadpool et ne peuvent pas être interrompus :
+leur résultat est abandonné mais le thread continue jusqu'au bout (chaque
+appel Graph reste borné par HTTP_TIMEOUT).
+"""
+
+router = APIRouter(tags=["batch"])
+
+SOURCES: Dict[str, Callable] = {
+    "ga4": analytics.get_ga4_report,
+    "linkedin.followers": linkedin.get_linkedin_follower_count,
+    "linkedin.shares": linkedin.get_linkedin_share_stats,
+    "linkedin.posts": linkedin.get_linkedin_posts_with_stats,
+    "mailchimp.audiences": mailchimp.list_mailchimp_audiences,
+    "mailchimp.campaigns_summary": mailchimp.list_mailchimp_campaign_summaries,
+    "mailchimp.click_details": mailchimp.list_mailchimp_click_details,
+    "vimeo.videos": vimeo.list_vimeo_videos,
+    "vimeo.followers": vimeo.get_vimeo_follower_count,
+    "vimeo.analytics": vimeo.get_vimeo_video_analytics,
+    "facebook.page_insights": facebook.get_page_insights,
+    "facebook.page_overview": facebook.get_page_overview,
+    "facebook.posts_insights": facebook.get_posts_with_insights,
+}
+
+# GA4 et LinkedIn lisent tous deux X-OAuth-Credentials : dans un batch, les
+# credentials LinkedIn peuvent venir d'un en-tête dédié.
+OAUTH_HEADERS: Dict[str, Tuple[str, ...]] = {
+    "linkedin": ("X-LinkedIn-OAuth-Credentials", "X-OAuth-Credentials"),
+}
+DEFAULT_OAUTH_HEADERS = ("X-OAuth-Credentials",)
+
+# Paramètres des endpoints sans objet dans un batch (réponse JSON unique)
+UNSUPPORTED_PARAMS = {"stream"}
+
+
+class _QueryError(Exception):
+    def __init__(self, status_code: int, detail: Any):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _handler_kwargs(source: str, handler: Callable, params: Dict[str, Any], headers) -> Dict[str, Any]:
+    """
+    Arguments du handler : paramètres de requête pris dans params (validés
+    comme par FastAPI), en-têtes et credentials pris dans les en-têtes du batch.
+    """
+    signature = inspect.signature(handler)
+    unknown = set(params) - set(signature.parameters)
+    unsupported = set(params) & UNSUPPORTED_PARAMS
+    if unknown or unsupported:
+        raise _QueryError(400, f"Unsupported parameters for {source}: {sorted(unknown | unsupported)}")
+
+    kwargs: Dict[str, Any] = {}
+    for name, parameter in signature.parameters.items():
+        default = parameter.default
+
+        if isinstance(default, fastapi_params.Depends):
+            if default.dependency is not analytics.parse_oauth_credentials:
+                raise _QueryError(500, f"Unsupported dependency for {source}: {name}")
+            aliases = OAUTH_HEADERS.get(source.split(".")[0], DEFAULT_OAUTH_HEADERS)
+            value = next((headers[a] for a in aliases if a in headers), None)
+            if value is None:
+                raise _QueryError(400, f"Missing header for {source}: {aliases[0]}")
+            kwargs[name] = analytics.parse_oauth_credentials(value)
+
+        elif isinstance(default, fastapi_params.Header):
+            alias = default.alias or name.replace("_", "-")
+            if alias not in headers:
+                raise _QueryError(400, f"Missing header for {source}: {alias}")
+            kwargs[name] = headers[alias]
+
+        elif name in UNSUPPORTED_PARAMS:
+            kwargs[name] = None
+
+        elif name in params:
+            try:
+                kwargs[name] = TypeAdapter(Annotated[parameter.annotation, default]).validate_python(params[name])
+            except ValidationError as e:
+                raise _QueryError(422, f"Invalid parameter {name}: {e.errors(include_url=False)}")
+
+        elif default.default is not PydanticUndefined:
+            kwargs[name] = default.default
+        elif default.default_factory is not None:
+            kwargs[name] = default.default_factory()
+        else:
+            raise _QueryError(400, f"Missing parameter for {source}: {name}")
+    return kwargs
+
+
+async def _run_query(source: str, params: Dict[str, Any], headers) -> Any:
+    handler = SOURCES.get(source)
+    if handler is None:
+        raise _QueryError(400, f"Unknown source: {source} (expected one of {sorted(SOURCES)})")
+
+    kwargs = _handler_kwargs(source, handler, params, headers)
+    if inspect.iscoroutinefunction(handler):
+        result = await handler(**kwargs)
+    else:
+        # Handlers sync (SDK Facebook) : threadpool, comme FastAPI
+        result = await run_in_threadpool(handler, **kwargs)
+    return jsonable_encoder(result)
+
+
+def _is_sync(source: str) -> bool:
+    """Handler exécuté dans le threadpool, qu'une annulation n'interrompt pas."""
+    handler = SOURCES.get(source)
+    return handler is not None and not inspect.iscoroutinefunction(handler)
+
+
+def _error(exc: BaseException) -> Dict[str, Any]:
+    """Erreur d'une sous-requête, au format {"status_code", "detail"}."""
+    if isinstance(exc, (_QueryError, HTTPException)):
+        return {"status_code": exc.status_code, "detail": exc.detail}
+    if isinstance(exc, httpx.HTTPStatusError):
+        return {"status_code": 502, "detail": f"Upstream error {exc.response.status_code}: {exc.request.url}"}
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return {"status_code": 502, "detail": f"Upstream error {exc.response.status_code}: {exc.response.url}"}
+    if isinstance(exc, (httpx.HTTPError, requests.RequestException)):
+        return {"status_code": 502, "detail": f"Upstream error: {exc}"}
+    if isinstance(exc, ValueError):
+        return {"status_code": 400, "detail": str(exc)}
+    return {"status_code": 500, "detail": f"Internal error: {exc}"}
+
+
+@router.post("/batch", response_model=APIResponse)
+async def run_batch(batch: BatchRequest, request: Request):
+    """
+    Run several connector queries concurrently under one deadline
+
+    **Body:** `{"queries": {"<name>": {"source": "<source>", "params": {...}}}, "timeout": 20}`
+
+    Sources : ga4, linkedin.followers, linkedin.shares, linkedin.posts,
+    mailchimp.audiences, mailchimp.campaigns_summary, mailchimp.click_details,
+    vimeo.videos, vimeo.followers, vimeo.analytics, facebook.page_insights,
+    facebook.page_overview, facebook.posts_insights.
+
+    **Headers:** ceux des endpoints appelés (X-OAuth-Credentials,
+    X-Mailchimp-API-Key, X-Vimeo-Access-Token, X-Facebook-Page-Access-Token) ;
+    X-LinkedIn-OAuth-Credentials pour les sources linkedin si GA4 utilise
+    déjà X-OAuth-Credentials.
+
+    Chaque résultat est `{"status": "ok", "data": ...}` ou
+    `{"status": "error", "status_code": ..., "detail": ...}`.
+
+    À l'échéance, une sous-requête non terminée est rapportée en `504`. Les
+    sources async sont annulées ; les sources facebook.* (SDK sync, exécuté
+    dans le threadpool) sont seulement abandonnées : elles continuent en
+    arrière-plan jusqu'à leur fin, sans que leur résultat soit renvoyé.
+    Leurs noms sont listés dans `metadata.abandoned`.
+    """
+    if not batch.queries:
+        raise HTTPException(status_code=400, detail="At least one query is required")
+    if len(batch.queries) > settings.BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many queries: {len(batch.queries)} (max {settings.BATCH_MAX_QUERIES})"
+        )
+    timeout = min(batch.timeout or settings.BATCH_TIMEOUT, settings.BATCH_MAX_TIMEOUT)
+
+    started = time.monotonic()
+    tasks = {
+        name: asyncio.create_task(_run_query(query.source, query.params, request.headers))
+        for name, query in batch.queries.items()
+    }
+    _, pending = await asyncio.wait(tasks.values(), timeout=timeout)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    abandoned = []
+    for name, task in tasks.items():
+        if task in pending and _is_sync(batch.queries[name].source):
+            abandoned.append(name)
+            results[name] = {
+                "status": "error",
+                "status_code": 504,
+                "detail": f"Deadline exceeded ({timeout}s); still running in the background, result discarded",
+            }
+        elif task in pending:
+            results[name] = {"status": "error", "status_code": 504, "detail": f"Deadline exceeded ({timeout}s)"}
+        elif task.exception() is not None:
+            results[name] = {"status": "error", **_error(task.exception())}
+        else:
+            results[name] = {"status": "ok", "data": task.result()}
+
+    failed = sorted(name for name, result in results.items() if result["status"] == "error")
+    return APIResponse(
+        success=not failed,
+        data=results,
+        metadata={
+            "query_count": len(results),
+            "failed": failed,
+            "abandoned": sorted(abandoned),
+            "timeout": timeout,
+            "elapsed_s": round(time.monotonic() - started, 3),
+        },
+    )
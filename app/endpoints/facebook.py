@@ -2,15 +2,91 @@ from fastapi import APIRouter, Header, HTTPException, Query
 from facebook_business.api import FacebookAdsApi
 from facebook_business.adobjects.page import Page
 from facebook_business.exceptions import FacebookRequestError
-from typing import List
+from facebook_business.session import FacebookSession
+from typing import List, Literal, Optional, Tuple
+from collections import OrderedDict
 from datetime import date, timedelta
-import json
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+import hashlib
+import threading
+
+from app.config.settings import settings
+from kpi_connectors import rate_limit
 
 
 router = APIRouter(prefix="/facebook", tags=["facebook"])
 
+GRAPH_URL = "https://graph.facebook.com"
+# Codes d'erreur Graph API de dépassement de quota (app, utilisateur, page, appels)
+GRAPH_THROTTLE_CODES = {4, 17, 32, 613}
+# Sous-requêtes max par appel batch de la Graph API
+GRAPH_BATCH_SIZE = 50
+
+
+@contextmanager
+def _graph_call():
+    """
+    Appel SDK dans le limiteur facebook (le SDK ne passe pas par http_client) ;
+    une erreur de quota réduit la concurrence et met les autres appels en pause.
+    """
+    with rate_limit.slot(GRAPH_URL) as slot:
+        try:
+            yield slot
+        except FacebookRequestError as e:
+            if _is_throttled(e):
+                slot.throttled()
+            raise
+
+def _is_throttled(error: FacebookRequestError) -> bool:
+    return error.http_status() == 429 or error.api_error_code() in GRAPH_THROTTLE_CODES
+
+
+class FacebookApiPool:
+    """
+    Un FacebookAdsApi par token (clé : hash du token), réutilisé d'une
+    requête à l'autre avec sa session et ses connexions keep-alive. Chaque
+    route passe son api explicitement (Page(page_id, api=api)) au lieu de
+    FacebookAdsApi.init, qui remplace l'api par défaut du SDK, commune à
+    toutes les requêtes en cours.
+    """
+
+    def __init__(self, max_size: int = 64, timeout: Optional[float] = None):
+        self.max_size = max_size
+        self.timeout = timeout
+        # La session est gardée à côté de l'api : le pool la crée, c'est à lui de la fermer.
+        self._entries: "OrderedDict[str, Tuple[FacebookSession, FacebookAdsApi]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def api_for(self, access_token: str) -> FacebookAdsApi:
+        key = hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[1]
+            session = FacebookSession(access_token=access_token, timeout=self.timeout)
+            api = FacebookAdsApi(session)
+            self._entries[key] = (session, api)
+            if len(self._entries) > self.max_size:
+                # Pas de close : la session évincée peut encore servir à une requête en cours
+                self._entries.popitem(last=False)
+            return api
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = [session for session, _ in self._entries.values()]
+            self._entries.clear()
+        for session in sessions:
+            session.requests.close()
+
+
+_api_pool = FacebookApiPool(max_size=settings.FACEBOOK_API_CACHE_SIZE, timeout=settings.HTTP_TIMEOUT)
+
+
+def close_facebook_apis() -> None:
+    _api_pool.close()
+
 DEFAULT_METRICS = [
     "page_post_engagements",
     "page_follows",
@@ -28,15 +104,15 @@ def get_page_insights(
     x_facebook_page_access_token: str = Header(...),
 ):
     try:
-        FacebookAdsApi.init(access_token=x_facebook_page_access_token)
-        page = Page(page_id)
-        insights = page.get_insights(params={
-            "metric": metric,
-            "period": period,
-            "since": since.isoformat(),
-            "until": until.isoformat(),
-        })
-        return [i.export_all_data() for i in insights]
+        page = Page(page_id, api=_api_pool.api_for(x_facebook_page_access_token))
+        with _graph_call():
+            insights = page.get_insights(params={
+                "metric": metric,
+                "period": period,
+                "since": since.isoformat(),
+                "until": until.isoformat(),
+            })
+            return [i.export_all_data() for i in insights]
     except FacebookRequestError as e:
         raise HTTPException(status_code=400, detail=f"Facebook API error: {e.api_error_message()}")
     
@@ -46,9 +122,9 @@ def get_page_overview(
     x_facebook_page_access_token: str = Header(...),
 ):
     try:
-        FacebookAdsApi.init(access_token=x_facebook_page_access_token)
-        page = Page(page_id)
-        page_data = page.api_get(fields=["name", "followers_count", "fan_count"])
+        page = Page(page_id, api=_api_pool.api_for(x_facebook_page_access_token))
+        with _graph_call():
+            page_data = page.api_get(fields=["name", "followers_count", "fan_count"])
         return page_data.export_all_data()
     except FacebookRequestError as e:
         raise HTTPException(status_code=400, detail=f"Facebook API error: {e.api_error_message()}")
@@ -61,122 +137,106 @@ DEFAULT_POST_METRICS = [
     "post_total_media_view_unique",
     "post_clicks",
 ]
-GRAPH_API_VERSION = "v25.0"
+POST_INSIGHTS_PARAMS = {"metric": DEFAULT_POST_METRICS, "period": "lifetime"}
 
-@router.get("/posts-insights")
-def get_posts_with_insights(
-    page_id: str = Query(...),
-    limit: int = Query(25),
-    x_facebook_page_access_token: str = Header(...),
-):
+def _insight_values(insights) -> dict:
+    return {i["name"]: i["values"][0]["value"] for i in insights}
+
+def _fetch_post_insights(post) -> dict:
+    """Insights d'un post en un appel ; {} si la Graph API les refuse."""
     try:
-        FacebookAdsApi.init(access_token=x_facebook_page_access_token)
-        page = Page(page_id)
-        posts = list(page.get_posts(
-            fields=["id", "message", "created_time", "comments.summary(true)", "shares"],
-            params={"limit": limit},
-        ))
-
-        def fetch_insights(post):
-            try:
-                insights = post.get_insights(params={
-                    "metric": DEFAULT_POST_METRICS,
-                    "period": "lifetime",
-                })
-                values = {i["name"]: i["values"][0]["value"] for i in insights}
-            except FacebookRequestError:
-                values = {}
-            return post, values
-
-        results = []
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(fetch_insights, post) for post in posts]
-            for future in as_completed(futures):
-                post, values = future.result()
-                comments_data = post.get("comments") or {}
-                results.append({
-                    "post_id": post["id"],
-                    "message": post.get("message", ""),
-                    "created_time": post.get("created_time"),
-                    "likes_total": values.get("post_reactions_like_total", 0),
-                    "love_total": values.get("post_reactions_love_total", 0),
-                    "views_unique": values.get("post_total_media_view_unique", 0),
-                    "clicks": values.get("post_clicks", 0),
-                    "comments_count": comments_data.get("summary", {}).get("total_count", 0),
-                    "shares_count": (post.get("shares") or {}).get("count", 0),
-                })
-        return {"total_posts": len(results), "posts": results}
-    except FacebookRequestError as e:
-        raise HTTPException(status_code=400, detail=f"Facebook API error: {e.api_error_message()}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
-    
+        with _graph_call():
+            insights = post.get_insights(params=POST_INSIGHTS_PARAMS)
+        return _insight_values(insights)
+    except FacebookRequestError:
+        return {}
+
+def _fetch_insights_batch(api: FacebookAdsApi, posts: list) -> List[Optional[dict]]:
+    """
+    Insights de posts (GRAPH_BATCH_SIZE au plus) en un appel batch. Chaque
+    sous-réponse est lue séparément : None pour les posts dont la
+    sous-requête a échoué ou n'a pas eu de réponse (à redemander seuls),
+    tous à None si l'appel batch lui-même échoue.
+    """
+    values: List[Optional[dict]] = [None] * len(posts)
+    errors: List[FacebookRequestError] = []
+
+    def on_success(index: int, response) -> None:
+        values[index] = _insight_values(response.json().get("data", []))
 
-"""
- donne erreur : {
-  "detail": "Facebook batch error: {\"error\":{\"message\":\"An error has occurred. No further information is available.\",\"type\":\"GraphBatchException\",\"fbtrace_id\":\"...\"}}"
-}
+    batch = api.new_batch()
+    for index, post in enumerate(posts):
+        post.get_insights(
+            params=POST_INSIGHTS_PARAMS,
+            batch=batch,
+            success=lambda response, index=index: on_success(index, response),
+            failure=lambda response: errors.append(response.error()),
+        )
+    try:
+        with _graph_call() as slot:
+            batch.execute()   # les sous-requêtes sans réponse restent à None
+            if any(_is_throttled(e) for e in errors):
+                slot.throttled()
+    except FacebookRequestError:
+        return [None] * len(posts)
+    return values
+
+def _fetch_posts_insights(api: FacebookAdsApi, posts: list, mode: str, executor: ThreadPoolExecutor) -> List[dict]:
+    """
+    Insights de chaque post, dans l'ordre des posts. batch : un appel Graph
+    par paquet de GRAPH_BATCH_SIZE posts, puis un appel par post seulement
+    pour les sous-requêtes en échec ; parallel : un appel par post.
+    """
+    if mode != "batch":
+        return list(executor.map(_fetch_post_insights, posts))
+
+    chunks = [posts[i:i + GRAPH_BATCH_SIZE] for i in range(0, len(posts), GRAPH_BATCH_SIZE)]
+    values = [v for chunk_values in executor.map(lambda chunk: _fetch_insights_batch(api, chunk), chunks) for v in chunk_values]
+
+    retry = [i for i, v in enumerate(values) if v is None]
+    for i, retried in zip(retry, executor.map(_fetch_post_insights, [posts[i] for i in retry])):
+        values[i] = retried
+    return values
+
+def _post_row(post, values: dict) -> dict:
+    comments_data = post.get("comments") or {}
+    return {
+        "post_id": post["id"],
+        "message": post.get("message", ""),
+        "created_time": post.get("created_time"),
+        "likes_total": values.get("post_reactions_like_total", 0),
+        "love_total": values.get("post_reactions_love_total", 0),
+        "views_unique": values.get("post_total_media_view_unique", 0),
+        "clicks": values.get("post_clicks", 0),
+        "comments_count": comments_data.get("summary", {}).get("total_count", 0),
+        "shares_count": (post.get("shares") or {}).get("count", 0),
+    }
 
 @router.get("/posts-insights")
 def get_posts_with_insights(
     page_id: str = Query(...),
     limit: int = Query(25),
+    mode: Literal["parallel", "batch"] = Query(
+        "batch",
+        description="batch = insights demandés par paquets de 50 (appels batch Graph API), "
+                    "avec repli post par post sur les échecs ; parallel = un appel par post",
+    ),
     x_facebook_page_access_token: str = Header(...),
 ):
     try:
-        FacebookAdsApi.init(access_token=x_facebook_page_access_token)
-        page = Page(page_id)
-        posts = list(page.get_posts(
-            fields=["id", "message", "created_time", "comments.summary(true)", "shares"],
-            params={"limit": limit},
-        ))
-
-        if not posts:
-            return {"total_posts": 0, "posts": []}
-
-        metrics_str = ",".join(DEFAULT_POST_METRICS)
-        batch_requests = [
-            {"method": "GET", "relative_url": f"{post['id']}/insights?metric={metrics_str}"}
-            for post in posts
-        ]
-
-        response = requests.post(
-            f"https://graph.facebook.com/{GRAPH_API_VERSION}",
-            data={
-                "access_token": x_facebook_page_access_token,
-                "batch": json.dumps(batch_requests),
-            },
-            timeout=30,
-        )
-        if response.status_code != 200:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Facebook batch error: {response.text}"
-            )
-        batch_results = response.json()
-
-        results = []
-        for post, batch_item in zip(posts, batch_results):
-            values = {}
-            if batch_item and batch_item.get("code") == 200:
-                body = json.loads(batch_item["body"])
-                values = {i["name"]: i["values"][0]["value"] for i in body.get("data", [])}
-
-            comments_data = post.get("comments") or {}
-            results.append({
-                "post_id": post["id"],
-                "message": post.get("message", ""),
-                "created_time": post.get("created_time"),
-                "likes_total": values.get("post_reactions_like_total", 0),
-                "love_total": values.get("post_reactions_love_total", 0),
-                "views_unique": values.get("post_total_media_view_unique", 0),
-                "clicks": values.get("post_clicks", 0),
-                "comments_count": comments_data.get("summary", {}).get("total_count", 0),
-                "shares_count": (post.get("shares") or {}).get("count", 0),
-            })
+        api = _api_pool.api_for(x_facebook_page_access_token)
+        page = Page(page_id, api=api)
+        with _graph_call():
+            posts = list(page.get_posts(
+                fields=["id", "message", "created_time", "comments.summary(true)", "shares"],
+                params={"limit": limit},
+            ))
+
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            insights = _fetch_posts_insights(api, posts, mode, executor)
+        results = [_post_row(post, values) for post, values in zip(posts, insights)]
         return {"total_posts": len(results), "posts": results}
     except FacebookRequestError as e:
         raise HTTPException(status_code=400, detail=f"Facebook API error: {e.api_error_message()}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
-"""
@@ -1,16 +1,22 @@
 from fastapi import APIRouter, Query, Depends, HTTPException
-from typing import Optional
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
 from datetime import date
  
 from kpi_connectors.auth.oauth import OAuthCredentials, OAuthService
-from kpi_connectors.connectors.linkedin import (
+from kpi_connectors.connectors.linkedin import DEFAULT_LINKEDIN_API_VERSION
+from kpi_connectors.connectors.aio.linkedin import (
     fetch_follower_count,
     fetch_share_statistics,
     fetch_organization_posts,
     fetch_share_statistics_by_posts,
-    DEFAULT_LINKEDIN_API_VERSION,
+    iter_posts_with_stats,
+    sync_organization_posts,
 )
+from kpi_connectors.storage.linkedin_store import get_linkedin_stats_store, get_linkedin_store
+from app.config.settings import settings
 from app.endpoints.analytics import parse_oauth_credentials
+from app.utils.streaming import NDJSON_MEDIA_TYPE, ndjson_chunks
  
 router = APIRouter(
     prefix="/linkedin",
@@ -19,7 +25,7 @@ router = APIRouter(
  
  
 @router.get("/followers")
-def get_linkedin_follower_count(
+async def get_linkedin_follower_count(
     organization_urn: str = Query(..., description="ex: urn:li:organization:12345678"),
     api_version: str = Query(
         DEFAULT_LINKEDIN_API_VERSION,
@@ -30,13 +36,13 @@ def get_linkedin_follower_count(
 ):
     try:
         oauth_service = OAuthService(credentials)
-        return fetch_follower_count(oauth_service, organization_urn, api_version=api_version)
+        return await fetch_follower_count(oauth_service, organization_urn, api_version=api_version)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
  
  
 @router.get("/shares")
-def get_linkedin_share_stats(
+async def get_linkedin_share_stats(
     organization_urn: str = Query(..., description="ex: urn:li:organization:12345678"),
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
@@ -49,15 +55,17 @@ def get_linkedin_share_stats(
 ):
     try:
         oauth_service = OAuthService(credentials)
-        return fetch_share_statistics(
-            oauth_service, organization_urn, start_date, end_date, api_version=api_version
+        return await fetch_share_statistics(
+            oauth_service, organization_urn, start_date, end_date, api_version=api_version,
+            store=get_linkedin_stats_store(),
+            volatile_days=settings.LINKEDIN_SHARE_STATS_VOLATILE_DAYS,
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
  
  
 @router.get("/posts")
-def get_linkedin_posts_with_stats(
+async def get_linkedin_posts_with_stats(
     organization_urn: str = Query(..., description="ex: urn:li:organization:12345678"),
     max_posts: Optional[int] = Query(None, description="Limite le nombre de posts (None = tout l'historique)"),
     api_version: str = Query(
@@ -65,22 +73,83 @@ def get_linkedin_posts_with_stats(
         description="Version de l'API LinkedIn, format YYYYMM. Envoyé par le paramètre "
                      "VersionAPILinkedIn de Power BI.",
     ),
+    stream: Optional[Literal["ndjson"]] = Query(
+        None,
+        description="Renvoie les posts en flux (NDJSON) au fur et à mesure que leurs stats arrivent",
+    ),
     credentials: OAuthCredentials = Depends(parse_oauth_credentials),
 ):
     try:
         oauth_service = OAuthService(credentials)
-        posts = fetch_organization_posts(
+ 
+        store = get_linkedin_store()
+        if store is not None:
+            # Synchro incrémentale : seuls les nouveaux posts et les stats périmées sont demandés
+            result = await sync_organization_posts(
+                oauth_service,
+                organization_urn,
+                store,
+                max_posts=max_posts,
+                recent_days=settings.LINKEDIN_STATS_RECENT_DAYS,
+                recent_stats_ttl=settings.LINKEDIN_STATS_RECENT_TTL,
+                old_stats_ttl=settings.LINKEDIN_STATS_OLD_TTL,
+                api_version=api_version,
+            )
+            if stream:
+                return StreamingResponse(ndjson_chunks(_as_pages(result["posts"])), media_type=NDJSON_MEDIA_TYPE)
+            return result
+ 
+        if stream:
+            pages = iter_posts_with_stats(
+                oauth_service, organization_urn, max_posts=max_posts, api_version=api_version
+            )
+            # Première page lue ici : une erreur LinkedIn/OAuth donne encore un 500
+            first_page = await anext(pages, [])
+ 
+            async def batches():
+                yield first_page
+                async for page in pages:
+                    yield page
+ 
+            return StreamingResponse(ndjson_chunks(batches()), media_type=NDJSON_MEDIA_TYPE)
+ 
+        posts = await fetch_organization_posts(
             oauth_service, organization_urn, max_posts=max_posts, api_version=api_version
         )
         share_urns = [p["id"] for p in posts if p.get("id")]
-        stats = fetch_share_statistics_by_posts(
+        stats_by_urn = await fetch_share_statistics_by_posts(
             oauth_service, organization_urn, share_urns, api_version=api_version
         )
  
-        stats_by_urn = {s["share_urn"]: s for s in stats}
         for post in posts:
             post["stats"] = stats_by_urn.get(post["id"])
  
         return {"organization_urn": organization_urn, "posts": posts}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
+ 
+ 
+async def _as_pages(posts: list[dict], page_size: int = 500):
+    for i in range(0, len(posts), page_size):
+        yield posts[i:i + page_size]
+ 
+ 
+@router.delete("/cache")
+async def invalidate_linkedin_cache(
+    organization_urn: Optional[str] = Query(None, description="Organisation (vide = toutes)"),
+    credentials: OAuthCredentials = Depends(parse_oauth_credentials),
+):
+    """
+    Vide le cache local des posts (et du watermark) et des stats quotidiennes
+    pour les credentials fournis : la prochaine synchro reprendra tout l'historique.
+    """
+    store, stats_store = get_linkedin_store(), get_linkedin_stats_store()
+    if store is None or stats_store is None:
+        return {"removed_posts": 0, "removed_days": 0, "cache_enabled": False}
+ 
+    owner = OAuthService(credentials).cache_key
+    return {
+        "removed_posts": store.invalidate(owner=owner, organization_urn=organization_urn),
+        "removed_days": stats_store.invalidate(owner=owner, organization_urn=organization_urn),
+        "cache_enabled": True,
+    }
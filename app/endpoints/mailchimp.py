@@ -1,9 +1,23 @@
 from fastapi import APIRouter, Query, Header, HTTPException
-from typing import Optional
+from typing import List, Literal, Optional
+
+import httpx
 
 from app.config.settings import settings
-from kpi_connectors.models.mailchimp import MailchimpAudienceResponse, MailchimpCampaignSummaryResponse, MailchimpCampaignParams
-from kpi_connectors.connectors.mailchimp import fetch_mailchimp_audiences, fetch_mailchimp_campaign_summaries, fetch_mailchimp_click_details
+from kpi_connectors.models.mailchimp import (
+    MailchimpAudienceResponse,
+    MailchimpCampaignParams,
+    MailchimpCampaignSummaryResponse,
+    MailchimpClickDetailsResponse,
+)
+from kpi_connectors.connectors.aio.mailchimp import (
+    fetch_mailchimp_audiences,
+    fetch_mailchimp_campaign_summaries,
+    fetch_mailchimp_click_details,
+    fetch_mailchimp_click_details_batch,
+)
+from kpi_connectors.connectors.mailchimp import MailchimpBatchTimeout
+from kpi_connectors.storage.mailchimp_store import get_mailchimp_store, owner_for
 
 router = APIRouter(
     prefix="/mailchimp",
@@ -11,39 +25,99 @@ router = APIRouter(
 )
 
 @router.get("/campaigns/summary", response_model=MailchimpCampaignSummaryResponse)
-def list_mailchimp_campaign_summaries(
+async def list_mailchimp_campaign_summaries(
     status: Optional[str] = Query("sent", description="sent, draft, scheduled..."),
-    count: int = Query(1000, ge=1, le=1000, description="Nombre max de campagnes"),
+    count: Optional[int] = Query(None, ge=1, description="Nombre max de campagnes (vide = toutes, par pages de 1000)"),
     since_send_time: Optional[str] = Query(None, description="Date min (Format Asked: 2025-01-01T00:00:00+00:00)"),
     before_send_time: Optional[str] = Query(None, description="Date max "),
+    partitions: int = Query(
+        1, ge=1, le=32,
+        description="Découpe [since_send_time, before_send_time] en N fenêtres lues en parallèle "
+                    "(gros comptes) ; nécessite since_send_time",
+    ),
     x_mailchimp_api_key: str = Header(..., alias="X-Mailchimp-API-Key"),
 ):
-    params = MailchimpCampaignParams(
-        status=status, count=count,
-        since_send_time=since_send_time, before_send_time=before_send_time,
-    )
-    summaries = fetch_mailchimp_campaign_summaries(api_key=x_mailchimp_api_key, params=params)
+    try:
+        params = MailchimpCampaignParams(
+            status=status, count=count,
+            since_send_time=since_send_time, before_send_time=before_send_time,
+            partitions=partitions,
+        )
+        summaries = await fetch_mailchimp_campaign_summaries(api_key=x_mailchimp_api_key, params=params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return MailchimpCampaignSummaryResponse(total_campaigns=len(summaries), campaigns=summaries)
 
 @router.get("/audiences", response_model=MailchimpAudienceResponse)
-def list_mailchimp_audiences(
+async def list_mailchimp_audiences(
     x_mailchimp_api_key: str = Header(..., alias="X-Mailchimp-API-Key"),
 ):
-    return fetch_mailchimp_audiences(api_key=x_mailchimp_api_key)
+    return await fetch_mailchimp_audiences(api_key=x_mailchimp_api_key)
 
 
-@router.get("/campaigns/click-details")
-def list_mailchimp_click_details(
+@router.get("/campaigns/click-details", response_model=MailchimpClickDetailsResponse)
+async def list_mailchimp_click_details(
     campaign_id: str | None = Query(
         None,
         description="ID de campagne Mailchimp. Si vide, récupère le détail pour toutes les campagnes envoyées.",
     ),
+    campaign_ids: Optional[List[str]] = Query(
+        None,
+        description="Plusieurs IDs de campagne (ex. les failed_campaigns d'un appel précédent, à relancer)",
+    ),
+    mode: Literal["parallel", "batch"] = Query(
+        "parallel",
+        description="parallel = un GET par campagne ; batch = un seul job Mailchimp /batches "
+                    "(beaucoup de campagnes, moins de 429, plus lent à démarrer)",
+    ),
     x_mailchimp_api_key: str = Header(..., alias="X-Mailchimp-API-Key"),
 ):
+    # Cache par campagne : seules les campagnes récentes sont redemandées
+    cache = {
+        "store": get_mailchimp_store(),
+        "refresh_days": settings.MAILCHIMP_CLICKS_REFRESH_DAYS,
+        "frozen_after_days": settings.MAILCHIMP_CLICKS_FROZEN_AFTER_DAYS,
+        "daily_ttl": settings.MAILCHIMP_CLICKS_DAILY_TTL,
+    }
     try:
-        return fetch_mailchimp_click_details(
-            api_key=x_mailchimp_api_key,
-            campaign_id=campaign_id,
-        )
-    except ValueError as e:
+        if mode == "batch":
+            result = await fetch_mailchimp_click_details_batch(
+                api_key=x_mailchimp_api_key,
+                campaign_id=campaign_id,
+                poll_interval=settings.MAILCHIMP_BATCH_POLL_INTERVAL,
+                timeout=settings.MAILCHIMP_BATCH_TIMEOUT,
+                campaign_ids=campaign_ids,
+                **cache,
+            )
+        else:
+            result = await fetch_mailchimp_click_details(
+                api_key=x_mailchimp_api_key,
+                campaign_id=campaign_id,
+                campaign_ids=campaign_ids,
+                **cache,
+            )
+        return MailchimpClickDetailsResponse(total_click_details=len(result["click_details"]), **result)
+    except MailchimpBatchTimeout as e:
         raise HTTPException(status_code=504, detail=str(e))
+    except httpx.HTTPStatusError as e:
+        raise HTTPException(
+            status_code=502,
+            detail=f"Mailchimp API error {e.response.status_code}: {e.request.url}",
+        )
+    except httpx.HTTPError as e:
+        raise HTTPException(status_code=502, detail=f"Mailchimp API error: {e}")
+
+
+@router.delete("/cache")
+async def invalidate_mailchimp_cache(
+    campaign_id: str | None = Query(None, description="Campagne (vide = toutes)"),
+    x_mailchimp_api_key: str = Header(..., alias="X-Mailchimp-API-Key"),
+):
+    """Vide le cache local des click-details pour la clé d'API fournie."""
+    store = get_mailchimp_store()
+    if store is None:
+        return {"removed_campaigns": 0, "cache_enabled": False}
+    return {
+        "removed_campaigns": store.invalidate(owner=owner_for(x_mailchimp_api_key), campaign_id=campaign_id),
+        "cache_enabled": True,
+    }
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.endpoints import analytics, mailchimp, vimeo, facebook, linkedin
+from app.endpoints import analytics, mailchimp, vimeo, facebook, linkedin, batch
 
 """
 This module centralizes and aggregates the API routes into a single unified router.
@@ -10,4 +10,5 @@ router.include_router(analytics.router, tags=["analytics"])
 router.include_router(mailchimp.router)
 router.include_router(vimeo.router)
 router.include_router(facebook.router)
-router.include_router(linkedin.router)
\ No newline at end of file
+router.include_router(linkedin.router)
+router.include_router(batch.router)
\ No newline at end of file
@@ -1,14 +1,25 @@
-from fastapi import APIRouter, Query, Header
-from typing import Optional
+from datetime import date
+from fastapi import APIRouter, Query, Header, HTTPException
+from typing import List, Optional
 
 from app.config.settings import settings
-from kpi_connectors.models.vimeo import VimeoVideosResponse, VimeoQueryParams, VimeoFollowerCountResponse
-from kpi_connectors.connectors.vimeo import fetch_vimeo_videos, fetch_vimeo_follower_count
+from kpi_connectors.models.vimeo import (
+    VimeoVideosResponse,
+    VimeoQueryParams,
+    VimeoFollowerCountResponse,
+    VimeoVideoAnalyticsResponse,
+)
+from kpi_connectors.connectors.aio.vimeo import (
+    fetch_vimeo_videos,
+    fetch_vimeo_follower_count,
+    fetch_vimeo_video_analytics,
+)
+from kpi_connectors.storage.vimeo_store import get_vimeo_store
 
 router = APIRouter(prefix="/vimeo", tags=["vimeo"])
 
 @router.get("/videos", response_model=VimeoVideosResponse)
-def list_vimeo_videos(
+async def list_vimeo_videos(
     per_page: int = Query(100, ge=1, le=100, description="Vidéos par page (1-100)"),
     sort: Optional[str] = Query(None, description="date, plays, alphabetical, duration"),
     direction: Optional[str] = Query(None, description="asc ou desc"),
@@ -16,11 +27,32 @@ def list_vimeo_videos(
     x_vimeo_access_token: str = Header(..., alias="X-Vimeo-Access-Token"),
 ):
     params = VimeoQueryParams(per_page=per_page, sort=sort, direction=direction, query=query)
-    videos = fetch_vimeo_videos(access_token=x_vimeo_access_token, params=params)
+    videos = await fetch_vimeo_videos(access_token=x_vimeo_access_token, params=params)
     return VimeoVideosResponse(total_videos=len(videos), videos=videos)
 
 @router.get("/followers", response_model=VimeoFollowerCountResponse)
-def get_vimeo_follower_count(
+async def get_vimeo_follower_count(
     x_vimeo_access_token: str = Header(..., alias="X-Vimeo-Access-Token"),
 ):
-    return fetch_vimeo_follower_count(access_token=x_vimeo_access_token)
\ No newline at end of file
+    return await fetch_vimeo_follower_count(access_token=x_vimeo_access_token)
+
+@router.get("/analytics", response_model=VimeoVideoAnalyticsResponse)
+async def get_vimeo_video_analytics(
+    start_date: date = Query(..., description="Premier jour (inclus)"),
+    end_date: date = Query(..., description="Dernier jour (inclus)"),
+    video_ids: Optional[List[str]] = Query(None, description="Vidéos à interroger (toutes si omis)"),
+    x_vimeo_access_token: str = Header(..., alias="X-Vimeo-Access-Token"),
+):
+    """Plays et impressions quotidiens par vidéo ; les jours définitifs déjà récupérés viennent du cache."""
+    try:
+        return await fetch_vimeo_video_analytics(
+            access_token=x_vimeo_access_token,
+            start_date=start_date,
+            end_date=end_date,
+            video_ids=video_ids,
+            store=get_vimeo_store(),
+            volatile_days=settings.VIMEO_ANALYTICS_VOLATILE_DAYS,
+            max_workers=settings.VIMEO_ANALYTICS_CONCURRENCY,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
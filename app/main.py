@@ -1,14 +1,69 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config.settings import settings
+from app.endpoints.facebook import close_facebook_apis
 from app.endpoints.router import router
+from kpi_connectors.auth.token_cache import configure_token_cache
+from kpi_connectors.connectors.linkedin import configure_stats_concurrency
+from kpi_connectors.http_cache import configure_http_cache
+from kpi_connectors.http_client import HTTPClientConfig, configure_http_clients, close_http_clients, aclose_http_clients
+from kpi_connectors.rate_limit import configure_rate_limits
+from kpi_connectors.storage.ga4_store import configure_ga4_store
+from kpi_connectors.storage.linkedin_store import configure_linkedin_store
+from kpi_connectors.storage.mailchimp_store import configure_mailchimp_store
+from kpi_connectors.storage.vimeo_store import configure_vimeo_store
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    configure_token_cache(
+        path=settings.OAUTH_TOKEN_CACHE_PATH,
+        refresh_margin=settings.OAUTH_TOKEN_REFRESH_MARGIN,
+    )
+    configure_http_clients(HTTPClientConfig(
+        pool_size=settings.HTTP_POOL_SIZE,
+        timeout=settings.HTTP_TIMEOUT,
+        max_retries=settings.HTTP_MAX_RETRIES,
+        backoff_factor=settings.HTTP_BACKOFF_FACTOR,
+    ))
+    configure_rate_limits(settings.RATE_LIMITS, enabled=settings.RATE_LIMIT_ENABLED)
+    configure_http_cache(
+        enabled=settings.HTTP_CACHE_ENABLED,
+        max_bytes=settings.HTTP_CACHE_MAX_MB * 1024 * 1024,
+        path=settings.HTTP_CACHE_PATH,
+        disk_max_bytes=settings.HTTP_CACHE_DISK_MAX_MB * 1024 * 1024,
+    )
+    configure_ga4_store(
+        settings.GA4_CACHE_PATH,
+        max_bytes=settings.GA4_CACHE_MAX_MB * 1024 * 1024,
+    )
+    configure_linkedin_store(settings.LINKEDIN_CACHE_PATH)
+    configure_mailchimp_store(settings.MAILCHIMP_CACHE_PATH)
+    configure_vimeo_store(settings.VIMEO_CACHE_PATH)
+    configure_stats_concurrency(
+        settings.LINKEDIN_STATS_CONCURRENCY,
+        by_version=settings.LINKEDIN_STATS_CONCURRENCY_BY_VERSION,
+    )
+    yield
+    close_http_clients()
+    await aclose_http_clients()
+    close_facebook_apis()
+    configure_ga4_store(None)
+    configure_linkedin_store(None)
+    configure_mailchimp_store(None)
+    configure_vimeo_store(None)
+    configure_http_cache(enabled=False)
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=f"{settings.API_V1_STR}/docs",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -1,8 +1,21 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, Dict, Any
 
 class APIResponse(BaseModel):
     success: bool
     data: Optional[Any] = None
     error: Optional[str] = None
-    metadata: Optional[Dict[str, Any]] = None
\ No newline at end of file
+    metadata: Optional[Dict[str, Any]] = None
+
+class BatchQuery(BaseModel):
+    # Nom de la source (voir app.endpoints.batch.SOURCES), ex. "ga4", "vimeo.videos"
+    source: str
+    # Paramètres de requête de l'endpoint correspondant (les mêmes que en GET)
+    params: Dict[str, Any] = Field(default_factory=dict)
+
+
+class BatchRequest(BaseModel):
+    # {nom choisi par l'appelant: sous-requête}
+    queries: Dict[str, BatchQuery]
+    # Délai global en secondes (défaut : settings.BATCH_TIMEOUT)
+    timeout: Optional[float] = Field(None, gt=0)
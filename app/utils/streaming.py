@@ -0,0 +1,33 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List
+
+"""
+Encodage en flux (NDJSON / CSV) des réponses volumineuses, à passer à une
+StreamingResponse FastAPI.
+"""
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+
+
+async def ndjson_chunks(batches: AsyncIterable[List[Dict[str, Any]]]) -> AsyncIterator[str]:
+    """Un objet JSON par ligne ; un bloc de texte par lot de lignes."""
+    async for rows in batches:
+        if rows:
+            yield "".join(json.dumps(row, default=str) + "\n" for row in rows)
+
+
+async def csv_chunks(fieldnames: List[str], batches: AsyncIterable[List[Dict[str, Any]]]) -> AsyncIterator[str]:
+    """En-tête puis un bloc CSV par lot de lignes."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+    writer.writeheader()
+    async for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,135 @@
+"""
+Microbenchmark : conversion des métriques GA4.
+
+Compare, sur une réponse runReport synthétique (250k lignes par défaut),
+l'ancienne conversion cellule par cellule (_convert_value) à la conversion
+typée par colonne (convert_metric_column). Une variante NumPy est mesurée à
+titre de référence si NumPy est installé.
+
+Usage : python benchmarks/bench_ga4_convert.py [--rows 250000] [--repeat 5]
+"""
+
+import argparse
+import gc
+import random
+import statistics
+import time
+
+from kpi_connectors.connectors.ga4 import (
+    FLOAT_METRIC_TYPES,
+    INTEGER_METRIC_TYPES,
+    GA4Service,
+    convert_metric_column,
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def make_payload(n_rows: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    return {
+        "dimensionHeaders": [{"name": "date"}, {"name": "eventName"}],
+        "metricHeaders": [
+            {"name": "activeUsers", "type": "TYPE_INTEGER"},
+            {"name": "eventCount", "type": "TYPE_INTEGER"},
+            {"name": "userEngagementDuration", "type": "TYPE_SECONDS"},
+            {"name": "engagementRate", "type": "TYPE_FLOAT"},
+        ],
+        "rows": [
+            {
+                "dimensionValues": [
+                    {"value": f"2025{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"},
+                    {"value": f"event_{rng.randint(0, 40)}"},
+                ],
+                "metricValues": [
+                    {"value": str(rng.randint(0, 5000))},
+                    {"value": str(rng.randint(0, 50000))},
+                    {"value": str(rng.randint(0, 900000))},
+                    {"value": f"{rng.random():.6f}"},
+                ],
+            }
+            for _ in range(n_rows)
+        ],
+        "rowCount": n_rows,
+    }
+
+
+def legacy_parse(data: dict) -> list[dict]:
+    """Version d'origine de _parse_response : un dict et un try/except par cellule."""
+    dimension_headers = [d["name"] for d in data.get("dimensionHeaders", [])]
+    metric_headers = [m["name"] for m in data.get("metricHeaders", [])]
+    parsed_rows = []
+    for row in data.get("rows", []):
+        row_dict = {}
+        dim_values = [dv.get("value") for dv in row.get("dimensionValues", [])]
+        for name, value in zip(dimension_headers, dim_values):
+            row_dict[name] = value
+        met_values = [mv.get("value") for mv in row.get("metricValues", [])]
+        for name, value in zip(metric_headers, met_values):
+            row_dict[name] = GA4Service._convert_value(value)
+        parsed_rows.append(row_dict)
+    return parsed_rows
+
+
+def numpy_convert(values: list, metric_type: str) -> list:
+    if metric_type in INTEGER_METRIC_TYPES:
+        return np.array(values, dtype=np.int64).tolist()
+    if metric_type in FLOAT_METRIC_TYPES:
+        return np.array(values, dtype=np.float64).tolist()
+    return [GA4Service._convert_value(v) for v in values]
+
+
+def timeit(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=250_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = make_payload(args.rows)
+    service = GA4Service(oauth_service=None)
+    metric_types = [m["type"] for m in payload["metricHeaders"]]
+    raw_columns = [
+        [row["metricValues"][j]["value"] for row in payload["rows"]]
+        for j in range(len(metric_types))
+    ]
+
+    sections = {
+        "conversion des métriques seule": {
+            "per-cell (legacy)": lambda: [[GA4Service._convert_value(v) for v in c] for c in raw_columns],
+            "typed columns": lambda: [convert_metric_column(c, t) for c, t in zip(raw_columns, metric_types)],
+            "typed columns (numpy)": lambda: [numpy_convert(c, t) for c, t in zip(raw_columns, metric_types)],
+        },
+        "_parse_response complet": {
+            "per-cell (legacy)": lambda: legacy_parse(payload),
+            "typed columns": lambda: service._parse_response(payload),
+        },
+    }
+
+    print(f"{args.rows} lignes, médiane sur {args.repeat} essais")
+    for title, cases in sections.items():
+        print(title)
+        baseline = None
+        for name, fn in cases.items():
+            if "numpy" in name and np is None:
+                print(f"  {name:<26}   (NumPy non installé)")
+                continue
+            elapsed = timeit(fn, args.repeat)
+            baseline = baseline or elapsed
+            print(f"  {name:<26} {elapsed * 1000:8.1f} ms  (x{baseline / elapsed:.2f})")
+
+
+if __name__ == "__main__":
+    main()
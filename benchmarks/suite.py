@@ -0,0 +1,273 @@
+"""
+Suite de microbenchmarks des chemins chauds de parsing / transformation.
+
+Tout tourne hors ligne sur des réponses amont synthétiques de taille réaliste :
+- GA4 : réponses runReport de 1k, 100k et 1M lignes (décodage JSON,
+  _parse_response, assemblage rows et columnar) ;
+- LinkedIn : 5k posts et leurs share statistics (aplatissement des éléments,
+  jointure posts/stats, validation LinkedInPostsResponse) ;
+- Mailchimp : 1k campagnes (aplatissement des reports, validation
+  MailchimpCampaignSummaryResponse).
+
+Pour chaque étape : temps médian sur --repeat essais, puis pic mémoire
+(tracemalloc) sur un essai séparé, pour ne pas fausser le temps.
+
+Les résultats sont comparés à benchmarks/baseline.json ; une étape est
+signalée en régression si elle dépasse la baseline de plus de
+--time-tolerance (temps) ou --memory-tolerance (mémoire). Les temps dépendent
+de la machine : régénérer la baseline (--save-baseline) avant de comparer
+sur un autre poste.
+
+Usage :
+    python benchmarks/suite.py                      # compare à la baseline
+    python benchmarks/suite.py --save-baseline      # (ré)écrit la baseline
+    python benchmarks/suite.py --ga4-rows 1000 100000 --check   # code 1 si régression
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from bench_ga4_convert import make_payload as make_ga4_payload
+from kpi_connectors.connectors.ga4 import ColumnarReport, GA4Service, RowsReport
+from kpi_connectors.connectors.linkedin import _parse_post, _parse_post_stats, _stats_by_urn
+from kpi_connectors.connectors.mailchimp import _parse_summary
+from kpi_connectors.models.linkedin import LinkedInPostsResponse
+from kpi_connectors.models.mailchimp import MailchimpCampaignSummaryResponse
+
+DEFAULT_BASELINE = Path(__file__).with_name("baseline.json")
+ORGANIZATION_URN = "urn:li:organization:12345678"
+# En dessous de cet écart absolu (secondes), un ralentissement est du bruit
+MIN_TIME_DELTA = 0.002
+
+# (nom de l'étape, fonction mesurée)
+Case = Tuple[str, Callable[[], Any]]
+
+
+def make_linkedin_payloads(n_posts: int, seed: int = 0) -> Tuple[List[dict], List[dict]]:
+    """Éléments /posts et /organizationalEntityShareStatistics (un sur cinq en ugcPost)."""
+    rng = random.Random(seed)
+    posts, stats = [], []
+    for i in range(n_posts):
+        kind = "ugcPost" if i % 5 == 0 else "share"
+        urn = f"urn:li:{kind}:{7000000000000000000 + i}"
+        published = 1700000000000 + i * 3_600_000
+        posts.append({
+            "id": urn,
+            "author": ORGANIZATION_URN,
+            "createdAt": published - 60_000,
+            "publishedAt": published,
+            "lastModifiedAt": published,
+            "commentary": f"Post {i} " + "lorem ipsum " * rng.randint(5, 40),
+            "visibility": "PUBLIC",
+            "lifecycleState": "PUBLISHED",
+            "distribution": {"feedDistribution": "MAIN_FEED"},
+        })
+        impressions = rng.randint(100, 50000)
+        stats.append({
+            "organizationalEntity": ORGANIZATION_URN,
+            kind: urn,
+            "totalShareStatistics": {
+                "impressionCount": impressions,
+                "uniqueImpressionsCount": impressions // 2,
+                "clickCount": rng.randint(0, 2000),
+                "likeCount": rng.randint(0, 1000),
+                "commentCount": rng.randint(0, 100),
+                "shareCount": rng.randint(0, 50),
+                "engagement": rng.random() / 10,
+            },
+        })
+    return posts, stats
+
+
+def make_mailchimp_reports(n_campaigns: int, seed: int = 0) -> List[dict]:
+    """Éléments de /reports tels que filtrés par _summaries_params."""
+    rng = random.Random(seed)
+    reports = []
+    for i in range(n_campaigns):
+        sent = rng.randint(1000, 200000)
+        reports.append({
+            "id": f"{i:010x}",
+            "campaign_title": f"Newsletter {i}",
+            "list_id": f"list{rng.randint(0, 9)}",
+            "send_time": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T09:00:00+00:00",
+            "emails_sent": sent,
+            "opens": {"opens_total": sent // 2, "open_rate": rng.random(), "unique_opens": sent // 3},
+            "clicks": {"clicks_total": sent // 20, "click_rate": rng.random() / 10, "unique_clicks": sent // 30},
+            "bounces": {"hard_bounces": rng.randint(0, 50), "soft_bounces": rng.randint(0, 200)},
+        })
+    return reports
+
+
+def _json_decode_case(payload: Dict[str, Any]) -> Callable[[], Any]:
+    raw = json.dumps(payload).encode("utf-8")
+    return lambda: json.loads(raw)
+
+
+def ga4_cases(n_rows: int) -> Iterator[Case]:
+    # Générateur : à 1M lignes, le dict et le JSON brut ne tiennent pas
+    # ensemble en mémoire. Le JSON brut n'est référencé que par le cas
+    # json_decode (libéré par main avant l'étape suivante) ; le payload est
+    # ensuite reconstruit à l'identique (graine fixe).
+    prefix = f"ga4[{n_rows}]"
+    yield f"{prefix}.json_decode", _json_decode_case(make_ga4_payload(n_rows))
+
+    payload = make_ga4_payload(n_rows)
+
+    def assemble(report_cls):
+        report = report_cls()
+        report.add_page(payload)
+        return report.to_dict()
+
+    yield f"{prefix}.parse_response", lambda: GA4Service._parse_response(payload)
+    yield f"{prefix}.assemble_rows", lambda: assemble(RowsReport)
+    yield f"{prefix}.assemble_columnar", lambda: assemble(ColumnarReport)
+
+
+def linkedin_cases(n_posts: int) -> List[Case]:
+    post_elements, stat_elements = make_linkedin_payloads(n_posts)
+    posts = [_parse_post(el) for el in post_elements]
+    stats = [_parse_post_stats(el) for el in stat_elements]
+    prefix = f"linkedin[{n_posts}]"
+
+    urns = [post["id"] for post in posts]
+
+    def merge():
+        # même fusion / jointure que fetch_share_statistics_by_posts + GET /linkedin/posts
+        stats_by_urn = _stats_by_urn(urns, [stats])
+        return [{**post, "stats": stats_by_urn.get(post["id"])} for post in posts]
+
+    merged = merge()
+    return [
+        (f"{prefix}.parse_posts", lambda: [_parse_post(el) for el in post_elements]),
+        (f"{prefix}.parse_stats", lambda: [_parse_post_stats(el) for el in stat_elements]),
+        (f"{prefix}.merge", merge),
+        (f"{prefix}.validate", lambda: LinkedInPostsResponse(organization_urn=ORGANIZATION_URN, posts=merged)),
+    ]
+
+
+def mailchimp_cases(n_campaigns: int) -> List[Case]:
+    reports = make_mailchimp_reports(n_campaigns)
+    summaries = [_parse_summary(r) for r in reports]
+    prefix = f"mailchimp[{n_campaigns}]"
+    return [
+        (f"{prefix}.parse_summaries", lambda: [_parse_summary(r) for r in reports]),
+        (f"{prefix}.validate", lambda: MailchimpCampaignSummaryResponse(
+            total_campaigns=len(summaries), campaigns=summaries,
+        )),
+    ]
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+    return {"time_s": statistics.median(samples), "peak_bytes": max(peak, 0)}
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    time_tolerance: float,
+    memory_tolerance: float,
+) -> List[str]:
+    """Noms des étapes en régression par rapport à la baseline."""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        slower = (
+            result["time_s"] > base["time_s"] * (1 + time_tolerance)
+            and result["time_s"] - base["time_s"] > MIN_TIME_DELTA
+        )
+        bigger = result["peak_bytes"] > base["peak_bytes"] * (1 + memory_tolerance)
+        if slower or bigger:
+            regressions.append(name)
+    return regressions
+
+
+def _format_ratio(value: float, base: float | None) -> str:
+    return f"x{value / base:5.2f}" if base else "   new"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ga4-rows", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--linkedin-posts", type=int, default=5_000)
+    parser.add_argument("--mailchimp-campaigns", type=int, default=1_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="écrit les résultats comme nouvelle baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="écart de temps toléré (0.25 = +25%%)")
+    parser.add_argument("--memory-tolerance", type=float, default=0.10, help="écart de pic mémoire toléré")
+    parser.add_argument("--check", action="store_true", help="code de sortie 1 en cas de régression")
+    args = parser.parse_args()
+
+    baseline: Dict[str, Dict[str, float]] = {}
+    if args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8")).get("results", {})
+
+    # Les payloads d'un groupe ne sont construits qu'au moment de le mesurer,
+    # et libérés avant de passer au groupe suivant
+    groups: List[Callable[[], Iterable[Case]]] = [
+        *(lambda n=n: ga4_cases(n) for n in args.ga4_rows),
+        lambda: linkedin_cases(args.linkedin_posts),
+        lambda: mailchimp_cases(args.mailchimp_campaigns),
+    ]
+
+    print(f"médiane sur {args.repeat} essais ; ratios par rapport à {args.baseline.name if baseline else '(aucune baseline)'}")
+    print(f"{'étape':<36} {'temps':>10} {'':>7} {'pic mémoire':>12} {'':>7}")
+    results: Dict[str, Dict[str, float]] = {}
+    for build in groups:
+        for name, fn in build():
+            result = results[name] = measure(fn, args.repeat)
+            base = baseline.get(name, {})
+            print(
+                f"{name:<36} {result['time_s'] * 1000:8.1f}ms {_format_ratio(result['time_s'], base.get('time_s'))}"
+                f" {result['peak_bytes'] / 1e6:10.1f}MB {_format_ratio(result['peak_bytes'], base.get('peak_bytes'))}"
+            )
+            # Libère les données du cas avant de reprendre le générateur.
+            del fn
+        gc.collect()
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps({
+            "machine": {"python": platform.python_version(), "platform": platform.platform()},
+            "repeat": args.repeat,
+            "results": results,
+        }, indent=2) + "\n", encoding="utf-8")
+        print(f"baseline écrite dans {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    for name in regressions:
+        print(f"RÉGRESSION : {name}")
+    if not regressions and baseline:
+        print("aucune régression")
+    return 1 if regressions and args.check else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,11 @@
+import httpx
 import requests
-from typing import Optional
+from typing import Optional, Tuple
 from pydantic import BaseModel
 
+from kpi_connectors import http_client
+from kpi_connectors.auth.token_cache import TokenCache, get_token_cache
+
 class OAuthCredentials(BaseModel):
     client_id: str
     client_secret: str
@@ -9,31 +13,63 @@ class OAuthCredentials(BaseModel):
     token_uri: str
 
 class OAuthService:
-    def __init__(self, credentials: OAuthCredentials):
+    def __init__(self, credentials: OAuthCredentials, token_cache: Optional[TokenCache] = None):
         self.credentials = credentials
-        self._access_token: Optional[str] = None
+        self._token_cache = token_cache
+        self._cache_key = TokenCache.key_for(credentials)
+
+    @property
+    def cache_key(self) -> str:
+        """Hash des credentials (identifie le propriétaire d'une donnée en cache)."""
+        return self._cache_key
+
+    @property
+    def token_cache(self) -> TokenCache:
+        # Résolu à l'appel pour suivre configure_token_cache()
+        return self._token_cache or get_token_cache()
 
     def get_access_token(self, force_refresh: bool = False) -> str:
-        """Get or refresh access token"""
-        if self._access_token and not force_refresh:
-            return self._access_token
+        """Get or refresh access token (partagé entre instances via le TokenCache)"""
+        if force_refresh:
+            self.token_cache.invalidate(self._cache_key)
+        return self.token_cache.get_or_refresh(self._cache_key, self._refresh)
 
-        token_payload = {
+    async def aget_access_token(self, force_refresh: bool = False) -> str:
+        """Variante async de get_access_token (même cache, refresh via httpx)"""
+        if force_refresh:
+            self.token_cache.invalidate(self._cache_key)
+        return await self.token_cache.aget_or_refresh(self._cache_key, self._arefresh)
+
+    def _token_payload(self) -> dict:
+        return {
             "client_id": self.credentials.client_id,
             "client_secret": self.credentials.client_secret,
             "refresh_token": self.credentials.refresh_token,
             "grant_type": "refresh_token"
         }
 
+    def _refresh(self) -> Tuple[str, Optional[int]]:
         try:
-            response = requests.post(
+            response = http_client.post(
                 self.credentials.token_uri,
-                data=token_payload,
-                timeout=20
+                data=self._token_payload(),
+                idempotent=True,   # refresh_token -> access token : sans effet de bord
             )
             response.raise_for_status()
-            self._access_token = response.json()["access_token"]
-            return self._access_token
+            data = response.json()
+            return data["access_token"], data.get("expires_in")
         except requests.RequestException as e:
             raise ValueError(f"Failed to obtain access token: {str(e)}")
-        
\ No newline at end of file
+
+    async def _arefresh(self) -> Tuple[str, Optional[int]]:
+        try:
+            response = await http_client.apost(
+                self.credentials.token_uri,
+                data=self._token_payload(),
+                idempotent=True,
+            )
+            response.raise_for_status()
+            data = response.json()
+            return data["access_token"], data.get("expires_in")
+        except httpx.HTTPError as e:
+            raise ValueError(f"Failed to obtain access token: {str(e)}")
@@ -0,0 +1,157 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+"""
+Cache d'access tokens OAuth partagé par tout le processus.
+
+Les tokens sont indexés par un hash des credentials (le refresh_token n'est
+jamais écrit sur disque). Un seul refresh est lancé à la fois par clé : les
+appelants concurrents attendent le résultat du refresh en cours.
+"""
+
+# Valeur utilisée si le serveur OAuth ne renvoie pas expires_in
+DEFAULT_EXPIRES_IN = 3600
+
+
+class TokenCache:
+    def __init__(self, path: Optional[str | Path] = None, refresh_margin: int = 60):
+        """
+        - path : fichier JSON optionnel pour conserver les tokens entre deux
+          redémarrages (None = mémoire seulement).
+        - refresh_margin : nombre de secondes avant l'expiration à partir
+          duquel un token est considéré comme périmé.
+        """
+        self.path = Path(path) if path else None
+        self.refresh_margin = refresh_margin
+        self._tokens: Dict[str, Dict[str, float | str]] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        # Verrous asyncio par boucle d'événements puis par clé
+        self._async_key_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Lock]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._load()
+
+    @staticmethod
+    def key_for(credentials) -> str:
+        """Hash stable des credentials (pydantic model ou dict)."""
+        data = credentials.model_dump() if hasattr(credentials, "model_dump") else dict(credentials)
+        raw = json.dumps(data, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Retourne le token en cache s'il est encore valide, sinon None."""
+        with self._lock:
+            entry = self._tokens.get(key)
+        if entry and entry["expires_at"] - self.refresh_margin > time.time():
+            return entry["access_token"]
+        return None
+
+    def get_or_refresh(self, key: str, refresh: Callable[[], Tuple[str, Optional[int]]]) -> str:
+        """
+        Retourne le token valide pour key, ou appelle refresh() pour en obtenir
+        un nouveau. refresh retourne (access_token, expires_in).
+        """
+        token = self.get(key)
+        if token:
+            return token
+
+        with self._key_lock(key):
+            # Un autre thread a peut-être rafraîchi pendant qu'on attendait
+            token = self.get(key)
+            if token:
+                return token
+            access_token, expires_in = refresh()
+            self.set(key, access_token, expires_in)
+            return access_token
+
+    async def aget_or_refresh(
+        self,
+        key: str,
+        refresh: Callable[[], Awaitable[Tuple[str, Optional[int]]]],
+    ) -> str:
+        """Variante async de get_or_refresh (refresh est une coroutine)."""
+        token = self.get(key)
+        if token:
+            return token
+
+        with self._lock:
+            locks = self._async_key_locks.setdefault(asyncio.get_running_loop(), {})
+            lock = locks.setdefault(key, asyncio.Lock())
+
+        async with lock:
+            token = self.get(key)
+            if token:
+                return token
+            access_token, expires_in = await refresh()
+            # set écrit le fichier du cache : hors de la boucle
+            await asyncio.to_thread(self.set, key, access_token, expires_in)
+            return access_token
+
+    def set(self, key: str, access_token: str, expires_in: Optional[int] = None) -> None:
+        expires_at = time.time() + (expires_in or DEFAULT_EXPIRES_IN)
+        with self._lock:
+            self._tokens[key] = {"access_token": access_token, "expires_at": expires_at}
+            self._save()
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            if self._tokens.pop(key, None) is not None:
+                self._save()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens.clear()
+            self._save()
+
+    def _key_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = self._key_locks[key] = threading.Lock()
+            return lock
+
+    def _load(self) -> None:
+        if not self.path or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return  # fichier illisible : on repart d'un cache vide
+        now = time.time()
+        self._tokens = {
+            k: v for k, v in data.items()
+            if isinstance(v, dict) and v.get("expires_at", 0) > now
+        }
+
+    def _save(self) -> None:
+        """Écriture atomique du cache sur disque (appelé sous self._lock)."""
+        if not self.path:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._tokens, f)
+        os.replace(tmp_path, self.path)
+
+
+_default_cache = TokenCache()
+
+
+def get_token_cache() -> TokenCache:
+    return _default_cache
+
+
+def configure_token_cache(path: Optional[str | Path] = None, refresh_margin: int = 60) -> TokenCache:
+    """Remplace le cache global (ex. pour activer la persistance sur disque)."""
+    global _default_cache
+    _default_cache = TokenCache(path=path, refresh_margin=refresh_margin)
+    return _default_cache
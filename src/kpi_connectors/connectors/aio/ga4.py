@@ -0,0 +1,181 @@
+import asyncio
+from collections import deque
+from datetime import date
+from itertools import islice
+from typing import Any, AsyncIterator, Deque, Dict, List
+
+import httpx
+
+from kpi_connectors import http_client
+from kpi_connectors.connectors.ga4 import ColumnarReport, GA4Service, RowsReport, _split_pages_by_day
+from kpi_connectors.models.ga4 import GA4QueryParams
+
+
+class AsyncGA4Service(GA4Service):
+    """
+    Variante async de GA4Service : mêmes paramètres, même format de sortie.
+    La construction des requêtes, le parsing et le cache par jour sont
+    partagés avec la version sync ; seuls les appels réseau diffèrent.
+
+    Le décodage et le parsing des pages (coûteux en CPU sur les gros
+    rapports) et les accès au store SQLite passent par asyncio.to_thread,
+    pour ne pas bloquer la boucle et les autres requêtes en cours.
+    """
+
+    async def run_report(self, params: GA4QueryParams, columnar: bool = False) -> Dict[str, Any]:
+        """Voir GA4Service.run_report."""
+        try:
+            if self.store is not None and "date" in (params.dimensions or []):
+                cache_stats: Dict[str, int] = {}
+                pages = await self._cached_pages(params, cache_stats)
+                report = await asyncio.to_thread(self._assemble, pages, columnar)
+                report["cache"] = cache_stats
+                return report
+            return await self._assemble_async(self._fetch_pages(params), columnar)
+        except httpx.HTTPError as e:
+            raise ValueError(f"GA4 API request failed: {str(e)}")
+
+    async def iter_report(self, params: GA4QueryParams) -> AsyncIterator[Dict[str, Any]]:
+        """Voir GA4Service.iter_report."""
+        try:
+            async for data in self._fetch_pages(params):
+                yield await asyncio.to_thread(self._parse_response, data)
+        except httpx.HTTPError as e:
+            raise ValueError(f"GA4 API request failed: {str(e)}")
+
+    async def batch_run_reports(
+        self,
+        reports: Dict[str, GA4QueryParams],
+        columnar: bool = False,
+    ) -> Dict[str, Dict[str, Any]]:
+        """Voir GA4Service.batch_run_reports."""
+        headers = await self._headers()
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def run_group(names: List[str]) -> List[Dict[str, Any]]:
+            property_id = reports[names[0]].property_id
+            async with semaphore:
+                response = await http_client.apost(
+                    f"{self.BASE_URL}/properties/{property_id}:batchRunReports",
+                    headers=headers,
+                    json=self._batch_body(reports, names),
+                    idempotent=True,
+                )
+            response.raise_for_status()
+            return response.json().get("reports", [])
+
+        async def complete(params: GA4QueryParams, first_data: Dict[str, Any]) -> Dict[str, Any]:
+            remaining_pages = self._fetch_remaining_pages(
+                f"{self.BASE_URL}/properties/{params.property_id}:runReport",
+                headers,
+                self._build_base_body(params),
+                first_data,
+                len(first_data.get("rows", [])),
+                params.limit or 10000,
+            )
+            report = ColumnarReport() if columnar else RowsReport()
+            await asyncio.to_thread(report.add_page, first_data)
+            async for data in remaining_pages:
+                await asyncio.to_thread(report.add_page, data)
+            return await asyncio.to_thread(report.to_dict)
+
+        try:
+            groups = self._batch_groups(reports)
+            group_results = await asyncio.gather(*(run_group(names) for names in groups))
+
+            firsts = [
+                (name, first_data)
+                for names, first_pages in zip(groups, group_results)
+                for name, first_data in zip(names, first_pages)
+            ]
+            completed = await asyncio.gather(*(complete(reports[name], data) for name, data in firsts))
+            results = {name: report for (name, _), report in zip(firsts, completed)}
+
+            # On conserve l'ordre des rapports demandés
+            return {name: results[name] for name in reports if name in results}
+
+        except httpx.HTTPError as e:
+            raise ValueError(f"GA4 API request failed: {str(e)}")
+
+    async def _headers(self) -> Dict[str, str]:
+        return self._token_headers(await self.oauth_service.aget_access_token())
+
+    async def _fetch_pages(self, params: GA4QueryParams) -> AsyncIterator[Dict[str, Any]]:
+        base_body = self._build_base_body(params)
+        url = f"{self.BASE_URL}/properties/{params.property_id}:runReport"
+        headers = await self._headers()
+
+        # limit = taille d'une page
+        page_limit = params.limit or 10000
+
+        first_data = await self._fetch_page(url, headers, base_body, 0, page_limit)
+        yield first_data
+        async for data in self._fetch_remaining_pages(
+            url, headers, base_body, first_data, len(first_data.get("rows", [])), page_limit
+        ):
+            yield data
+
+    async def _cached_pages(self, params: GA4QueryParams, stats: Dict[str, int]) -> List[Dict[str, Any]]:
+        plan = await asyncio.to_thread(self._plan_cached_days, params)
+
+        fetched: Dict[date, Dict[str, Any]] = {}
+        for span_start, span_end, span_params in plan.spans:
+            pages = [data async for data in self._fetch_pages(span_params)]
+            fetched.update(await asyncio.to_thread(_split_pages_by_day, pages, span_start, span_end))
+
+        return await asyncio.to_thread(self._merge_cached_days, plan, fetched, stats)
+
+    @staticmethod
+    async def _fetch_page(
+        url: str,
+        headers: Dict[str, str],
+        base_body: Dict[str, Any],
+        offset: int,
+        page_limit: int,
+    ) -> Dict[str, Any]:
+        body: Dict[str, Any] = dict(base_body)
+        body["limit"] = page_limit
+        body["offset"] = offset
+
+        response = await http_client.apost(url, headers=headers, json=body, idempotent=True)
+        response.raise_for_status()
+        return await asyncio.to_thread(response.json)
+
+    async def _fetch_remaining_pages(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        base_body: Dict[str, Any],
+        first_data: Dict[str, Any],
+        first_page_size: int,
+        page_limit: int,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Fenêtre glissante de max_workers pages en vol (voir la version sync)."""
+        step, offsets = self._remaining_offsets(first_data, first_page_size, page_limit)
+        if not offsets:
+            return
+
+        next_offsets = iter(offsets)
+        pending: Deque[asyncio.Task] = deque(
+            asyncio.ensure_future(self._fetch_page(url, headers, base_body, offset, step))
+            for offset in islice(next_offsets, min(self.max_workers, len(offsets)))
+        )
+        try:
+            while pending:
+                data = await pending.popleft()
+                # Une page lue -> on en lance une autre
+                for offset in islice(next_offsets, 1):
+                    pending.append(asyncio.ensure_future(
+                        self._fetch_page(url, headers, base_body, offset, step)
+                    ))
+                yield data
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    async def _assemble_async(pages: AsyncIterator[Dict[str, Any]], columnar: bool) -> Dict[str, Any]:
+        report = ColumnarReport() if columnar else RowsReport()
+        async for data in pages:
+            await asyncio.to_thread(report.add_page, data)
+        return await asyncio.to_thread(report.to_dict)
@@ -0,0 +1,297 @@
+import asyncio
+from datetime import date
+from typing import AsyncIterator, Optional
+from urllib.parse import quote
+
+from kpi_connectors import http_cache, http_client
+from kpi_connectors.auth.oauth import OAuthService
+from kpi_connectors.connectors.linkedin import (
+    BASE_URL,
+    DEFAULT_LINKEDIN_API_VERSION,
+    STATS_BATCH_SIZE,
+    _attach_stats,
+    _dedupe_posts,
+    _merge_share_statistics,
+    _parse_post,
+    _parse_post_stats,
+    _parse_share_statistics,
+    _plan_share_statistics,
+    _posts_params,
+    _reaches_watermark,
+    _share_statistics_by_day,
+    _share_statistics_params,
+    _stats_batch_url,
+    _stats_batches,
+    _stats_by_urn,
+    _token_headers,
+    stats_concurrency,
+)
+from kpi_connectors.storage.linkedin_store import LinkedInPostStore, LinkedInShareStatsStore
+
+"""
+Variantes async des connecteurs LinkedIn (voir kpi_connectors.connectors.linkedin).
+"""
+
+
+async def _headers(oauth_service: OAuthService, api_version: str) -> dict:
+    return _token_headers(await oauth_service.aget_access_token(), api_version)
+
+
+async def fetch_follower_count(
+    oauth_service: OAuthService,
+    organization_urn: str,
+    api_version: str = DEFAULT_LINKEDIN_API_VERSION,
+) -> dict:
+    encoded_urn = quote(organization_urn, safe="")  # encode les ':' en '%3A'
+    params = {"edgeType": "COMPANY_FOLLOWED_BY_MEMBER"}
+    data = await http_cache.aget_json(
+        f"{BASE_URL}/networkSizes/{encoded_urn}",
+        owner=oauth_service.cache_key,
+        headers=await _headers(oauth_service, api_version),
+        params=params,
+    )
+
+    return {
+        "organization_urn": organization_urn,
+        "follower_count": data.get("firstDegreeSize", 0),
+    }
+
+
+async def fetch_share_statistics(
+    oauth_service: OAuthService,
+    organization_urn: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    api_version: str = DEFAULT_LINKEDIN_API_VERSION,
+    store: Optional[LinkedInShareStatsStore] = None,
+    volatile_days: int = 3,
+) -> dict:
+    """Voir kpi_connectors.connectors.linkedin.fetch_share_statistics."""
+    if store is not None and start_date and end_date and start_date < end_date:
+        plan = await asyncio.to_thread(
+            _plan_share_statistics, store, oauth_service.cache_key, organization_urn, start_date, end_date, volatile_days,
+        )
+        headers = await _headers(oauth_service, api_version) if plan.spans else None
+
+        async def fetch_span(span_start: date, span_end: date) -> dict:
+            response = await http_client.aget(
+                f"{BASE_URL}/organizationalEntityShareStatistics",
+                headers=headers,
+                params=_share_statistics_params(organization_urn, span_start, span_end),
+            )
+            response.raise_for_status()
+            return _share_statistics_by_day(organization_urn, response.json(), span_start, span_end)
+
+        fetched: dict[date, Optional[dict]] = {}
+        for by_day in await asyncio.gather(*(fetch_span(*span) for span in plan.spans)):
+            fetched.update(by_day)
+        return await asyncio.to_thread(_merge_share_statistics, store, organization_urn, plan, fetched)
+
+    response = await http_client.aget(
+        f"{BASE_URL}/organizationalEntityShareStatistics",
+        headers=await _headers(oauth_service, api_version),
+        params=_share_statistics_params(organization_urn, start_date, end_date),
+    )
+    response.raise_for_status()
+    return _parse_share_statistics(organization_urn, response.json())
+
+
+async def fetch_organization_posts(
+    oauth_service: OAuthService,
+    organization_urn: str,
+    page_size: int = 50,
+    max_posts: Optional[int] = None,
+    api_version: str = DEFAULT_LINKEDIN_API_VERSION,
+) -> list[dict]:
+    """Voir kpi_connectors.connectors.linkedin.fetch_organization_posts."""
+    posts: list[dict] = []
+    seen_ids: set[str] = set()
+
+    async for elements in _iter_post_pages(oauth_service, organization_urn, page_size, api_version):
+        posts.extend(_dedupe_posts(elements, seen_ids))
+
+        if max_posts is not None and len(posts) >= max_posts:
+            posts = posts[:max_posts]
+            break
+
+    return posts
+
+
+async def iter_posts_with_stats(
+    oauth_service: OAuthService,
+    organization_urn: str,
+    page_size: int = 50,
+    max_posts: Optional[int] = None,
+    api_version: str = DEFAULT_LINKEDIN_API_VERSION,
+    max_pending: Optional[int] = None,
+) -> AsyncIterator[list[dict]]:
+    """
+    Voir kpi_connectors.connectors.linkedin.iter_posts_with_stats.
+
+    Un producteur pagine /posts et lance les stats de chaque page ; il est
+    bloqué dès que max_pending pages attendent d'être consommées. Chaque page
+    est produite dès que ses stats sont arrivées.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending or stats_concurrency(api_version))
+
+    async def produce() -> None:
+        seen_ids: set[str] = set()
+        remaining = max_posts
+        try:
+            async for elements in _iter_post_pages(oauth_service, organization_urn, page_size, api_version):
+                posts = _dedupe_posts(elements, seen_ids)
+                if remaining is not None:
+                    posts = posts[:remaining]
+                    remaining -= len(posts)
+                if posts:
+                    task = asyncio.ensure_future(
+                        _fetch_page_stats(oauth_service, organization_urn, posts, api_version)
+                    )
+                    try:
+                        await queue.put((posts, task))
+                    except asyncio.CancelledError:
+                        task.cancel()   # consommateur parti : stats de cette page inutiles
+                        raise
+                if remaining == 0:
+                    break
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(None)
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            if isinstance(item, Exception):
+                raise item
+            posts, task = item
+            yield _attach_stats(posts, await task)
+    finally:
+        producer.cancel()
+        while not queue.empty():
+            item = queue.get_nowait()
+            if isinstance(item, tuple):
+                item[1].cancel()
+
+
+async def _fetch_page_stats(
+    oauth_service: OAuthService,
+    organization_urn: str,
+    posts: list[dict],
+    api_version: str,
+) -> dict[str, dict]:
+    urns = [p["id"] for p in posts]
+    headers = await _headers(oauth_service, api_version)
+    results = [
+        await _fetch_stats_batch(headers, organization_urn, param_name, batch)
+        for param_name, batch in _stats_batches(urns, STATS_BATCH_SIZE)
+    ]
+    return _stats_by_urn(urns, results)
+
+
+async def _iter_post_pages(
+    oauth_service: OAuthService,
+    organization_urn: str,
+    page_size: int,
+    api_version: str,
+    sort_by: Optional[str] = None,
+) -> AsyncIterator[list[dict]]:
+    start = 0
+    while True:
+        response = await http_client.aget(
+            f"{BASE_URL}/posts",
+            headers=await _headers(oauth_service, api_version),
+            params=_posts_params(organization_urn, page_size, start, sort_by),
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        elements = data.get("elements", [])
+        if not elements:
+            return
+        yield elements
+
+        start += len(elements)
+        if start >= data.get("paging", {}).get("total", start):
+            return
+
+
+async def sync_organization_posts(
+    oauth_service: OAuthService,
+    organization_urn: str,
+    store: LinkedInPostStore,
+    page_size: int = 50,
+    max_posts: Optional[int] = None,
+    recent_days: int = 30,
+    recent_stats_ttl: float = 3600,
+    old_stats_ttl: float = 7 * 86400,
+    api_version: str = DEFAULT_LINKEDIN_API_VERSION,
+) -> dict:
+    """Voir kpi_connectors.connectors.linkedin.sync_organization_posts."""
+    owner = oauth_service.cache_key
+    # Store SQLite (sync) : accès dans un thread pour ne pas bloquer la boucle
+    watermark = await asyncio.to_thread(store.watermark, owner, organization_urn)
+
+    # La dernière page lue contient aussi des posts déjà connus (mis à jour au passage)
+    fetched: dict[str, dict] = {}
+    async for elements in _iter_post_pages(oauth_service, organization_urn, page_size, api_version, sort_by="CREATED"):
+        fetched.update((el.get("id"), _parse_post(el)) for el in elements if el.get("id"))
+        if _reaches_watermark(elements, watermark):
+            break
+
+    added = sum(1 for p in fetched.values() if watermark is None or (p.get("published_at") or 0) > watermark)
+    watermark = await asyncio.to_thread(store.merge_posts, owner, organization_urn, list(fetched.values()))
+
+    stale = await asyncio.to_thread(
+        store.stale_stats, owner, organization_urn, recent_days, recent_stats_ttl, old_stats_ttl,
+    )
+    if stale:
+        stats_by_urn = await fetch_share_statistics_by_posts(oauth_service, organization_urn, stale, api_version=api_version)
+        await asyncio.to_thread(store.put_stats, owner, organization_urn, stale, stats_by_urn)
+
+    return {
+        "organization_urn": organization_urn,
+        "posts": await asyncio.to_thread(store.posts, owner, organization_urn, limit=max_posts),
+        "sync": {"new_posts": added, "refreshed_stats": len(stale), "watermark": watermark},
+    }
+
+
+async def _fetch_stats_batch(
+    headers: dict,
+    organization_urn: str,
+    param_name: str,
+    batch: list[str],
+) -> list[dict]:
+    url = _stats_batch_url(organization_urn, param_name, batch)
+    response = await http_client.aget(url, headers=headers)
+    response.raise_for_status()
+    data = response.json()
+
+    return [_parse_post_stats(el) for el in data.get("elements", [])]
+
+
+async def fetch_share_statistics_by_posts(
+    oauth_service: OAuthService,
+    organization_urn: str,
+    share_urns: list[str],
+    batch_size: int = STATS_BATCH_SIZE,
+    api_version: str = DEFAULT_LINKEDIN_API_VERSION,
+    max_workers: Optional[int] = None,
+) -> dict[str, dict]:
+    """Voir kpi_connectors.connectors.linkedin.fetch_share_statistics_by_posts."""
+    batches = _stats_batches(share_urns, batch_size)
+    if not batches:
+        return {}
+
+    headers = await _headers(oauth_service, api_version)
+    semaphore = asyncio.Semaphore(max_workers or stats_concurrency(api_version))
+
+    async def fetch_one(param_name: str, batch: list[str]) -> list[dict]:
+        async with semaphore:
+            return await _fetch_stats_batch(headers, organization_urn, param_name, batch)
+
+    results = await asyncio.gather(*(fetch_one(param_name, batch) for param_name, batch in batches))
+    return _stats_by_urn(share_urns, results)
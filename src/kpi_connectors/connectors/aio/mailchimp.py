@@ -0,0 +1,234 @@
+import asyncio
+import tempfile
+import time
+from typing import Optional
+
+import httpx
+
+from kpi_connectors import http_cache, http_client
+from kpi_connectors.connectors.mailchimp import (
+    BATCH_POLL_INTERVAL,
+    BATCH_TIMEOUT,
+    CLICK_DETAILS_FIELDS,
+    CLICKS_DAILY_TTL,
+    CLICKS_FROZEN_AFTER_DAYS,
+    CLICKS_REFRESH_DAYS,
+    REPORTS_CONCURRENCY,
+    MailchimpBatchTimeout,
+    _assemble_click_details,
+    _base_url_and_auth,
+    _campaign_ids_arg,
+    _click_details_operations,
+    _first_page_params,
+    _iter_batch_results,
+    _merge_click_details,
+    _merge_report_pages,
+    _parse_audiences,
+    _parse_batch_click_details,
+    _parse_summary,
+    _plan_click_details,
+    _remaining_click_pages,
+    _remaining_pages_params,
+    _sent_campaigns_params,
+    _split_first_pages,
+    _summaries_params,
+    _window_params,
+)
+from kpi_connectors.models.mailchimp import MailchimpCampaignParams
+from kpi_connectors.storage.mailchimp_store import MailchimpClickStore, owner_for
+
+"""
+Variantes async des connecteurs Mailchimp (voir kpi_connectors.connectors.mailchimp).
+"""
+
+# Archive /batches gardée en mémoire jusqu'à cette taille, sur disque au-delà
+BATCH_SPOOL_MAX_SIZE = 16 * 1024 * 1024
+
+async def fetch_mailchimp_audiences(api_key: str) -> dict:
+    base_url, auth = _base_url_and_auth(api_key)
+
+    params = {
+        "count": 1000,
+        "fields": "lists.id,lists.name,lists.stats.member_count",
+    }
+    return await http_cache.aget_json(base_url + "lists", parse=_parse_audiences, params=params, auth=auth)
+
+async def _fetch_reports(
+    base_url: str,
+    auth: tuple[str, str],
+    windows: list[dict],
+    limit: int | None = None,
+) -> list[dict]:
+    """Voir kpi_connectors.connectors.mailchimp._fetch_reports."""
+    semaphore = asyncio.Semaphore(REPORTS_CONCURRENCY)
+
+    async def fetch_page(page_params: dict) -> dict:
+        async with semaphore:
+            resp = await http_client.aget(base_url + "reports", params=page_params, auth=auth)
+        resp.raise_for_status()
+        return resp.json()
+
+    window_limit = limit if len(windows) == 1 else None
+    firsts = await asyncio.gather(*(fetch_page(_first_page_params(w, window_limit)) for w in windows))
+    remaining = [_remaining_pages_params(w, first, window_limit) for w, first in zip(windows, firsts)]
+    rest = iter(await asyncio.gather(*(fetch_page(page) for window_pages in remaining for page in window_pages)))
+
+    pages: list[dict] = []
+    for first, window_pages in zip(firsts, remaining):
+        pages.append(first)
+        pages.extend(next(rest) for _ in window_pages)
+    return _merge_report_pages(pages, limit)
+
+async def fetch_mailchimp_campaign_summaries(
+    api_key: str,
+    params: MailchimpCampaignParams,
+) -> list[dict]:
+    base_url, auth = _base_url_and_auth(api_key)
+
+    windows = _window_params(_summaries_params(params), params)
+    reports = await _fetch_reports(base_url, auth, windows, limit=params.count)
+
+    return [_parse_summary(r) for r in reports]
+
+
+async def _click_details_campaigns(
+    base_url: str,
+    auth: tuple[str, str],
+    campaign_ids: list[str] | None,
+    since_send_time: str | None,
+    store: Optional[MailchimpClickStore],
+) -> list[dict]:
+    """Voir kpi_connectors.connectors.mailchimp._click_details_campaigns."""
+    if not campaign_ids:
+        return await _fetch_reports(base_url, auth, [_sent_campaigns_params(since_send_time)])
+    known = await asyncio.to_thread(store.get_campaigns, owner_for(auth[1]), campaign_ids) if store is not None else {}
+    unknown = [cid for cid in campaign_ids if store is not None and cid not in known]
+    semaphore = asyncio.Semaphore(REPORTS_CONCURRENCY)
+
+    async def fetch_send_time(cid: str) -> str | None:
+        async with semaphore:
+            resp = await http_client.aget(base_url + f"reports/{cid}", params={"fields": "id,send_time"}, auth=auth)
+        resp.raise_for_status()
+        return resp.json().get("send_time")
+
+    send_times = dict(zip(unknown, await asyncio.gather(*(fetch_send_time(cid) for cid in unknown))))
+    return [{"id": cid, "send_time": send_times.get(cid)} for cid in campaign_ids]
+
+
+async def _fetch_click_pages(
+    base_url: str,
+    auth: tuple[str, str],
+    pages: list[tuple[str, dict]],
+    max_workers: int = 6,
+) -> list[dict | Exception]:
+    """Voir kpi_connectors.connectors.mailchimp._fetch_click_pages."""
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def fetch_page(cid: str, params: dict) -> dict | Exception:
+        async with semaphore:
+            try:
+                # Les 429 sont relancés par http_client (limiteur mailchimp, Retry-After)
+                resp = await http_client.aget(base_url + f"reports/{cid}/click-details", params=params, auth=auth)
+                resp.raise_for_status()
+                return resp.json()
+            except (httpx.HTTPError, ValueError) as e:
+                return e
+
+    return list(await asyncio.gather(*(fetch_page(cid, params) for cid, params in pages)))
+
+
+async def fetch_mailchimp_click_details(
+    api_key: str,
+    campaign_id: str | None = None,
+    since_send_time: str | None = None,
+    count: int = 1000,
+    store: Optional[MailchimpClickStore] = None,
+    refresh_days: float = CLICKS_REFRESH_DAYS,
+    frozen_after_days: float = CLICKS_FROZEN_AFTER_DAYS,
+    daily_ttl: float = CLICKS_DAILY_TTL,
+    campaign_ids: list[str] | None = None,
+) -> dict:
+    """Voir kpi_connectors.connectors.mailchimp.fetch_mailchimp_click_details."""
+    base_url, auth = _base_url_and_auth(api_key)
+
+    campaigns = await _click_details_campaigns(
+        base_url, auth, _campaign_ids_arg(campaign_id, campaign_ids), since_send_time, store,
+    )
+    plan = await asyncio.to_thread(_plan_click_details, store, api_key, campaigns, {
+        "refresh_days": refresh_days, "frozen_after_days": frozen_after_days, "daily_ttl": daily_ttl,
+    })
+
+    first_params = _first_page_params({"fields": CLICK_DETAILS_FIELDS}, None, count)
+    first_pages, failed = _split_first_pages(
+        plan.to_fetch, await _fetch_click_pages(base_url, auth, [(cid, first_params) for cid in plan.to_fetch]),
+    )
+    remaining = _remaining_click_pages(first_pages, count)
+    pages = await _fetch_click_pages(base_url, auth, remaining)
+    fetched = _assemble_click_details(first_pages, remaining, pages, failed)
+
+    return await asyncio.to_thread(_merge_click_details, store, plan, fetched, failed)
+
+
+async def fetch_mailchimp_click_details_batch(
+    api_key: str,
+    campaign_id: str | None = None,
+    since_send_time: str | None = None,
+    count: int = 1000,
+    poll_interval: float = BATCH_POLL_INTERVAL,
+    timeout: float = BATCH_TIMEOUT,
+    base_url: str | None = None,
+    store: Optional[MailchimpClickStore] = None,
+    refresh_days: float = CLICKS_REFRESH_DAYS,
+    frozen_after_days: float = CLICKS_FROZEN_AFTER_DAYS,
+    daily_ttl: float = CLICKS_DAILY_TTL,
+    campaign_ids: list[str] | None = None,
+) -> dict:
+    """Voir kpi_connectors.connectors.mailchimp.fetch_mailchimp_click_details_batch."""
+    default_url, auth = _base_url_and_auth(api_key)
+    base_url = base_url or default_url
+
+    campaigns = await _click_details_campaigns(
+        base_url, auth, _campaign_ids_arg(campaign_id, campaign_ids), since_send_time, store,
+    )
+    plan = await asyncio.to_thread(_plan_click_details, store, api_key, campaigns, {
+        "refresh_days": refresh_days, "frozen_after_days": frozen_after_days, "daily_ttl": daily_ttl,
+    })
+    if not plan.to_fetch:
+        return await asyncio.to_thread(_merge_click_details, store, plan, {}, {})
+
+    # Crée un job : jamais relancé (un 5xx après acceptation ferait un job en double) ;
+    # seul le suivi (GET batches/{id}) l'est
+    resp = await http_client.apost(
+        base_url + "batches", json={"operations": _click_details_operations(plan.to_fetch, count)}, auth=auth,
+        idempotent=False,
+    )
+    resp.raise_for_status()
+    batch_id = resp.json()["id"]
+
+    deadline = time.monotonic() + timeout
+    while True:
+        resp = await http_client.aget(base_url + f"batches/{batch_id}", auth=auth)
+        resp.raise_for_status()
+        batch = resp.json()
+        if batch.get("status") == "finished":
+            break
+        if time.monotonic() >= deadline:
+            raise MailchimpBatchTimeout(f"Mailchimp batch {batch_id} not finished after {timeout}s (status: {batch.get('status')})")
+        await asyncio.sleep(poll_interval)
+
+    if not batch.get("response_body_url"):
+        failed = {cid: "no batch results" for cid in plan.to_fetch}
+        return await asyncio.to_thread(_merge_click_details, store, plan, {}, failed)
+    # Téléchargement async vers un fichier temporaire, puis lecture en flux
+    # de l'archive (tarfile est sync) dans un thread
+    with tempfile.SpooledTemporaryFile(max_size=BATCH_SPOOL_MAX_SIZE) as archive:
+        await http_client.adownload(batch["response_body_url"], archive)
+        archive.seek(0)
+        first_pages, failed = await asyncio.to_thread(
+            lambda: _parse_batch_click_details(_iter_batch_results(archive), plan.to_fetch)
+        )
+
+    remaining = _remaining_click_pages(first_pages, count)
+    pages = await _fetch_click_pages(base_url, auth, remaining)
+    fetched = _assemble_click_details(first_pages, remaining, pages, failed)
+    return await asyncio.to_thread(_merge_click_details, store, plan, fetched, failed)
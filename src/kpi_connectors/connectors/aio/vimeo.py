@@ -0,0 +1,98 @@
+import asyncio
+from datetime import date
+from typing import Optional
+
+from kpi_connectors import http_cache, http_client
+from kpi_connectors.connectors.vimeo import (
+    ANALYTICS_CONCURRENCY,
+    VIDEOS_PAGE_CONCURRENCY,
+    _analytics_by_day,
+    _analytics_query,
+    _group_by_video,
+    _headers,
+    _merge_video_analytics,
+    _merge_video_pages,
+    _parse_follower_count,
+    _plan_video_analytics,
+    _remaining_pages_queries,
+    _videos_query,
+    base_url,
+)
+from kpi_connectors.models.vimeo import VimeoQueryParams
+from kpi_connectors.storage.vimeo_store import VimeoAnalyticsStore, owner_for
+
+"""
+Variantes async des connecteurs Vimeo (voir kpi_connectors.connectors.vimeo).
+"""
+
+async def fetch_vimeo_videos(access_token: str, params: VimeoQueryParams | None = None) -> list[dict]:
+    """Voir kpi_connectors.connectors.vimeo.fetch_vimeo_videos."""
+    params = params or VimeoQueryParams()   # défauts si rien n'est fourni
+
+    headers = _headers(access_token)
+    query = _videos_query(params)
+    url = base_url + "/me/videos"
+    semaphore = asyncio.Semaphore(VIDEOS_PAGE_CONCURRENCY)
+
+    async def fetch_page(page_url: str, page_query: dict | None) -> dict:
+        async with semaphore:
+            return await http_cache.aget_json(page_url, headers=headers, params=page_query)
+
+    pages = [await fetch_page(url, query)]
+    remaining = _remaining_pages_queries(query, pages[0])
+
+    if remaining is not None:
+        pages.extend(await asyncio.gather(*(fetch_page(url, page_query) for page_query in remaining)))
+    else:
+        next_path = (pages[0].get("paging") or {}).get("next")
+        while next_path:
+            pages.append(await fetch_page(base_url + next_path, None))   # query déjà encodée dans next_path
+            next_path = (pages[-1].get("paging") or {}).get("next")
+
+    return _merge_video_pages(pages)
+
+async def fetch_vimeo_follower_count(access_token: str) -> dict:
+    params = {"fields": "uri,name,metadata.connections.followers.total"}
+
+    return await http_cache.aget_json(
+        f"{base_url}/me",
+        parse=_parse_follower_count,
+        headers=_headers(access_token),
+        params=params,
+    )
+
+async def fetch_vimeo_video_analytics(
+    access_token: str,
+    start_date: date,
+    end_date: date,
+    video_ids: Optional[list[str]] = None,
+    store: Optional[VimeoAnalyticsStore] = None,
+    volatile_days: int = 3,
+    max_workers: int = ANALYTICS_CONCURRENCY,
+) -> dict:
+    """Voir kpi_connectors.connectors.vimeo.fetch_vimeo_video_analytics."""
+    if start_date > end_date:
+        raise ValueError("start_date must be before end_date")
+    if video_ids is None:
+        video_ids = [v["id"] for v in await fetch_vimeo_videos(access_token)]
+
+    plan = await asyncio.to_thread(
+        _plan_video_analytics, store, owner_for(access_token), video_ids, start_date, end_date, volatile_days,
+    )
+    headers = _headers(access_token)
+    semaphore = asyncio.Semaphore(max_workers)
+
+    async def fetch_span(video_id: str, first: date, last: date) -> dict:
+        pages = []
+        url, query = base_url + "/me/analytics", _analytics_query(video_id, first, last)
+        async with semaphore:
+            while url:
+                response = await http_client.aget(url, headers=headers, params=query)
+                response.raise_for_status()
+                pages.append(response.json())
+                next_path = (pages[-1].get("paging") or {}).get("next")
+                url, query = (base_url + next_path, None) if next_path else (None, None)   # query déjà encodée dans next_path
+        return _analytics_by_day(pages, first, last)
+
+    results = await asyncio.gather(*(fetch_span(*r) for r in plan.requests))
+    return await asyncio.to_thread(_merge_video_analytics, store, plan, _group_by_video(plan.requests, list(results)))
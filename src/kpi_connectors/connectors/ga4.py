@@ -1,18 +1,130 @@
 import requests
-from datetime import date, timedelta
-from typing import Dict, Any, List
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from itertools import chain, islice
+from typing import Callable, Deque, Dict, Any, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 
+from kpi_connectors import http_client
 from kpi_connectors.models.ga4 import GA4QueryParams
 from kpi_connectors.auth.oauth import OAuthService
+from kpi_connectors.storage.days import contiguous_spans, days_between
+from kpi_connectors.storage.ga4_store import GA4DayStore
+
+# Types de métriques GA4 (metricHeaders[].type) -> conversion par colonne
+INTEGER_METRIC_TYPES = {"TYPE_INTEGER"}
+FLOAT_METRIC_TYPES = {
+    "TYPE_FLOAT", "TYPE_SECONDS", "TYPE_MILLISECONDS", "TYPE_MINUTES",
+    "TYPE_HOURS", "TYPE_STANDARD", "TYPE_CURRENCY", "TYPE_FEET",
+    "TYPE_MILES", "TYPE_METERS", "TYPE_KILOMETERS",
+}
+
+
+def _metric_column_converter(metric_type: Optional[str]) -> Optional[Callable[[List[str]], List[Any]]]:
+    """
+    Convertisseur d'une colonne entière, choisi une fois d'après le type GA4.
+    map(int/float) plutôt que NumPy : le résultat doit redevenir une liste
+    Python pour la sérialisation JSON et l'aller-retour .tolist() annule le
+    gain (voir benchmarks/bench_ga4_convert.py).
+    """
+    if metric_type in INTEGER_METRIC_TYPES:
+        return lambda values: list(map(int, values))
+    if metric_type in FLOAT_METRIC_TYPES:
+        return lambda values: list(map(float, values))
+    return None
+
+
+def convert_metric_column(values: List[Any], metric_type: Optional[str]) -> List[Any]:
+    """
+    Convertit une colonne de métrique GA4 (valeurs en chaînes) en un seul
+    passage. Type inconnu ou valeur inattendue -> repli sur la conversion
+    cellule par cellule (GA4Service._convert_value).
+    """
+    converter = _metric_column_converter(metric_type)
+    if converter is not None and values:
+        try:
+            return converter(values)
+        except (ValueError, TypeError, OverflowError):
+            pass
+    return [GA4Service._convert_value(v) for v in values]
+
+
+class _CachePlan(NamedTuple):
+    params: GA4QueryParams
+    key: str
+    owner: str
+    days: List[date]
+    volatile_from: date
+    cached: Dict[date, Dict[str, Any]]
+    # (début, fin, params restreints à la plage) pour chaque plage à récupérer
+    spans: List[Tuple[date, date, GA4QueryParams]]
+
+
+def _split_pages_by_day(
+    pages: Iterable[Dict[str, Any]],
+    start_date: date,
+    end_date: date,
+) -> Dict[date, Dict[str, Any]]:
+    """
+    Répartit les lignes brutes par valeur de la dimension "date" (YYYYMMDD).
+    Chaque jour de la plage a sa page, même vide (jour sans données).
+    """
+    day_pages: Dict[date, Dict[str, Any]] = {}
+    headers: Dict[str, Any] = {}
+    parsed_days: Dict[str, date] = {}
+
+    for data in pages:
+        if not headers:
+            headers = {
+                "dimensionHeaders": data.get("dimensionHeaders", []),
+                "metricHeaders": data.get("metricHeaders", []),
+            }
+        date_index = [d["name"] for d in headers["dimensionHeaders"]].index("date")
+
+        for row in data.get("rows", []):
+            value = row["dimensionValues"][date_index].get("value")
+            day = parsed_days.get(value)
+            if day is None:
+                day = parsed_days[value] = datetime.strptime(value, "%Y%m%d").date()
+            if not start_date <= day <= end_date:
+                continue
+            page = day_pages.get(day)
+            if page is None:
+                page = day_pages[day] = {**headers, "rows": []}
+            page["rows"].append(row)
+
+    for day in days_between(start_date, end_date):
+        if day not in day_pages:
+            day_pages[day] = {**headers, "rows": []}
+    return day_pages
 
 
 class GA4Service:
     BASE_URL = "https://analyticsdata.googleapis.com/v1beta"
+    # Nombre max de rapports par appel batchRunReports (limite GA4)
+    MAX_BATCH_SIZE = 5
 
-    def __init__(self, oauth_service: OAuthService):
+    def __init__(
+        self,
+        oauth_service: OAuthService,
+        max_workers: int = 4,
+        store: Optional[GA4DayStore] = None,
+        volatile_days: int = 3,
+    ):
+        """
+        - max_workers : nombre max de pages récupérées en parallèle une fois
+          rowCount connu (1 = pagination séquentielle).
+        - store : cache par jour optionnel, utilisé par run_report quand la
+          dimension "date" est demandée.
+        - volatile_days : les N derniers jours (aujourd'hui inclus) sont
+          toujours redemandés à GA4 et jamais mis en cache.
+        """
         self.oauth_service = oauth_service
+        self.max_workers = max(1, max_workers)
+        self.store = store
+        self.volatile_days = volatile_days
 
-    def run_report(self, params: GA4QueryParams) -> Dict[str, Any]:
+    def run_report(self, params: GA4QueryParams, columnar: bool = False) -> Dict[str, Any]:
         """
         Execute GA4 runReport API call avec pagination (offset).
 
@@ -20,12 +132,208 @@ class GA4Service:
           pas comme limite totale.
         - Si params.event_name est renseigné (optionnel), on ajoute un
           dimensionFilter GA4 sur eventName = event_name.
+        - La première page donne rowCount : les offsets restants sont alors
+          connus et récupérés en parallèle (max_workers), puis remis dans
+          l'ordre des offsets.
+        - columnar=True : retourne une colonne par dimension/métrique au lieu
+          d'une liste de dicts (voir ColumnarReport).
+        - Avec un store et la dimension "date", seuls les jours absents du
+          cache ou encore volatils sont demandés à GA4 (voir _cached_pages) ;
+          le résultat contient alors une clé "cache" (jours servis/récupérés).
+        """
+        try:
+            if self.store is not None and "date" in (params.dimensions or []):
+                cache_stats: Dict[str, int] = {}
+                report = self._assemble(self._cached_pages(params, cache_stats), columnar)
+                report["cache"] = cache_stats
+                return report
+            return self._assemble(self._fetch_pages(params), columnar)
+        except requests.RequestException as e:
+            raise ValueError(f"GA4 API request failed: {str(e)}")
+
+    def iter_report(self, params: GA4QueryParams) -> Iterator[Dict[str, Any]]:
         """
+        Variante en flux de run_report : génère le rapport page par page
+        ({"dimension_headers", "metric_headers", "rows", "row_count"}) au fur
+        et à mesure de la pagination, sans jamais accumuler toutes les lignes.
+        Le cache par jour (store) n'est pas utilisé.
+        """
+        try:
+            for data in self._fetch_pages(params):
+                yield self._parse_response(data)
+        except requests.RequestException as e:
+            raise ValueError(f"GA4 API request failed: {str(e)}")
+
+    def batch_run_reports(
+        self,
+        reports: Dict[str, GA4QueryParams],
+        columnar: bool = False,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Exécute plusieurs rapports via l'API batchRunReports.
+
+        - reports : {nom choisi par l'appelant: GA4QueryParams}. Les rapports
+          sont regroupés par propriété puis envoyés par lots de
+          MAX_BATCH_SIZE (limite GA4), les lots étant envoyés en parallèle.
+        - La première page de chaque rapport vient du batch ; les pages
+          suivantes sont récupérées comme dans run_report.
+        - Retourne {nom: rapport} au même format que run_report.
+        """
+        headers = self._headers()
+        groups = self._batch_groups(reports)
+
+        def run_group(names: List[str]) -> List[Dict[str, Any]]:
+            property_id = reports[names[0]].property_id
+            response = http_client.post(
+                f"{self.BASE_URL}/properties/{property_id}:batchRunReports",
+                headers=headers,
+                json=self._batch_body(reports, names),
+                idempotent=True,
+            )
+            response.raise_for_status()
+            return response.json().get("reports", [])
+
+        try:
+            if len(groups) > 1 and self.max_workers > 1:
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(groups))) as executor:
+                    group_results = list(executor.map(run_group, groups))
+            else:
+                group_results = [run_group(names) for names in groups]
+
+            results: Dict[str, Dict[str, Any]] = {}
+            for names, first_pages in zip(groups, group_results):
+                for name, first_data in zip(names, first_pages):
+                    params = reports[name]
+                    remaining_pages = self._fetch_remaining_pages(
+                        f"{self.BASE_URL}/properties/{params.property_id}:runReport",
+                        headers,
+                        self._build_base_body(params),
+                        first_data,
+                        len(first_data.get("rows", [])),
+                        params.limit or 10000,
+                    )
+                    results[name] = self._assemble(chain([first_data], remaining_pages), columnar)
+
+            # On conserve l'ordre des rapports demandés
+            return {name: results[name] for name in reports if name in results}
+
+        except requests.RequestException as e:
+            raise ValueError(f"GA4 API request failed: {str(e)}")
+
+    def _batch_groups(self, reports: Dict[str, GA4QueryParams]) -> List[List[str]]:
+        """Noms des rapports regroupés par propriété, par lots de MAX_BATCH_SIZE."""
+        groups: List[List[str]] = []
+        by_property: Dict[str, List[str]] = {}
+        for name, params in reports.items():
+            by_property.setdefault(params.property_id, []).append(name)
+        for names in by_property.values():
+            for i in range(0, len(names), self.MAX_BATCH_SIZE):
+                groups.append(names[i:i + self.MAX_BATCH_SIZE])
+        return groups
+
+    @classmethod
+    def _batch_body(cls, reports: Dict[str, GA4QueryParams], names: List[str]) -> Dict[str, Any]:
+        return {"requests": [
+            {
+                **cls._build_base_body(reports[name]),
+                "limit": reports[name].limit or 10000,
+                "offset": 0,
+            }
+            for name in names
+        ]}
+
+    def _fetch_pages(self, params: GA4QueryParams) -> Iterator[Dict[str, Any]]:
+        """Réponses brutes de toutes les pages du rapport, dans l'ordre."""
+        base_body = self._build_base_body(params)
+        url = f"{self.BASE_URL}/properties/{params.property_id}:runReport"
+        headers = self._headers()
+
+        # limit = taille d'une page
+        page_limit = params.limit or 10000
+
+        first_data = self._fetch_page(url, headers, base_body, 0, page_limit)
+        remaining_pages = self._fetch_remaining_pages(
+            url, headers, base_body, first_data, len(first_data.get("rows", [])), page_limit
+        )
+        return chain([first_data], remaining_pages)
+
+    def _cached_pages(self, params: GA4QueryParams, stats: Dict[str, int]) -> List[Dict[str, Any]]:
+        """
+        Une page brute par jour de la période, en combinant le store et GA4.
+        Les jours manquants ou volatils sont regroupés en plages contiguës,
+        chaque plage faisant l'objet d'un seul rapport GA4.
+        """
+        plan = self._plan_cached_days(params)
+
+        fetched: Dict[date, Dict[str, Any]] = {}
+        for span_start, span_end, span_params in plan.spans:
+            fetched.update(_split_pages_by_day(self._fetch_pages(span_params), span_start, span_end))
+
+        return self._merge_cached_days(plan, fetched, stats)
+
+    def _plan_cached_days(self, params: GA4QueryParams) -> "_CachePlan":
+        """Lit le store et calcule les plages de jours à redemander à GA4."""
+        start_date, end_date = self._date_range(params)
+        days = days_between(start_date, end_date)
+        volatile_from = date.today() - timedelta(days=self.volatile_days - 1)
+
+        owner = self.oauth_service.cache_key
+        key = self.store.key_for(params, owner)
+        cached = self.store.get_days(key, [d for d in days if d < volatile_from])
+        missing = [d for d in days if d not in cached]
+        spans = [
+            (span_start, span_end, params.model_copy(update={"start_date": span_start, "end_date": span_end}))
+            for span_start, span_end in contiguous_spans(missing)
+        ]
+        return _CachePlan(params, key, owner, days, volatile_from, cached, spans)
+
+    def _merge_cached_days(
+        self,
+        plan: "_CachePlan",
+        fetched: Dict[date, Dict[str, Any]],
+        stats: Dict[str, int],
+    ) -> List[Dict[str, Any]]:
+        """Enregistre les jours définitifs récupérés et fusionne avec le cache."""
+        self.store.put_days(
+            plan.key, plan.owner, plan.params.property_id,
+            {d: page for d, page in fetched.items() if d < plan.volatile_from},
+        )
+
+        stats["cached_days"] = len(plan.cached)
+        stats["fetched_days"] = len(plan.days) - len(plan.cached)
+        return [plan.cached[d] if d in plan.cached else fetched[d] for d in plan.days]
+
+    @staticmethod
+    def _assemble(pages: Iterable[Dict[str, Any]], columnar: bool) -> Dict[str, Any]:
+        """Assemble des pages GA4 brutes en un rapport (rows ou columnar)."""
+        report = ColumnarReport() if columnar else RowsReport()
+        for data in pages:
+            report.add_page(data)
+        return report.to_dict()
+
+    def _headers(self) -> Dict[str, str]:
+        return self._token_headers(self.oauth_service.get_access_token())
+
+    @staticmethod
+    def _token_headers(access_token: str) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
+
+    @staticmethod
+    def _date_range(params: GA4QueryParams) -> Tuple[date, date]:
         # Dates par défaut si non fournies
         start_date = params.start_date or (date.today() - timedelta(days=1))
         end_date = params.end_date or (date.today() - timedelta(days=1))
+        return start_date, end_date
+
+    @classmethod
+    def _build_base_body(cls, params: GA4QueryParams) -> Dict[str, Any]:
+        """Body runReport sans limit/offset."""
+        start_date, end_date = cls._date_range(params)
 
-        # Body de base sans limit/offset
         base_body: Dict[str, Any] = {
             "dateRanges": [{
                 "startDate": start_date.isoformat(),
@@ -52,96 +360,116 @@ class GA4Service:
                 }
             }
 
-        url = f"{self.BASE_URL}/properties/{params.property_id}:runReport"
-        headers = {
-            "Authorization": f"Bearer {self.oauth_service.get_access_token()}",
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-        }
+        return base_body
 
-        all_rows: List[Dict[str, Any]] = []
-        dimension_headers: List[str] = []
-        metric_headers: List[str] = []
+    @staticmethod
+    def _fetch_page(
+        url: str,
+        headers: Dict[str, str],
+        base_body: Dict[str, Any],
+        offset: int,
+        page_limit: int,
+    ) -> Dict[str, Any]:
+        body: Dict[str, Any] = dict(base_body)
+        body["limit"] = page_limit
+        body["offset"] = offset
 
-        offset = 0
-        # limit = taille d'une page
-        page_limit = params.limit or 10000
+        # runReport est une lecture : relancer le POST est sans effet de bord
+        response = http_client.post(
+            url,
+            headers=headers,
+            json=body,
+            idempotent=True,
+        )
+        response.raise_for_status()
+        return response.json()
 
-        try:
-            while True:
-                
-                body: Dict[str, Any] = dict(base_body)
-                body["limit"] = page_limit
-                body["offset"] = offset
-
-                response = requests.post(
-                    url,
-                    headers=headers,
-                    json=body,
-                    timeout=30,
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                parsed_page = self._parse_response(data)
-
-                # Headers d'après la première page
-                if not dimension_headers:
-                    dimension_headers = parsed_page.get("dimension_headers", [])
-                if not metric_headers:
-                    metric_headers = parsed_page.get("metric_headers", [])
-
-                page_rows = parsed_page.get("rows", [])
-                all_rows.extend(page_rows)
-
-                # Nombre total de lignes côté GA4
-                total_row_count = data.get("rowCount", len(all_rows))
-
-                # Avancer l'offset
-                offset += len(page_rows)
-
-                # plus de lignes dans cette page ou on a lu toutes les lignes d'après rowCount
-                if not page_rows:
-                    break
-                if offset >= total_row_count:
-                    break
-
-            return {
-                "rows": all_rows,
-                "row_count": len(all_rows),
-                "dimension_headers": dimension_headers,
-                "metric_headers": metric_headers,
-            }
+    @staticmethod
+    def _remaining_offsets(
+        first_data: Dict[str, Any],
+        first_page_size: int,
+        page_limit: int,
+    ) -> Tuple[int, range]:
+        """(taille de page effective, offsets des pages après la première)"""
+        total_row_count = first_data.get("rowCount", first_page_size)
+        step = min(page_limit, first_page_size)
+        if not step or step >= total_row_count:
+            return step, range(0)
+        return step, range(step, total_row_count, step)
 
-        except requests.RequestException as e:
-            raise ValueError(f"GA4 API request failed: {str(e)}")
+    def _fetch_remaining_pages(
+        self,
+        url: str,
+        headers: Dict[str, str],
+        base_body: Dict[str, Any],
+        first_data: Dict[str, Any],
+        first_page_size: int,
+        page_limit: int,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Réponses brutes des pages qui suivent la première, dans l'ordre des
+        offsets. GA4 peut plafonner une page sous limit : le pas entre deux
+        offsets est donc la taille réelle de la première page.
+
+        Générateur à fenêtre glissante : au plus max_workers pages sont en
+        vol ou en attente de lecture, la mémoire reste donc bornée même si
+        l'appelant consomme les pages une à une (streaming).
+        """
+        step, offsets = self._remaining_offsets(first_data, first_page_size, page_limit)
+        if not offsets:
+            return
 
-    def _parse_response(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if self.max_workers == 1 or len(offsets) == 1:
+            for offset in offsets:
+                yield self._fetch_page(url, headers, base_body, offset, step)
+            return
+
+        window = min(self.max_workers, len(offsets))
+        with ThreadPoolExecutor(max_workers=window) as executor:
+            pending: Deque[Future] = deque()
+            next_offsets = iter(offsets)
+            for offset in islice(next_offsets, window):
+                pending.append(executor.submit(self._fetch_page, url, headers, base_body, offset, step))
+            try:
+                while pending:
+                    data = pending.popleft().result()
+                    # Une page lue -> on en lance une autre
+                    for offset in islice(next_offsets, 1):
+                        pending.append(executor.submit(self._fetch_page, url, headers, base_body, offset, step))
+                    yield data
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    @staticmethod
+    def _parse_response(data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Parse la réponse GA4 brute en un format plus simple :
         - rows : liste de dict {dimension: valeur, metric: valeur}
         - row_count : nombre de lignes dans CETTE page
         - dimension_headers / metric_headers : liste des noms
+
+        Les métriques sont converties colonne par colonne d'après le type
+        annoncé dans metricHeaders (voir convert_metric_column).
         """
         dimension_headers = [d["name"] for d in data.get("dimensionHeaders", [])]
         metric_headers = [m["name"] for m in data.get("metricHeaders", [])]
+        metric_types = [m.get("type") for m in data.get("metricHeaders", [])]
+        rows = data.get("rows", [])
 
-        parsed_rows: List[Dict[str, Any]] = []
-
-        for row in data.get("rows", []):
-            row_dict: Dict[str, Any] = {}
-
-            # Dimensions nommées
-            dim_values = [dv.get("value") for dv in row.get("dimensionValues", [])]
-            for name, value in zip(dimension_headers, dim_values):
-                row_dict[name] = value
+        columns: List[List[Any]] = [
+            [row["dimensionValues"][i].get("value") for row in rows]
+            for i in range(len(dimension_headers))
+        ]
+        columns += [
+            convert_metric_column([row["metricValues"][j].get("value") for row in rows], metric_type)
+            for j, metric_type in enumerate(metric_types)
+        ]
 
-            # Métriques nommées
-            met_values = [mv.get("value") for mv in row.get("metricValues", [])]
-            for name, value in zip(metric_headers, met_values):
-                row_dict[name] = self._convert_value(value)
-
-            parsed_rows.append(row_dict)
+        names = dimension_headers + metric_headers
+        parsed_rows: List[Dict[str, Any]] = [dict(zip(names, values)) for values in zip(*columns)]
+        if not columns:
+            parsed_rows = [{} for _ in rows]
 
         return {
             "rows": parsed_rows,
@@ -161,4 +489,93 @@ class GA4Service:
                 return float(value)
             return int(value)
         except ValueError:
-            return value
\ No newline at end of file
+            return value
+
+
+class RowsReport:
+    """Accumulateur de rapport GA4 au format rows (une liste de dicts)."""
+
+    def __init__(self):
+        self.rows: List[Dict[str, Any]] = []
+        self.dimension_headers: List[str] = []
+        self.metric_headers: List[str] = []
+
+    def add_page(self, data: Dict[str, Any]) -> None:
+        parsed_page = GA4Service._parse_response(data)
+
+        # Headers d'après la première page
+        if not self.dimension_headers:
+            self.dimension_headers = parsed_page.get("dimension_headers", [])
+        if not self.metric_headers:
+            self.metric_headers = parsed_page.get("metric_headers", [])
+
+        self.rows.extend(parsed_page.get("rows", []))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "row_count": len(self.rows),
+            "dimension_headers": self.dimension_headers,
+            "metric_headers": self.metric_headers,
+        }
+
+
+class ColumnarReport:
+    """
+    Accumulateur de rapport GA4 en colonnes, rempli directement depuis les
+    réponses brutes (aucun dict par ligne n'est construit).
+
+    Les dimensions sont encodées par dictionnaire : chaque valeur distincte
+    est stockée une fois dans "dictionary" et chaque ligne n'est qu'un indice
+    dans "codes".
+    """
+
+    def __init__(self):
+        self.dimension_headers: List[str] = []
+        self.metric_headers: List[str] = []
+        self.metric_types: List[Optional[str]] = []
+        self.row_count = 0
+        self._indexes: List[Dict[str, int]] = []
+        self._codes: List[List[int]] = []
+        self._metrics: List[List[Any]] = []
+
+    def add_page(self, data: Dict[str, Any]) -> None:
+        if not self.dimension_headers and not self.metric_headers:
+            self.dimension_headers = [d["name"] for d in data.get("dimensionHeaders", [])]
+            self.metric_headers = [m["name"] for m in data.get("metricHeaders", [])]
+            self.metric_types = [m.get("type") for m in data.get("metricHeaders", [])]
+            self._indexes = [{} for _ in self.dimension_headers]
+            self._codes = [[] for _ in self.dimension_headers]
+            self._metrics = [[] for _ in self.metric_headers]
+
+        rows = data.get("rows", [])
+
+        for i, (index, codes) in enumerate(zip(self._indexes, self._codes)):
+            for row in rows:
+                value = row["dimensionValues"][i].get("value")
+                code = index.get(value)
+                if code is None:
+                    code = index[value] = len(index)
+                codes.append(code)
+
+        for j, (column, metric_type) in enumerate(zip(self._metrics, self.metric_types)):
+            column.extend(convert_metric_column(
+                [row["metricValues"][j].get("value") for row in rows], metric_type
+            ))
+
+        self.row_count += len(rows)
+
+    def to_dict(self) -> Dict[str, Any]:
+        columns: Dict[str, Any] = {}
+        for name, index, codes in zip(self.dimension_headers, self._indexes, self._codes):
+            columns[name] = {"dictionary": list(index), "codes": codes}
+        for name, values in zip(self.metric_headers, self._metrics):
+            columns[name] = values
+
+        return {
+            "format": "columnar",
+            "row_count": self.row_count,
+            "dimension_headers": self.dimension_headers,
+            "metric_headers": self.metric_headers,
+            "columns": columns,
+        }
@@ -1,19 +1,34 @@
-import requests
-from datetime import date, datetime, timezone
-from typing import Optional
+from datetime import date, datetime, timedelta, timezone
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Iterator, NamedTuple, Optional
 from urllib.parse import quote
 
+from kpi_connectors import http_cache, http_client
 from kpi_connectors.auth.oauth import OAuthService
+from kpi_connectors.storage.days import contiguous_spans, days_between
+from kpi_connectors.storage.linkedin_store import LinkedInPostStore, LinkedInShareStatsStore
 
 BASE_URL = "https://api.linkedin.com/rest"
 
 # Valeur de secours si jamais on n'envoie pas le paramètre en header.
 DEFAULT_LINKEDIN_API_VERSION = "202607"  # format YYYYMM
 
+# URN par appel organizationalEntityShareStatistics
+STATS_BATCH_SIZE = 50
+# Lots de stats envoyés en parallèle (voir configure_stats_concurrency)
+DEFAULT_STATS_CONCURRENCY = 4
+_default_stats_concurrency = DEFAULT_STATS_CONCURRENCY
+_stats_concurrency_by_version: dict[str, int] = {}
+
 
 def _headers(oauth_service: OAuthService, api_version: str) -> dict:
+    return _token_headers(oauth_service.get_access_token(), api_version)
+
+
+def _token_headers(access_token: str, api_version: str) -> dict:
     return {
-        "Authorization": f"Bearer {oauth_service.get_access_token()}",
+        "Authorization": f"Bearer {access_token}",
         "Linkedin-Version": api_version,
         "X-Restli-Protocol-Version": "2.0.0",
         "Content-Type": "application/json",
@@ -38,14 +53,13 @@ def fetch_follower_count(
     """
     encoded_urn = quote(organization_urn, safe="")  # encode les ':' en '%3A'
     params = {"edgeType": "COMPANY_FOLLOWED_BY_MEMBER"}
-    response = requests.get(
+    # GET conditionnel ; propriétaire = credentials (le bearer change à chaque refresh)
+    data = http_cache.get_json(
         f"{BASE_URL}/networkSizes/{encoded_urn}",
+        owner=oauth_service.cache_key,
         headers=_headers(oauth_service, api_version),
         params=params,
-        timeout=30,
     )
-    response.raise_for_status()
-    data = response.json()
  
     return {
         "organization_urn": organization_urn,
@@ -59,11 +73,108 @@ def fetch_share_statistics(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     api_version: str = DEFAULT_LINKEDIN_API_VERSION,
+    store: Optional[LinkedInShareStatsStore] = None,
+    volatile_days: int = 3,
 ) -> dict:
     """
     Statistiques agrégées de toutes les publications (impressions, clics, engagement...).
     Si start_date/end_date sont omis, retourne les stats à vie.
+ 
+    Avec un store et une plage de dates, les jours déjà en cache ne sont pas
+    redemandés : seuls les jours manquants et les volatile_days derniers
+    jours (UTC, encore recalculés par LinkedIn) le sont, en un appel
+    timeIntervals par plage contiguë. Le résultat contient alors
+    "cache": {"cached_days", "fetched_days"}.
     """
+    if store is not None and start_date and end_date and start_date < end_date:
+        plan = _plan_share_statistics(store, oauth_service.cache_key, organization_urn, start_date, end_date, volatile_days)
+        headers = _headers(oauth_service, api_version) if plan.spans else None
+        fetched: dict[date, Optional[dict]] = {}
+        for span_start, span_end in plan.spans:
+            response = http_client.get(
+                f"{BASE_URL}/organizationalEntityShareStatistics",
+                headers=headers,
+                params=_share_statistics_params(organization_urn, span_start, span_end),
+            )
+            response.raise_for_status()
+            fetched.update(_share_statistics_by_day(organization_urn, response.json(), span_start, span_end))
+        return _merge_share_statistics(store, organization_urn, plan, fetched)
+ 
+    response = http_client.get(
+        f"{BASE_URL}/organizationalEntityShareStatistics",
+        headers=_headers(oauth_service, api_version),
+        params=_share_statistics_params(organization_urn, start_date, end_date),
+    )
+    response.raise_for_status()
+    return _parse_share_statistics(organization_urn, response.json())
+ 
+ 
+class _StatsCachePlan(NamedTuple):
+    owner: str
+    days: list[date]
+    volatile_from: date
+    cached: dict[date, Optional[dict]]
+    # (début, fin exclue) de chaque appel timeIntervals à faire
+    spans: list[tuple[date, date]]
+ 
+ 
+def _plan_share_statistics(
+    store: LinkedInShareStatsStore,
+    owner: str,
+    organization_urn: str,
+    start_date: date,
+    end_date: date,
+    volatile_days: int,
+) -> _StatsCachePlan:
+    """Lit le store et calcule les plages de jours à redemander (fin de plage exclue, comme timeRange)."""
+    days = days_between(start_date, end_date - timedelta(days=1))
+    volatile_from = datetime.now(timezone.utc).date() - timedelta(days=volatile_days - 1)
+ 
+    cached = store.get_days(owner, organization_urn, [d for d in days if d < volatile_from])
+    missing = [d for d in days if d not in cached]
+    spans = [(first, last + timedelta(days=1)) for first, last in contiguous_spans(missing)]
+    return _StatsCachePlan(owner, days, volatile_from, cached, spans)
+ 
+ 
+def _share_statistics_by_day(
+    organization_urn: str,
+    data: dict,
+    start_date: date,
+    end_date: date,
+) -> dict[date, Optional[dict]]:
+    """{jour: stats} pour chaque jour de [start_date, end_date[ ; None si LinkedIn n'a rien renvoyé."""
+    by_day: dict[date, Optional[dict]] = {d: None for d in days_between(start_date, end_date - timedelta(days=1))}
+    for stat in _parse_share_statistics(organization_urn, data)["stats"]:
+        if stat["start_date"] is None:
+            continue
+        day = datetime.fromtimestamp(stat["start_date"] / 1000, tz=timezone.utc).date()
+        if day in by_day:
+            by_day[day] = stat
+    return by_day
+ 
+ 
+def _merge_share_statistics(
+    store: LinkedInShareStatsStore,
+    organization_urn: str,
+    plan: _StatsCachePlan,
+    fetched: dict[date, Optional[dict]],
+) -> dict:
+    """Enregistre les jours définitifs récupérés et fusionne avec le cache, dans l'ordre des jours."""
+    store.put_days(plan.owner, organization_urn, {d: s for d, s in fetched.items() if d < plan.volatile_from})
+ 
+    merged = {**plan.cached, **fetched}
+    return {
+        "organization_urn": organization_urn,
+        "stats": [merged[d] for d in plan.days if merged.get(d) is not None],
+        "cache": {"cached_days": len(plan.cached), "fetched_days": len(plan.days) - len(plan.cached)},
+    }
+ 
+ 
+def _share_statistics_params(
+    organization_urn: str,
+    start_date: Optional[date],
+    end_date: Optional[date],
+) -> dict:
     params = {
         "q": "organizationalEntity",
         "organizationalEntity": organization_urn,
@@ -74,16 +185,10 @@ def fetch_share_statistics(
             f"(timeRange:(start:{_to_epoch_millis(start_date)},"
             f"end:{_to_epoch_millis(end_date)}),timeGranularityType:DAY)"
         )
+    return params
  
-    response = requests.get(
-        f"{BASE_URL}/organizationalEntityShareStatistics",
-        headers=_headers(oauth_service, api_version),
-        params=params,
-        timeout=30,
-    )
-    response.raise_for_status()
-    data = response.json()
  
+def _parse_share_statistics(organization_urn: str, data: dict) -> dict:
     stats: list[dict] = []
     for element in data.get("elements", []):
         totals = element.get("totalShareStatistics", {})
@@ -123,50 +228,209 @@ def fetch_organization_posts(
     """
     posts: list[dict] = []
     seen_ids: set[str] = set()
-    start = 0
  
+    for elements in _iter_post_pages(oauth_service, organization_urn, page_size, api_version):
+        posts.extend(_dedupe_posts(elements, seen_ids))
+ 
+        if max_posts is not None and len(posts) >= max_posts:
+            posts = posts[:max_posts]
+            break
+ 
+    return posts
+ 
+ 
+def _dedupe_posts(elements: list[dict], seen_ids: set[str]) -> list[dict]:
+    """Posts d'une page (format _parse_post), sans ceux déjà vus sur une page précédente."""
+    posts = []
+    for el in elements:
+        post_id = el.get("id")
+        if post_id in seen_ids:
+            continue  # doublon de pagination, ignoré
+        seen_ids.add(post_id)
+        posts.append(_parse_post(el))
+    return posts
+ 
+ 
+def iter_posts_with_stats(
+    oauth_service: OAuthService,
+    organization_urn: str,
+    page_size: int = 50,
+    max_posts: Optional[int] = None,
+    api_version: str = DEFAULT_LINKEDIN_API_VERSION,
+    max_pending: Optional[int] = None,
+) -> Iterator[list[dict]]:
+    """
+    Variante en pipeline de fetch_organization_posts + fetch_share_statistics_by_posts :
+    les stats d'une page de posts sont demandées en arrière-plan pendant que
+    la page suivante est récupérée.
+ 
+    Produit, page par page et dans l'ordre de LinkedIn, les posts avec leurs
+    "stats". Au plus max_pending pages (par défaut stats_concurrency) sont en
+    attente de leurs stats : la mémoire reste bornée à quelques pages.
+    """
+    window = max_pending or stats_concurrency(api_version)
+    seen_ids: set[str] = set()
+    remaining = max_posts
+    pending: deque[tuple[list[dict], Future]] = deque()
+ 
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        try:
+            for elements in _iter_post_pages(oauth_service, organization_urn, page_size, api_version):
+                posts = _dedupe_posts(elements, seen_ids)
+                if remaining is not None:
+                    posts = posts[:remaining]
+                    remaining -= len(posts)
+                if posts:
+                    pending.append((posts, executor.submit(
+                        _fetch_page_stats, oauth_service, organization_urn, posts, api_version,
+                    )))
+ 
+                # Pages prêtes -> produites sans attendre ; fenêtre pleine -> on attend la plus ancienne
+                while pending and (pending[0][1].done() or len(pending) >= window):
+                    posts, future = pending.popleft()
+                    yield _attach_stats(posts, future.result())
+ 
+                if remaining == 0:
+                    break
+ 
+            while pending:
+                posts, future = pending.popleft()
+                yield _attach_stats(posts, future.result())
+        finally:
+            for _, future in pending:
+                future.cancel()
+ 
+ 
+def _fetch_page_stats(
+    oauth_service: OAuthService,
+    organization_urn: str,
+    posts: list[dict],
+    api_version: str,
+) -> dict[str, dict]:
+    """Stats d'une page de posts (un ou deux lots : shares et ugcPosts), appels en série."""
+    urns = [p["id"] for p in posts]
+    headers = _headers(oauth_service, api_version)
+    return _stats_by_urn(urns, (
+        _fetch_stats_batch(headers, organization_urn, param_name, batch)
+        for param_name, batch in _stats_batches(urns, STATS_BATCH_SIZE)
+    ))
+ 
+ 
+def _attach_stats(posts: list[dict], stats_by_urn: dict[str, dict]) -> list[dict]:
+    for post in posts:
+        post["stats"] = stats_by_urn.get(post["id"])
+    return posts
+ 
+ 
+def _iter_post_pages(
+    oauth_service: OAuthService,
+    organization_urn: str,
+    page_size: int,
+    api_version: str,
+    sort_by: Optional[str] = None,
+) -> Iterator[list[dict]]:
+    """Éléments bruts de /posts, page par page, jusqu'à paging.total."""
+    start = 0
     while True:
-        params = {
-            "q": "author",
-            "author": organization_urn,
-            "count": page_size,
-            "start": start,
-        }
-        response = requests.get(
+        response = http_client.get(
             f"{BASE_URL}/posts",
             headers=_headers(oauth_service, api_version),
-            params=params,
-            timeout=30,
+            params=_posts_params(organization_urn, page_size, start, sort_by),
         )
         response.raise_for_status()
         data = response.json()
  
         elements = data.get("elements", [])
-        for el in elements:
-            post_id = el.get("id")
-            if post_id in seen_ids:
-                continue  # doublon de pagination, ignoré
-            seen_ids.add(post_id)
-            posts.append({
-                "id": post_id,
-                "created_at": el.get("createdAt"),
-                "published_at": el.get("publishedAt"),
-                "commentary": el.get("commentary"),
-                "visibility": el.get("visibility"),
-            })
- 
-        total = data.get("paging", {}).get("total", len(posts))
+        if not elements:
+            return
+        yield elements
+ 
         start += len(elements)
+        # Sans paging.total, on s'arrête après la première page
+        if start >= data.get("paging", {}).get("total", start):
+            return
  
-        if not elements:
-            break
-        if start >= total:
-            break
-        if max_posts is not None and len(posts) >= max_posts:
-            posts = posts[:max_posts]
+ 
+def sync_organization_posts(
+    oauth_service: OAuthService,
+    organization_urn: str,
+    store: LinkedInPostStore,
+    page_size: int = 50,
+    max_posts: Optional[int] = None,
+    recent_days: int = 30,
+    recent_stats_ttl: float = 3600,
+    old_stats_ttl: float = 7 * 86400,
+    api_version: str = DEFAULT_LINKEDIN_API_VERSION,
+) -> dict:
+    """
+    Variante incrémentale de fetch_organization_posts + fetch_share_statistics_by_posts,
+    adossée à un LinkedInPostStore.
+ 
+    - Posts : /posts est paginé du plus récent au plus ancien (sortBy=CREATED)
+      et seulement jusqu'à la première page qui atteint le watermark ; la
+      première synchro d'une organisation récupère tout l'historique.
+    - Stats : redemandées pour les posts publiés depuis moins de recent_days
+      jours si elles ont plus de recent_stats_ttl secondes, pour les autres
+      si elles ont plus de old_stats_ttl secondes.
+ 
+    Retourne {"organization_urn", "posts" (avec "stats"), "sync"}. Un post
+    supprimé sur LinkedIn reste dans le store (voir LinkedInPostStore.invalidate).
+    """
+    owner = oauth_service.cache_key
+    watermark = store.watermark(owner, organization_urn)
+ 
+    # La dernière page lue contient aussi des posts déjà connus (mis à jour au passage)
+    fetched: dict[str, dict] = {}
+    for elements in _iter_post_pages(oauth_service, organization_urn, page_size, api_version, sort_by="CREATED"):
+        fetched.update((el.get("id"), _parse_post(el)) for el in elements if el.get("id"))
+        if _reaches_watermark(elements, watermark):
             break
  
-    return posts
+    added = sum(1 for p in fetched.values() if watermark is None or (p.get("published_at") or 0) > watermark)
+    watermark = store.merge_posts(owner, organization_urn, list(fetched.values()))
+ 
+    stale = store.stale_stats(owner, organization_urn, recent_days, recent_stats_ttl, old_stats_ttl)
+    if stale:
+        stats_by_urn = fetch_share_statistics_by_posts(oauth_service, organization_urn, stale, api_version=api_version)
+        store.put_stats(owner, organization_urn, stale, stats_by_urn)
+ 
+    return {
+        "organization_urn": organization_urn,
+        "posts": store.posts(owner, organization_urn, limit=max_posts),
+        "sync": {"new_posts": added, "refreshed_stats": len(stale), "watermark": watermark},
+    }
+ 
+ 
+def _reaches_watermark(elements: list[dict], watermark: Optional[int]) -> bool:
+    """Vrai si la page contient un post déjà connu (publié au plus tard au watermark)."""
+    if watermark is None:
+        return False
+    return any(
+        el.get("publishedAt") is not None and el["publishedAt"] <= watermark
+        for el in elements
+    )
+ 
+ 
+def _posts_params(organization_urn: str, page_size: int, start: int, sort_by: Optional[str] = None) -> dict:
+    params = {
+        "q": "author",
+        "author": organization_urn,
+        "count": page_size,
+        "start": start,
+    }
+    if sort_by:
+        params["sortBy"] = sort_by
+    return params
+ 
+ 
+def _parse_post(el: dict) -> dict:
+    return {
+        "id": el.get("id"),
+        "created_at": el.get("createdAt"),
+        "published_at": el.get("publishedAt"),
+        "commentary": el.get("commentary"),
+        "visibility": el.get("visibility"),
+    }
  
  
 def _build_list_param(urns: list[str]) -> str:
@@ -180,68 +444,110 @@ def _build_list_param(urns: list[str]) -> str:
  
  
 def _fetch_stats_batch(
-    oauth_service: OAuthService,
+    headers: dict,
     organization_urn: str,
-    urns: list[str],
     param_name: str,
-    batch_size: int,
-    api_version: str,
+    batch: list[str],
 ) -> list[dict]:
-    all_stats: list[dict] = []
+    """Un appel organizationalEntityShareStatistics pour un lot d'URN du même type."""
+    url = _stats_batch_url(organization_urn, param_name, batch)
+    response = http_client.get(url, headers=headers)
+    response.raise_for_status()
+    data = response.json()
  
-    for i in range(0, len(urns), batch_size):
-        batch = urns[i:i + batch_size]
-        if not batch:
-            continue
+    return [_parse_post_stats(el) for el in data.get("elements", [])]
  
-        list_param = _build_list_param(batch)
-        encoded_org_urn = quote(organization_urn, safe="")
  
-        url = (
-            f"{BASE_URL}/organizationalEntityShareStatistics"
-            f"?q=organizationalEntity"
-            f"&organizationalEntity={encoded_org_urn}"
-            f"&{param_name}={list_param}"
-        )
+def _stats_batches(share_urns: list[str], batch_size: int) -> list[tuple[str, list[str]]]:
+    """Lots (nom du paramètre, URN) ; shares et ugcPosts ne sont jamais mélangés."""
+    shares, ugc_posts = _split_share_urns(share_urns)
+    return [
+        (param_name, urns[i:i + batch_size])
+        for param_name, urns in (("shares", shares), ("ugcPosts", ugc_posts))
+        for i in range(0, len(urns), batch_size)
+    ]
  
-        response = requests.get(url, headers=_headers(oauth_service, api_version), timeout=30)
-        response.raise_for_status()
-        data = response.json()
  
-        for el in data.get("elements", []):
-            totals = el.get("totalShareStatistics", {})
-            all_stats.append({
-                "share_urn": el.get("share") or el.get("ugcPost"),
-                "impressions": totals.get("impressionCount"),
-                "unique_impressions": totals.get("uniqueImpressionsCount"),
-                "clicks": totals.get("clickCount"),
-                "likes": totals.get("likeCount"),
-                "comments": totals.get("commentCount"),
-                "shares": totals.get("shareCount"),
-                "engagement": totals.get("engagement"),
-            })
+def _stats_by_urn(share_urns: list[str], batch_results: Iterable[list[dict]]) -> dict[str, dict]:
+    """Fusionne les résultats des lots en {urn: stats}, dans l'ordre de share_urns."""
+    found = {s["share_urn"]: s for stats in batch_results for s in stats}
+    return {urn: found[urn] for urn in share_urns if urn in found}
+ 
+ 
+def _stats_batch_url(organization_urn: str, param_name: str, batch: list[str]) -> str:
+    list_param = _build_list_param(batch)
+    encoded_org_urn = quote(organization_urn, safe="")
+ 
+    return (
+        f"{BASE_URL}/organizationalEntityShareStatistics"
+        f"?q=organizationalEntity"
+        f"&organizationalEntity={encoded_org_urn}"
+        f"&{param_name}={list_param}"
+    )
+ 
  
-    return all_stats
+def _parse_post_stats(el: dict) -> dict:
+    totals = el.get("totalShareStatistics", {})
+    return {
+        "share_urn": el.get("share") or el.get("ugcPost"),
+        "impressions": totals.get("impressionCount"),
+        "unique_impressions": totals.get("uniqueImpressionsCount"),
+        "clicks": totals.get("clickCount"),
+        "likes": totals.get("likeCount"),
+        "comments": totals.get("commentCount"),
+        "shares": totals.get("shareCount"),
+        "engagement": totals.get("engagement"),
+    }
  
  
 def fetch_share_statistics_by_posts(
     oauth_service: OAuthService,
     organization_urn: str,
     share_urns: list[str],
-    batch_size: int = 50,
+    batch_size: int = STATS_BATCH_SIZE,
     api_version: str = DEFAULT_LINKEDIN_API_VERSION,
-) -> list[dict]:
+    max_workers: Optional[int] = None,
+) -> dict[str, dict]:
     """
     Récupère les statistiques individuelles pour une liste de posts.
     Les URN peuvent être de type 'share' ou 'ugcPost' selon comment le post
     a été créé -> il faut les envoyer dans des paramètres séparés
     (shares[] vs ugcPosts[]), LinkedIn rejette un lot qui mélange les deux.
+ 
+    Les lots sont envoyés en parallèle (max_workers, par défaut
+    stats_concurrency(api_version)). Retourne {urn: stats} ; un post pour
+    lequel LinkedIn ne renvoie rien est absent du résultat.
     """
-    shares = [u for u in share_urns if u.startswith("urn:li:share:")]
-    ugc_posts = [u for u in share_urns if u.startswith("urn:li:ugcPost:")]
+    batches = _stats_batches(share_urns, batch_size)
+    if not batches:
+        return {}
+ 
+    headers = _headers(oauth_service, api_version)
+    workers = min(max_workers or stats_concurrency(api_version), len(batches))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            lambda b: _fetch_stats_batch(headers, organization_urn, b[0], b[1]),
+            batches,
+        )
+        return _stats_by_urn(share_urns, results)
  
-    all_stats: list[dict] = []
-    all_stats += _fetch_stats_batch(oauth_service, organization_urn, shares, "shares", batch_size, api_version)
-    all_stats += _fetch_stats_batch(oauth_service, organization_urn, ugc_posts, "ugcPosts", batch_size, api_version)
  
-    return all_stats
\ No newline at end of file
+def stats_concurrency(api_version: str) -> int:
+    """Nombre de lots de stats envoyés en parallèle pour api_version."""
+    return _stats_concurrency_by_version.get(api_version, _default_stats_concurrency)
+ 
+ 
+def configure_stats_concurrency(default: int, by_version: Optional[dict[str, int]] = None) -> None:
+    """
+    Règle la concurrence des lots de stats : default pour toutes les versions,
+    by_version pour celles dont les quotas diffèrent (ex. {"202601": 2}).
+    """
+    global _default_stats_concurrency, _stats_concurrency_by_version
+    _default_stats_concurrency = default
+    _stats_concurrency_by_version = dict(by_version or {})
+ 
+ 
+def _split_share_urns(share_urns: list[str]) -> tuple[list[str], list[str]]:
+    shares = [u for u in share_urns if u.startswith("urn:li:share:")]
+    ugc_posts = [u for u in share_urns if u.startswith("urn:li:ugcPost:")]
+    return shares, ugc_posts
@@ -1,23 +1,43 @@
+import json
+import tarfile
+import time
+from typing import IO, Iterable, Iterator, NamedTuple, Optional
+
 import requests
+from kpi_connectors import http_cache, http_client
 from kpi_connectors.models.mailchimp import MailchimpCampaignParams
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import time
+from kpi_connectors.storage.mailchimp_store import MailchimpClickStore, owner_for
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 
-def fetch_mailchimp_audiences(api_key: str) -> dict:
+CLICK_DETAILS_FIELDS = "total_items,urls_clicked.url,urls_clicked.total_clicks,urls_clicked.unique_clicks,urls_clicked.click_percentage"
+
+# /reports (et click-details) renvoient au plus 1000 éléments par page
+REPORTS_PAGE_SIZE = 1000
+# Pages /reports demandées en parallèle
+REPORTS_CONCURRENCY = 4
+
+# Mode batch (/batches) : intervalle de suivi du job et délai max avant abandon
+BATCH_POLL_INTERVAL = 5.0
+BATCH_TIMEOUT = 600.0
+
+# Fraîcheur du cache des click-details selon l'âge de la campagne : toujours
+# redemandés avant CLICKS_REFRESH_DAYS jours, au plus une fois par
+# CLICKS_DAILY_TTL secondes jusqu'à CLICKS_FROZEN_AFTER_DAYS, figés ensuite
+CLICKS_REFRESH_DAYS = 7
+CLICKS_FROZEN_AFTER_DAYS = 30
+CLICKS_DAILY_TTL = 86400
+
+class MailchimpBatchTimeout(TimeoutError):
+    """Job /batches pas terminé dans le délai donné (à relancer plus tard)."""
+
+def _base_url_and_auth(api_key: str) -> tuple[str, tuple[str, str]]:
     # Construit l'URL d'API à partir du data center
     data_center = api_key.split("-")[-1]
-    base_url = "https://"+ data_center + ".api.mailchimp.com/3.0/"
-    auth = ("", api_key)
-
-    # Appel /lists pour récupérer les audiences
-    params = {
-        "count": 1000,
-        "fields": "lists.id,lists.name,lists.stats.member_count",  
-    }
-    response = requests.get(base_url + "lists", params=params, auth=auth, timeout=30)
-    response.raise_for_status()
+    base_url = f"https://{data_center}.api.mailchimp.com/3.0/"
+    return base_url, ("", api_key)
 
-    data = response.json()
+def _parse_audiences(data: dict) -> dict:
     audience_list = data.get("lists", [])
 
     # On additionne member_count pour avoir le total
@@ -40,18 +60,12 @@ def fetch_mailchimp_audiences(api_key: str) -> dict:
         "audiences": audiences,
     }
 
-def fetch_mailchimp_campaign_summaries(
-    api_key: str,
-    params: MailchimpCampaignParams,
-) -> list[dict]:
-    data_center = api_key.split("-")[-1]
-    base_url = f"https://{data_center}.api.mailchimp.com/3.0/"
-    auth = ("", api_key)
-
+def _summaries_params(params: MailchimpCampaignParams) -> dict:
+    # count / offset sont fixés page par page (voir _first_page_params)
     campaigns_params = {
         "status": params.status,
-        "count": params.count,
         "fields": (
+            "total_items,"
             "reports.id,"
             "reports.campaign_title,"
             "reports.list_id,"
@@ -71,36 +85,398 @@ def fetch_mailchimp_campaign_summaries(
         campaigns_params["since_send_time"] = params.since_send_time
     if params.before_send_time:
         campaigns_params["before_send_time"] = params.before_send_time
+    return campaigns_params
 
-    resp = requests.get(base_url + "reports", params=campaigns_params, auth=auth, timeout=30)
-    resp.raise_for_status()
-    data = resp.json()
-    reports = data.get("reports", [])
+def _parse_summary(r: dict) -> dict:
+    opens = r.get("opens") or {}
+    clicks = r.get("clicks") or {}
+    bounces = r.get("bounces") or {}
 
-    summaries: list[dict] = []
-    for r in reports:
-        opens = r.get("opens") or {}
-        clicks = r.get("clicks") or {}
-        bounces = r.get("bounces") or {}
+    return {
+        "id": r.get("id"),
+        "name": r.get("campaign_title"),
+        "list_id": r.get("list_id"),
+        "send_time": r.get("send_time"),
+        "emails_sent": r.get("emails_sent"),
+        "open_rate": opens.get("open_rate"),
+        "opens_total": opens.get("opens_total"),
+        "unique_opens": opens.get("unique_opens"),
+        "click_rate": clicks.get("click_rate"),
+        "clicks_total": clicks.get("clicks_total"),
+        "unique_clicks": clicks.get("unique_clicks"),
+        "hard_bounces": bounces.get("hard_bounces"),
+        "soft_bounces": bounces.get("soft_bounces"),
+    }
+
+def _sent_campaigns_params(since_send_time: str | None) -> dict:
+    campaigns_params = {"status": "sent", "fields": "total_items,reports.id,reports.send_time"}
+    if since_send_time:
+        campaigns_params["since_send_time"] = since_send_time
+    return campaigns_params
+
+def _time_windows(since_send_time: str, before_send_time: str | None, partitions: int) -> list[tuple[str, str]]:
+    """
+    Découpe [since, before] (before = maintenant si vide) en partitions
+    fenêtres de même durée. Chaque fenêtre déborde d'une seconde sur la
+    précédente pour ne rien perdre aux bornes ; les doublons sont retirés
+    par _merge_report_pages.
+    """
+    since = datetime.fromisoformat(since_send_time)
+    before = datetime.fromisoformat(before_send_time) if before_send_time else datetime.now(timezone.utc)
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    if before.tzinfo is None:
+        before = before.replace(tzinfo=timezone.utc)
+    if before <= since:
+        raise ValueError("before_send_time must be after since_send_time")
+
+    step = (before - since) / partitions
+    bounds = [since + step * i for i in range(partitions)] + [before]
+    return [
+        ((start - timedelta(seconds=1) if i else start).isoformat(), end.isoformat())
+        for i, (start, end) in enumerate(zip(bounds, bounds[1:]))
+    ]
+
+def _window_params(base_params: dict, params: MailchimpCampaignParams) -> list[dict]:
+    """Paramètres de chaque fenêtre de temps (une seule sans partitionnement)."""
+    if params.partitions <= 1:
+        return [base_params]
+    if not params.since_send_time:
+        raise ValueError("partitions requires since_send_time")
+    return [
+        {**base_params, "since_send_time": since, "before_send_time": before}
+        for since, before in _time_windows(params.since_send_time, params.before_send_time, params.partitions)
+    ]
+
+def _first_page_params(params: dict, limit: int | None, page_size: int = REPORTS_PAGE_SIZE) -> dict:
+    return {**params, "count": min(page_size, limit or page_size), "offset": 0}
+
+def _remaining_pages_params(
+    params: dict,
+    first_page: dict,
+    limit: int | None,
+    page_size: int = REPORTS_PAGE_SIZE,
+) -> list[dict]:
+    """
+    Pages suivantes d'une liste Mailchimp (/reports, click-details), connues
+    d'avance grâce au total_items de la première page : elles peuvent être
+    demandées en parallèle.
+    """
+    total = first_page.get("total_items") or 0
+    wanted = min(total, limit) if limit else total
+    return [
+        {**params, "count": min(page_size, wanted - offset), "offset": offset}
+        for offset in range(page_size, wanted, page_size)
+    ]
+
+def _merge_report_pages(pages: list[dict], limit: int | None) -> list[dict]:
+    """Reports des pages dans l'ordre (fenêtre puis offset), sans doublon, tronqués à limit."""
+    seen: set[str] = set()
+    reports: list[dict] = []
+    for page in pages:
+        for report in page.get("reports", []):
+            if report.get("id") in seen:
+                continue
+            seen.add(report.get("id"))
+            reports.append(report)
+    return reports[:limit] if limit else reports
+
+def _parse_click_details(cid: str, data: dict) -> list[dict]:
+    return [
+        {
+            "campaign_id": cid,
+            "url": u.get("url"),
+            "total_clicks": u.get("total_clicks"),
+            "unique_clicks": u.get("unique_clicks"),
+            "click_percentage": u.get("click_percentage"),
+        }
+        for u in data.get("urls_clicked", [])
+    ]
+
+def _click_details_operations(campaign_ids: list[str], count: int) -> list[dict]:
+    """Une opération /batches par campagne ; operation_id = id de la campagne."""
+    return [
+        {
+            "method": "GET",
+            "path": f"/reports/{cid}/click-details",
+            "params": _first_page_params({"fields": CLICK_DETAILS_FIELDS}, None, count),
+            "operation_id": cid,
+        }
+        for cid in campaign_ids
+    ]
+
+def _iter_batch_results(fileobj: IO[bytes]) -> Iterator[dict]:
+    """
+    Résultats d'opérations d'une archive /batches (tar.gz de fichiers JSON),
+    lue en flux : un seul fichier de l'archive est décodé à la fois.
+    """
+    with tarfile.open(fileobj=fileobj, mode="r|gz") as archive:
+        for member in archive:
+            if not member.isfile() or not member.name.endswith(".json"):
+                continue
+            yield from json.load(archive.extractfile(member))
+
+def _parse_batch_click_details(
+    results: Iterable[dict],
+    campaign_ids: list[str],
+) -> tuple[dict[str, dict], dict[str, str]]:
+    """
+    Premières pages click-details (réponses brutes) des opérations réussies,
+    et erreurs des autres campagnes de campaign_ids (opération en erreur ou
+    absente de l'archive).
+    """
+    first_pages: dict[str, dict] = {}
+    failed: dict[str, str] = {}
+    for result in results:
+        cid = result.get("operation_id")
+        if result.get("status_code") == 200:
+            first_pages[cid] = json.loads(result["response"])
+        else:
+            failed[cid] = f"HTTP {result.get('status_code')}"
+    for cid in campaign_ids:
+        if cid not in first_pages and cid not in failed:
+            failed[cid] = "missing from batch results"
+    return first_pages, failed
+
+def _error_message(error: Exception) -> str:
+    status = getattr(getattr(error, "response", None), "status_code", None)
+    return f"HTTP {status}" if status else str(error) or type(error).__name__
+
+def _split_first_pages(
+    campaign_ids: list[str],
+    pages: list[dict | Exception],
+) -> tuple[dict[str, dict], dict[str, str]]:
+    """Premières pages par campagne, et erreurs des campagnes en échec."""
+    first_pages: dict[str, dict] = {}
+    failed: dict[str, str] = {}
+    for cid, page in zip(campaign_ids, pages):
+        if isinstance(page, Exception):
+            failed[cid] = _error_message(page)
+        else:
+            first_pages[cid] = page
+    return first_pages, failed
+
+def _remaining_click_pages(first_pages: dict[str, dict], page_size: int) -> list[tuple[str, dict]]:
+    """(campagne, paramètres) de toutes les pages suivantes de toutes les campagnes."""
+    params = {"fields": CLICK_DETAILS_FIELDS}
+    return [
+        (cid, page_params)
+        for cid, first in first_pages.items()
+        for page_params in _remaining_pages_params(params, first, None, page_size)
+    ]
+
+def _assemble_click_details(
+    first_pages: dict[str, dict],
+    remaining: list[tuple[str, dict]],
+    pages: list[dict | Exception],
+    failed: dict[str, str],
+) -> dict[str, list[dict]]:
+    """
+    Click-details complets par campagne. Une campagne dont une page a échoué
+    passe dans failed (elle serait sinon tronquée, et mise en cache tronquée).
+    """
+    details: dict[str, list[dict]] = {cid: _parse_click_details(cid, first) for cid, first in first_pages.items()}
+    for (cid, _), page in zip(remaining, pages):
+        if isinstance(page, Exception):
+            failed.setdefault(cid, _error_message(page))
+        elif cid in details:
+            details[cid].extend(_parse_click_details(cid, page))
+    return {cid: rows for cid, rows in details.items() if cid not in failed}
+
+def _send_timestamp(send_time: str | None) -> float | None:
+    if not send_time:
+        return None
+    sent = datetime.fromisoformat(send_time)
+    if sent.tzinfo is None:
+        sent = sent.replace(tzinfo=timezone.utc)
+    return sent.timestamp()
+
+def _click_details_fresh(
+    send_time: str | None,
+    fetched_at: float,
+    now: float,
+    refresh_days: float = CLICKS_REFRESH_DAYS,
+    frozen_after_days: float = CLICKS_FROZEN_AFTER_DAYS,
+    daily_ttl: float = CLICKS_DAILY_TTL,
+) -> bool:
+    """
+    Les click-details en cache d'une campagne sont-ils encore valables ?
+    Figés (toujours valables) s'ils ont été récupérés alors que la campagne
+    avait déjà plus de frozen_after_days jours ; une campagne de date
+    inconnue est toujours redemandée.
+    """
+    sent = _send_timestamp(send_time)
+    if sent is None:
+        return False
+    if fetched_at - sent > frozen_after_days * 86400:
+        return True
+    age = now - sent
+    if age < refresh_days * 86400 or age > frozen_after_days * 86400:
+        # récente, ou gelée depuis la dernière récupération : une dernière fois
+        return False
+    return now - fetched_at < daily_ttl
+
+
+class _ClickDetailsPlan(NamedTuple):
+    owner: Optional[str]
+    campaign_ids: list[str]                 # ordre de la réponse
+    send_times: dict[str, Optional[str]]
+    cached: dict[str, list[dict]]           # campagnes servies par le cache
+    to_fetch: list[str]
+
+
+def _plan_click_details(
+    store: Optional[MailchimpClickStore],
+    api_key: str,
+    campaigns: list[dict],
+    freshness: dict,
+) -> _ClickDetailsPlan:
+    """
+    Répartit campaigns ({"id", "send_time"}) entre cache et API. Le send_time
+    d'une campagne demandée par id seule est repris du cache.
+    """
+    campaign_ids = [c["id"] for c in campaigns]
+    send_times = {c["id"]: c.get("send_time") for c in campaigns}
+    if store is None:
+        return _ClickDetailsPlan(None, campaign_ids, send_times, {}, campaign_ids)
+
+    owner = owner_for(api_key)
+    entries = store.get_campaigns(owner, campaign_ids)
+    now = time.time()
+    cached: dict[str, list[dict]] = {}
+    for cid, entry in entries.items():
+        send_times[cid] = send_times[cid] or entry.send_time
+        if _click_details_fresh(send_times[cid], entry.fetched_at, now, **freshness):
+            cached[cid] = entry.details
+    to_fetch = [cid for cid in campaign_ids if cid not in cached]
+    return _ClickDetailsPlan(owner, campaign_ids, send_times, cached, to_fetch)
 
-        summaries.append(
-            {
-                "id": r.get("id"),
-                "name": r.get("campaign_title"),
-                "list_id": r.get("list_id"),
-                "send_time": r.get("send_time"),
-                "emails_sent": r.get("emails_sent"),
-                "open_rate": opens.get("open_rate"),
-                "opens_total": opens.get("opens_total"),
-                "unique_opens": opens.get("unique_opens"),
-                "click_rate": clicks.get("click_rate"),
-                "clicks_total": clicks.get("clicks_total"),
-                "unique_clicks": clicks.get("unique_clicks"),
-                "hard_bounces": bounces.get("hard_bounces"),
-                "soft_bounces": bounces.get("soft_bounces"),
-            }
-        )
-    return summaries
+
+def _merge_click_details(
+    store: Optional[MailchimpClickStore],
+    plan: _ClickDetailsPlan,
+    fetched: dict[str, list[dict]],
+    failed: dict[str, str],
+) -> dict:
+    """
+    Enregistre les campagnes récupérées, puis retourne les click-details de
+    toutes les campagnes (dans l'ordre) et les campagnes en échec, à relancer
+    avec campaign_ids.
+    """
+    if store is not None and fetched:
+        store.put_campaigns(plan.owner, fetched, plan.send_times)
+    details_by_campaign = {**plan.cached, **fetched}
+    return {
+        "click_details": [d for cid in plan.campaign_ids for d in details_by_campaign.get(cid, [])],
+        "failed_campaigns": [
+            {"campaign_id": cid, "error": failed[cid]} for cid in plan.campaign_ids if cid in failed
+        ],
+        "cached_campaigns": len(plan.cached),
+    }
+
+def fetch_mailchimp_audiences(api_key: str) -> dict:
+    base_url, auth = _base_url_and_auth(api_key)
+
+    # Appel /lists pour récupérer les audiences
+    params = {
+        "count": 1000,
+        "fields": "lists.id,lists.name,lists.stats.member_count",
+    }
+    # GET conditionnel : audiences réutilisées telles quelles si /lists n'a pas changé
+    return http_cache.get_json(base_url + "lists", parse=_parse_audiences, params=params, auth=auth)
+
+def _fetch_reports(
+    base_url: str,
+    auth: tuple[str, str],
+    windows: list[dict],
+    limit: int | None = None,
+) -> list[dict]:
+    """
+    Tous les reports des fenêtres windows (paramètres /reports) : premières
+    pages en parallèle, puis toutes les pages restantes en parallèle.
+    """
+    def fetch_page(page_params: dict) -> dict:
+        resp = http_client.get(base_url + "reports", params=page_params, auth=auth)
+        resp.raise_for_status()
+        return resp.json()
+
+    # Avec des fenêtres, limit ne s'applique qu'à la liste fusionnée
+    window_limit = limit if len(windows) == 1 else None
+    with ThreadPoolExecutor(max_workers=REPORTS_CONCURRENCY) as executor:
+        firsts = list(executor.map(fetch_page, [_first_page_params(w, window_limit) for w in windows]))
+        remaining = [_remaining_pages_params(w, first, window_limit) for w, first in zip(windows, firsts)]
+        rest = executor.map(fetch_page, [page for window_pages in remaining for page in window_pages])
+        pages: list[dict] = []
+        for first, window_pages in zip(firsts, remaining):
+            pages.append(first)
+            pages.extend(next(rest) for _ in window_pages)
+    return _merge_report_pages(pages, limit)
+
+def fetch_mailchimp_campaign_summaries(
+    api_key: str,
+    params: MailchimpCampaignParams,
+) -> list[dict]:
+    base_url, auth = _base_url_and_auth(api_key)
+
+    windows = _window_params(_summaries_params(params), params)
+    reports = _fetch_reports(base_url, auth, windows, limit=params.count)
+
+    return [_parse_summary(r) for r in reports]
+
+
+def _click_details_campaigns(
+    base_url: str,
+    auth: tuple[str, str],
+    campaign_ids: list[str] | None,
+    since_send_time: str | None,
+    store: Optional[MailchimpClickStore],
+) -> list[dict]:
+    """
+    Campagnes ({"id", "send_time"}) dont récupérer les click-details. Pour des
+    campagnes données par id, send_time n'est demandé que si le cache en a
+    besoin et ne les connaît pas encore.
+    """
+    if not campaign_ids:
+        return _fetch_reports(base_url, auth, [_sent_campaigns_params(since_send_time)])
+    known = store.get_campaigns(owner_for(auth[1]), campaign_ids) if store is not None else {}
+    unknown = [cid for cid in campaign_ids if store is not None and cid not in known]
+
+    def fetch_send_time(cid: str) -> str | None:
+        resp = http_client.get(base_url + f"reports/{cid}", params={"fields": "id,send_time"}, auth=auth)
+        resp.raise_for_status()
+        return resp.json().get("send_time")
+
+    with ThreadPoolExecutor(max_workers=REPORTS_CONCURRENCY) as executor:
+        send_times = dict(zip(unknown, executor.map(fetch_send_time, unknown)))
+    return [{"id": cid, "send_time": send_times.get(cid)} for cid in campaign_ids]
+
+
+def _fetch_click_pages(
+    base_url: str,
+    auth: tuple[str, str],
+    pages: list[tuple[str, dict]],
+    max_workers: int = 6,
+) -> list[dict | Exception]:
+    """Pages click-details (campagne, paramètres) en parallèle ; l'erreur d'une page est retournée à sa place."""
+    def fetch_page(page: tuple[str, dict]) -> dict | Exception:
+        cid, params = page
+        try:
+            # Les 429 sont relancés par http_client (limiteur mailchimp, Retry-After)
+            resp = http_client.get(base_url + f"reports/{cid}/click-details", params=params, auth=auth)
+            resp.raise_for_status()
+            return resp.json()
+        except (requests.RequestException, ValueError) as e:
+            return e
+
+    if not pages:
+        return []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(fetch_page, pages))
+
+
+def _campaign_ids_arg(campaign_id: str | None, campaign_ids: list[str] | None) -> list[str] | None:
+    ids = list(dict.fromkeys([*([campaign_id] if campaign_id else []), *(campaign_ids or [])]))
+    return ids or None
 
 
 def fetch_mailchimp_click_details(
@@ -108,53 +484,109 @@ def fetch_mailchimp_click_details(
     campaign_id: str | None = None,
     since_send_time: str | None = None,
     count: int = 1000,
-) -> list[dict]:
-    data_center = api_key.split("-")[-1]
-    base_url = f"https://{data_center}.api.mailchimp.com/3.0/"
-    auth = ("", api_key)
-
-    if campaign_id:
-        campaign_ids = [campaign_id]
-    else:
-        campaigns_params = {"status": "sent", "count": count, "fields": "reports.id"}
-        if since_send_time:
-            campaigns_params["since_send_time"] = since_send_time
-        resp = requests.get(base_url + "reports", params=campaigns_params, auth=auth, timeout=30)
+    store: Optional[MailchimpClickStore] = None,
+    refresh_days: float = CLICKS_REFRESH_DAYS,
+    frozen_after_days: float = CLICKS_FROZEN_AFTER_DAYS,
+    daily_ttl: float = CLICKS_DAILY_TTL,
+    campaign_ids: list[str] | None = None,
+) -> dict:
+    """
+    Click-details des campagnes (campaign_id / campaign_ids, ou toutes les
+    campagnes envoyées) : {"click_details", "failed_campaigns",
+    "cached_campaigns"}.
+
+    Les urls_clicked de chaque campagne sont paginés entièrement (count par
+    page) : premières pages de toutes les campagnes en parallèle, puis
+    toutes les pages suivantes en parallèle. Avec un store, seules les
+    campagnes dont le cache n'est plus frais sont redemandées (voir
+    _click_details_fresh) ; une campagne en échec est rapportée dans
+    failed_campaigns et n'est pas mise en cache.
+    """
+    base_url, auth = _base_url_and_auth(api_key)
+
+    campaigns = _click_details_campaigns(
+        base_url, auth, _campaign_ids_arg(campaign_id, campaign_ids), since_send_time, store,
+    )
+    plan = _plan_click_details(store, api_key, campaigns, {
+        "refresh_days": refresh_days, "frozen_after_days": frozen_after_days, "daily_ttl": daily_ttl,
+    })
+
+    first_params = _first_page_params({"fields": CLICK_DETAILS_FIELDS}, None, count)
+    first_pages, failed = _split_first_pages(
+        plan.to_fetch, _fetch_click_pages(base_url, auth, [(cid, first_params) for cid in plan.to_fetch]),
+    )
+    remaining = _remaining_click_pages(first_pages, count)
+    pages = _fetch_click_pages(base_url, auth, remaining)
+    fetched = _assemble_click_details(first_pages, remaining, pages, failed)
+
+    return _merge_click_details(store, plan, fetched, failed)
+
+
+def fetch_mailchimp_click_details_batch(
+    api_key: str,
+    campaign_id: str | None = None,
+    since_send_time: str | None = None,
+    count: int = 1000,
+    poll_interval: float = BATCH_POLL_INTERVAL,
+    timeout: float = BATCH_TIMEOUT,
+    base_url: str | None = None,
+    store: Optional[MailchimpClickStore] = None,
+    refresh_days: float = CLICKS_REFRESH_DAYS,
+    frozen_after_days: float = CLICKS_FROZEN_AFTER_DAYS,
+    daily_ttl: float = CLICKS_DAILY_TTL,
+    campaign_ids: list[str] | None = None,
+) -> dict:
+    """
+    Même résultat que fetch_mailchimp_click_details, les premières pages
+    venant d'un seul job Mailchimp /batches au lieu d'un GET par campagne :
+    le job est soumis, suivi jusqu'à "finished", puis son archive de
+    résultats est lue en flux. Les pages suivantes (campagnes avec plus de
+    count URLs) sont demandées en parallèle. Seules les campagnes absentes
+    du cache (ou périmées) sont soumises. Lève MailchimpBatchTimeout si le
+    job n'est pas terminé après timeout secondes.
+
+    base_url remplace l'URL d'API déduite de la clé (serveur local de test).
+    """
+    default_url, auth = _base_url_and_auth(api_key)
+    base_url = base_url or default_url
+
+    campaigns = _click_details_campaigns(
+        base_url, auth, _campaign_ids_arg(campaign_id, campaign_ids), since_send_time, store,
+    )
+    plan = _plan_click_details(store, api_key, campaigns, {
+        "refresh_days": refresh_days, "frozen_after_days": frozen_after_days, "daily_ttl": daily_ttl,
+    })
+    if not plan.to_fetch:
+        return _merge_click_details(store, plan, {}, {})
+
+    # Crée un job : jamais relancé (un 5xx après acceptation ferait un job en double) ;
+    # seul le suivi (GET batches/{id}) l'est
+    resp = http_client.post(
+        base_url + "batches", json={"operations": _click_details_operations(plan.to_fetch, count)}, auth=auth,
+        idempotent=False,
+    )
+    resp.raise_for_status()
+    batch_id = resp.json()["id"]
+
+    deadline = time.monotonic() + timeout
+    while True:
+        resp = http_client.get(base_url + f"batches/{batch_id}", auth=auth)
         resp.raise_for_status()
-        campaign_ids = [r["id"] for r in resp.json().get("reports", [])]
-
-    fields_param = "urls_clicked.url,urls_clicked.total_clicks,urls_clicked.unique_clicks,urls_clicked.click_percentage"
-
-    def fetch_one(cid: str, retries: int = 3) -> list[dict]:
-        params = {"count": count, "fields": fields_param}
-        for attempt in range(retries):
-            try:
-                resp = requests.get(
-                    base_url + f"reports/{cid}/click-details",
-                    params=params, auth=auth, timeout=30,
-                )
-                if resp.status_code == 429:
-                    time.sleep(2 ** attempt)  # backoff exponentiel : 1s, 2s, 4s
-                    continue
-                resp.raise_for_status()
-                return [
-                    {
-                        "campaign_id": cid,
-                        "url": u.get("url"),
-                        "total_clicks": u.get("total_clicks"),
-                        "unique_clicks": u.get("unique_clicks"),
-                        "click_percentage": u.get("click_percentage"),
-                    }
-                    for u in resp.json().get("urls_clicked", [])
-                ]
-            except requests.RequestException:
-                return []
-        return []  # échoué après tous les essais
-
-    click_details: list[dict] = []
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        futures = [executor.submit(fetch_one, cid) for cid in campaign_ids]
-        for future in as_completed(futures):
-            click_details.extend(future.result())
-
-    return click_details
\ No newline at end of file
+        batch = resp.json()
+        if batch.get("status") == "finished":
+            break
+        if time.monotonic() >= deadline:
+            raise MailchimpBatchTimeout(f"Mailchimp batch {batch_id} not finished after {timeout}s (status: {batch.get('status')})")
+        time.sleep(poll_interval)
+
+    if not batch.get("response_body_url"):
+        return _merge_click_details(store, plan, {}, {cid: "no batch results" for cid in plan.to_fetch})
+    # URL signée (S3) : pas d'auth Mailchimp
+    with http_client.get(batch["response_body_url"], stream=True) as archive:
+        archive.raise_for_status()
+        first_pages, failed = _parse_batch_click_details(_iter_batch_results(archive.raw), plan.to_fetch)
+
+    remaining = _remaining_click_pages(first_pages, count)
+    pages = _fetch_click_pages(base_url, auth, remaining)
+    fetched = _assemble_click_details(first_pages, remaining, pages, failed)
+    return _merge_click_details(store, plan, fetched, failed)
@@ -1,16 +1,31 @@
-import requests
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from typing import NamedTuple, Optional
+
+from kpi_connectors import http_cache, http_client
 from kpi_connectors.models.vimeo import VimeoQueryParams
+from kpi_connectors.storage.days import contiguous_spans, days_between
+from kpi_connectors.storage.vimeo_store import VimeoAnalyticsStore, owner_for
 
 base_url = "https://api.vimeo.com"
 
-def fetch_vimeo_videos(access_token: str, params: VimeoQueryParams | None = None) -> list[dict]:
-    params = params or VimeoQueryParams()   # défauts si rien n'est fourni
+# Pages de /me/videos demandées en parallèle (sous le limiteur vimeo)
+VIDEOS_PAGE_CONCURRENCY = 4
+
+# Statistiques quotidiennes (/me/analytics) : vidéos demandées en parallèle
+# (sous le limiteur vimeo) et métriques récupérées pour chaque jour
+ANALYTICS_CONCURRENCY = 4
+ANALYTICS_METRICS = ("plays", "impressions")
+ANALYTICS_PAGE_SIZE = 1000
 
-    headers = {
+def _headers(access_token: str) -> dict:
+    return {
         "Authorization": f"Bearer {access_token}",
         "Accept": "application/vnd.vimeo.*+json;version=3.4",
     }
 
+def _videos_query(params: VimeoQueryParams) -> dict:
     # fields reste fixe (alimente des visuels précis) ; le reste vient des params
     query = {
         "fields": "uri,name,duration,created_time,link,stats.plays",
@@ -22,56 +37,232 @@ def fetch_vimeo_videos(access_token: str, params: VimeoQueryParams | None = None
         query["direction"] = params.direction
     if params.query:
         query["query"] = params.query
+    return query
+
+def _parse_video(v: dict) -> dict:
+    stats = v.get("stats") or {}
+    uri = v.get("uri", "")
+    return {
+        "id": uri.split("/")[-1],
+        "name": v.get("name"),
+        "duration": v.get("duration"),
+        "created_time": v.get("created_time"),
+        "link": v.get("link"),
+        "plays": stats.get("plays"),
+    }
+
+def _remaining_pages_queries(query: dict, first_page: dict) -> list[dict] | None:
+    """
+    Requêtes des pages 2..N, connues d'avance grâce au total de la première
+    page : mêmes paramètres (donc même tri) avec page=k, ce que contiennent
+    aussi les liens paging.next. None si la réponse n'a pas de total.
+    """
+    total = first_page.get("total")
+    if total is None:
+        return None
+    per_page = first_page.get("per_page") or query["per_page"]
+    return [{**query, "page": page} for page in range(2, math.ceil(total / per_page) + 1)]
 
+def _merge_video_pages(pages: list[dict]) -> list[dict]:
+    """Vidéos des pages dans l'ordre ; une vidéo décalée d'une page à l'autre (ajout pendant la lecture) n'apparaît qu'une fois."""
+    seen: set[str] = set()
     videos: list[dict] = []
+    for page in pages:
+        for v in page.get("data", []):
+            if v.get("uri") in seen:
+                continue
+            seen.add(v.get("uri"))
+            videos.append(_parse_video(v))
+    return videos
+
+def _parse_follower_count(data: dict) -> dict:
+    followers = (
+        data.get("metadata", {})
+        .get("connections", {})
+        .get("followers", {})
+        .get("total", 0)
+    )
+
+    return {
+        "follower_count": followers,
+    }
+
+def fetch_vimeo_videos(access_token: str, params: VimeoQueryParams | None = None) -> list[dict]:
+    """
+    Toutes les vidéos de /me/videos : la première page donne le total, les
+    pages suivantes sont demandées en parallèle (VIDEOS_PAGE_CONCURRENCY)
+    et fusionnées dans l'ordre des pages. Sans total, les liens paging.next
+    sont suivis un par un.
+    """
+    params = params or VimeoQueryParams()   # défauts si rien n'est fourni
+
+    headers = _headers(access_token)
+    query = _videos_query(params)
     url = base_url + "/me/videos"
 
-    while url:
-        response = requests.get(url, headers=headers, params=query, timeout=30)
-        response.raise_for_status()
-        data = response.json()
-
-        for v in data.get("data", []):
-            stats = v.get("stats") or {}
-            uri = v.get("uri", "")
-            videos.append({
-                "id": uri.split("/")[-1],
-                "name": v.get("name"),
-                "duration": v.get("duration"),
-                "created_time": v.get("created_time"),
-                "link": v.get("link"),
-                "plays": stats.get("plays"),
-            })
-
-        next_path = (data.get("paging") or {}).get("next")
-        url = (base_url + next_path) if next_path else None
-        query = None   # déjà encodé dans next_path
+    def fetch_page(page_url: str, page_query: dict | None) -> dict:
+        # GET conditionnel : une page inchangée depuis le dernier appel revient en 304
+        return http_cache.get_json(page_url, headers=headers, params=page_query)
 
-    return videos
+    pages = [fetch_page(url, query)]
+    remaining = _remaining_pages_queries(query, pages[0])
+
+    if remaining is not None:
+        with ThreadPoolExecutor(max_workers=VIDEOS_PAGE_CONCURRENCY) as executor:
+            pages.extend(executor.map(lambda page_query: fetch_page(url, page_query), remaining))
+    else:
+        next_path = (pages[0].get("paging") or {}).get("next")
+        while next_path:
+            pages.append(fetch_page(base_url + next_path, None))   # query déjà encodée dans next_path
+            next_path = (pages[-1].get("paging") or {}).get("next")
+
+    return _merge_video_pages(pages)
 
 def fetch_vimeo_follower_count(access_token: str) -> dict:
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/vnd.vimeo.*+json;version=3.4",
-    }
     params = {"fields": "uri,name,metadata.connections.followers.total"}
 
-    response = requests.get(
+    return http_cache.get_json(
         f"{base_url}/me",
-        headers=headers,
+        parse=_parse_follower_count,
+        headers=_headers(access_token),
         params=params,
-        timeout=30,
     )
-    response.raise_for_status()
-    data = response.json()
 
-    followers = (
-        data.get("metadata", {})
-        .get("connections", {})
-        .get("followers", {})
-        .get("total", 0)
-    )
+def fetch_vimeo_video_analytics(
+    access_token: str,
+    start_date: date,
+    end_date: date,
+    video_ids: Optional[list[str]] = None,
+    store: Optional[VimeoAnalyticsStore] = None,
+    volatile_days: int = 3,
+    max_workers: int = ANALYTICS_CONCURRENCY,
+) -> dict:
+    """
+    Plays et impressions quotidiens de chaque vidéo entre start_date et
+    end_date inclus (une ligne par vidéo et par jour ayant des données).
+    video_ids : toutes les vidéos de /me/videos si omis.
+
+    Une requête /me/analytics (time_interval=day) par vidéo et par plage de
+    jours manquants, max_workers en parallèle. Avec un store, les jours
+    définitifs déjà en cache ne sont pas redemandés : seuls les jours
+    manquants et les volatile_days derniers jours (UTC, encore consolidés
+    par Vimeo) le sont.
+    """
+    if start_date > end_date:
+        raise ValueError("start_date must be before end_date")
+    if video_ids is None:
+        video_ids = [v["id"] for v in fetch_vimeo_videos(access_token)]
+
+    plan = _plan_video_analytics(store, owner_for(access_token), video_ids, start_date, end_date, volatile_days)
+    headers = _headers(access_token)
+
+    def fetch_span(video_id: str, first: date, last: date) -> dict[date, Optional[dict]]:
+        pages = []
+        url, query = base_url + "/me/analytics", _analytics_query(video_id, first, last)
+        while url:
+            response = http_client.get(url, headers=headers, params=query)
+            response.raise_for_status()
+            pages.append(response.json())
+            next_path = (pages[-1].get("paging") or {}).get("next")
+            url, query = (base_url + next_path, None) if next_path else (None, None)   # query déjà encodée dans next_path
+        return _analytics_by_day(pages, first, last)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(lambda r: fetch_span(*r), plan.requests))
 
+    return _merge_video_analytics(store, plan, _group_by_video(plan.requests, results))
+
+class _AnalyticsPlan(NamedTuple):
+    owner: str
+    video_ids: list[str]
+    days: list[date]
+    volatile_from: date
+    cached: dict[str, dict[date, Optional[dict]]]
+    # (vidéo, premier jour, dernier jour inclus) de chaque requête à faire
+    requests: list[tuple[str, date, date]]
+
+def _plan_video_analytics(
+    store: Optional[VimeoAnalyticsStore],
+    owner: str,
+    video_ids: list[str],
+    start_date: date,
+    end_date: date,
+    volatile_days: int,
+) -> _AnalyticsPlan:
+    """Lit le store et calcule, vidéo par vidéo, les plages de jours à redemander."""
+    video_ids = list(dict.fromkeys(video_ids))
+    days = days_between(start_date, end_date)
+    volatile_from = datetime.now(timezone.utc).date() - timedelta(days=volatile_days - 1)
+
+    cached = store.get_days(owner, video_ids, [d for d in days if d < volatile_from]) if store else {}
+    requests = []
+    for video_id in video_ids:
+        missing = [d for d in days if d not in cached.get(video_id, {})]
+        requests.extend((video_id, first, last) for first, last in contiguous_spans(missing))
+    return _AnalyticsPlan(owner, video_ids, days, volatile_from, cached, requests)
+
+def _analytics_query(video_id: str, first: date, last: date) -> dict:
+    # end_date envoyé au lendemain du dernier jour : les lignes hors plage sont ignorées par _analytics_by_day
     return {
-        "follower_count": followers,
-    }
\ No newline at end of file
+        "dimension": "total",
+        "filter_content": video_id,
+        "time_interval": "day",
+        "start_date": first.isoformat(),
+        "end_date": (last + timedelta(days=1)).isoformat(),
+        "metrics": ",".join(ANALYTICS_METRICS),
+        "per_page": ANALYTICS_PAGE_SIZE,
+    }
+
+def _analytics_by_day(pages: list[dict], first: date, last: date) -> dict[date, Optional[dict]]:
+    """{jour: métriques} pour chaque jour de [first, last] ; None si Vimeo n'a rien renvoyé."""
+    by_day: dict[date, Optional[dict]] = {d: None for d in days_between(first, last)}
+    for page in pages:
+        for row in page.get("data", []):
+            try:
+                day = date.fromisoformat((row.get("start_date") or "")[:10])
+            except ValueError:
+                continue
+            if day in by_day:
+                by_day[day] = {metric: row.get(metric) for metric in ANALYTICS_METRICS}
+    return by_day
+
+def _group_by_video(
+    requests: list[tuple[str, date, date]],
+    results: list[dict[date, Optional[dict]]],
+) -> dict[str, dict[date, Optional[dict]]]:
+    fetched: dict[str, dict[date, Optional[dict]]] = {}
+    for (video_id, _, _), by_day in zip(requests, results):
+        fetched.setdefault(video_id, {}).update(by_day)
+    return fetched
+
+def _merge_video_analytics(
+    store: Optional[VimeoAnalyticsStore],
+    plan: _AnalyticsPlan,
+    fetched: dict[str, dict[date, Optional[dict]]],
+) -> dict:
+    """Enregistre les jours définitifs récupérés et fusionne avec le cache, par vidéo puis par jour."""
+    if store is not None:
+        store.put_days(plan.owner, {
+            video_id: {d: s for d, s in by_day.items() if d < plan.volatile_from}
+            for video_id, by_day in fetched.items()
+        })
+
+    rows = []
+    for video_id in plan.video_ids:
+        merged = {**plan.cached.get(video_id, {}), **fetched.get(video_id, {})}
+        rows.extend(
+            {"video_id": video_id, "date": d.isoformat(), **merged[d]}
+            for d in plan.days if merged.get(d) is not None
+        )
+
+    cached_days = sum(len(by_day) for by_day in plan.cached.values())
+    return {
+        "start_date": plan.days[0].isoformat(),
+        "end_date": plan.days[-1].isoformat(),
+        "total_rows": len(rows),
+        "rows": rows,
+        "cache": {
+            "cached_days": cached_days,
+            "fetched_days": len(plan.video_ids) * len(plan.days) - cached_days,
+        },
+    }
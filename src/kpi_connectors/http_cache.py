@@ -0,0 +1,224 @@
+import asyncio
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple
+
+from kpi_connectors import http_client
+from kpi_connectors.storage.http_cache_store import CachedResponse, HTTPCacheStore
+
+"""
+Cache HTTP conditionnel partagé par les connecteurs, pour les ressources qui
+changent rarement d'un rafraîchissement à l'autre (Vimeo /me et /me/videos,
+Mailchimp /lists, LinkedIn networkSizes...).
+
+get_json / aget_json gardent les validateurs (ETag, Last-Modified) et le
+résultat décodé de chaque réponse, et les renvoient en If-None-Match /
+If-Modified-Since : sur un 304, le résultat en cache est réutilisé sans
+retélécharger ni redécoder le corps. Les réponses sans validateur ne sont
+pas mises en cache.
+
+Deux niveaux : un LRU en mémoire borné en octets (taille des corps d'origine)
+et, si un chemin est configuré, un fichier SQLite (HTTPCacheStore) qui
+survit aux redémarrages. Les entrées sont indexées par propriétaire (hash des
+credentials) : une réponse n'est jamais servie à d'autres credentials.
+"""
+
+# En-têtes qui ne distinguent pas deux ressources (auth : voir owner ; conditionnels : ajoutés ici)
+_KEY_IGNORED_HEADERS = {"authorization", "if-none-match", "if-modified-since"}
+
+
+class ConditionalCache:
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        store: Optional[HTTPCacheStore] = None,
+    ):
+        """
+        - max_bytes : taille max du niveau mémoire (somme des corps d'origine) ;
+          au-delà, les entrées les moins récemment utilisées en sortent.
+        - store : niveau disque optionnel.
+        """
+        self.max_bytes = max_bytes
+        self.store = store
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(
+        url: str,
+        params: Any = None,
+        headers: Optional[Mapping[str, str]] = None,
+        owner: str = "",
+        parse: Optional[Callable] = None,
+    ) -> str:
+        raw = json.dumps({
+            "owner": owner,
+            "url": url,
+            "params": sorted((str(k), str(v)) for k, v in dict(params or {}).items()),
+            "headers": sorted(
+                (k.lower(), str(v)) for k, v in (headers or {}).items() if k.lower() not in _KEY_IGNORED_HEADERS
+            ),
+            "parse": f"{parse.__module__}.{parse.__qualname__}" if parse else None,
+        }).encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    @staticmethod
+    def owner_for(headers: Optional[Mapping[str, str]], auth: Any) -> str:
+        """Propriétaire par défaut : hash de l'en-tête Authorization et de l'auth basique."""
+        authorization = next((v for k, v in (headers or {}).items() if k.lower() == "authorization"), "")
+        raw = json.dumps([authorization, list(auth) if auth else None]).encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.store is None:
+            return None
+        entry = self.store.get(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        self._remember(key, entry)
+        if self.store is not None:
+            self.store.put(key, entry)
+
+    def touch(self, key: str) -> None:
+        """Entrée confirmée par un 304 : remonte en tête des deux LRU."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        if self.store is not None:
+            self.store.touch(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+        if self.store is not None:
+            self.store.clear()
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+
+def _prepare(
+    url: str,
+    kwargs: Dict[str, Any],
+    owner: Optional[str],
+    parse: Optional[Callable],
+) -> Tuple[str, Optional[CachedResponse], Dict[str, Any]]:
+    """Clé, entrée en cache et kwargs de la requête (avec en-têtes conditionnels)."""
+    headers = dict(kwargs.pop("headers", None) or {})
+    if owner is None:
+        owner = ConditionalCache.owner_for(headers, kwargs.get("auth"))
+    key = ConditionalCache.key_for(url, kwargs.get("params"), headers, owner, parse)
+    entry = _cache.get(key) if _cache is not None else None
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+    return key, entry, {**kwargs, "headers": headers}
+
+
+def _store(cache: ConditionalCache, key: str, response_headers: Mapping[str, str], value: Any, size: int) -> None:
+    etag, last_modified = response_headers.get("ETag"), response_headers.get("Last-Modified")
+    if etag or last_modified:
+        # Copie : l'appelant peut modifier le résultat qu'il reçoit
+        cache.put(key, CachedResponse(etag, last_modified, copy.deepcopy(value), size))
+
+
+def get_json(url: str, parse: Optional[Callable[[Any], Any]] = None, owner: Optional[str] = None, **kwargs) -> Any:
+    """
+    GET conditionnel : parse(corps JSON décodé) (ou le JSON lui-même),
+    réutilisé depuis le cache sur un 304. owner : propriétaire des entrées
+    (ex. OAuthService.cache_key quand le token change à chaque refresh) ;
+    par défaut, hash de l'en-tête Authorization / de l'auth. Lève
+    HTTPError comme raise_for_status.
+    """
+    cache = _cache
+    key, entry, kwargs = _prepare(url, kwargs, owner, parse)
+    response = http_client.get(url, **kwargs)
+    if response.status_code == 304 and entry is not None:
+        cache.touch(key)
+        return copy.deepcopy(entry.value)
+    response.raise_for_status()
+
+    value = parse(response.json()) if parse else response.json()
+    if cache is not None:
+        _store(cache, key, response.headers, value, len(response.content))
+    return value
+
+
+async def aget_json(url: str, parse: Optional[Callable[[Any], Any]] = None, owner: Optional[str] = None, **kwargs) -> Any:
+    """
+    Variante async de get_json (même cache). Avec le niveau disque, les
+    accès au store SQLite se font dans un thread (pas sur la boucle).
+    """
+    cache = _cache
+
+    async def run(fn: Callable, *args) -> Any:
+        if cache is not None and cache.store is not None:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    key, entry, kwargs = await run(_prepare, url, kwargs, owner, parse)
+    response = await http_client.aget(url, **kwargs)
+    if response.status_code == 304 and entry is not None:
+        await run(cache.touch, key)
+        return copy.deepcopy(entry.value)
+    response.raise_for_status()
+
+    value = parse(response.json()) if parse else response.json()
+    if cache is not None:
+        await run(_store, cache, key, response.headers, value, len(response.content))
+    return value
+
+
+_cache: Optional[ConditionalCache] = ConditionalCache()
+
+
+def get_http_cache() -> Optional[ConditionalCache]:
+    return _cache
+
+
+def configure_http_cache(
+    enabled: bool = True,
+    max_bytes: int = 64 * 1024 * 1024,
+    path: Optional[str | Path] = None,
+    disk_max_bytes: Optional[int] = None,
+) -> Optional[ConditionalCache]:
+    """Remplace le cache global (None si enabled est faux) ; path active le niveau disque."""
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    if not enabled:
+        _cache = None
+        return None
+    store = HTTPCacheStore(path, max_bytes=disk_max_bytes) if path else None
+    _cache = ConditionalCache(max_bytes=max_bytes, store=store)
+    return _cache
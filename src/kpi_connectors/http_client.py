@@ -0,0 +1,252 @@
+import asyncio
+import threading
+import weakref
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from pydantic import BaseModel, Field
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from kpi_connectors import rate_limit
+
+"""
+Registre de sessions HTTP partagées par les connecteurs.
+
+Une requests.Session (avec son pool de connexions keep-alive) est créée par
+hôte amont et réutilisée d'un appel à l'autre, ce qui évite de refaire la
+poignée de main TCP+TLS à chaque page ou à chaque lot.
+
+Les connecteurs async (kpi_connectors.connectors.aio) utilisent de la même
+façon un httpx.AsyncClient par hôte et par boucle d'événements.
+
+Toutes les requêtes vers une API connue passent par son limiteur de débit
+(voir kpi_connectors.rate_limit).
+
+Les erreurs 5xx (retry_statuses) ne sont relancées que pour les requêtes
+idempotentes : GET, ou POST marqué idempotent=True par l'appelant (lectures
+comme GA4 runReport ou le refresh de token OAuth). Un POST qui crée quelque
+chose côté amont (job Mailchimp /batches) n'est jamais relancé.
+"""
+
+# Méthodes relancées sans que l'appelant ait à le préciser
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def _is_idempotent(method: str, idempotent: Optional[bool]) -> bool:
+    return method.upper() in IDEMPOTENT_METHODS if idempotent is None else idempotent
+
+
+class HTTPClientConfig(BaseModel):
+    pool_size: int = 10                 # connexions keep-alive max par hôte
+    timeout: float = 30.0               # timeout par défaut (secondes)
+    max_retries: int = 2                # 0 = aucune relance
+    backoff_factor: float = 0.5         # 0.5s, 1s, 2s...
+    retry_statuses: List[int] = Field(default_factory=lambda: [502, 503, 504])
+
+
+class ClientRegistry:
+    def __init__(self, config: Optional[HTTPClientConfig] = None):
+        self.config = config or HTTPClientConfig()
+        self._sessions: Dict[Tuple[str, bool], requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def session_for(self, url: str, retry_post: bool = False) -> requests.Session:
+        """
+        Session dédiée à l'hôte (scheme + netloc) de url. retry_post : session
+        dont les POST sont relancés sur 5xx (requêtes marquées idempotentes).
+        """
+        parts = urlsplit(url)
+        key = (f"{parts.scheme}://{parts.netloc}", retry_post)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = self._build_session(retry_post)
+            return session
+
+    def request(self, method: str, url: str, idempotent: Optional[bool] = None, **kwargs) -> requests.Response:
+        """
+        Passe par le limiteur de l'API amont (kpi_connectors.rate_limit) ; une
+        réponse 429 est relancée après le Retry-After, au plus
+        max_throttle_retries fois (la dernière réponse est alors retournée).
+        idempotent : relancer aussi les 5xx d'un POST (par défaut : GET seulement).
+        """
+        kwargs.setdefault("timeout", self.config.timeout)
+        session = self.session_for(url, retry_post=method.upper() == "POST" and _is_idempotent(method, idempotent))
+        limiter = rate_limit.limiter_for(url)
+        if limiter is None:
+            return session.request(method, url, **kwargs)
+
+        for attempt in range(limiter.config.max_throttle_retries + 1):
+            limiter.acquire()
+            try:
+                response = session.request(method, url, **kwargs)
+            except BaseException:
+                limiter.release()
+                raise
+            throttled, retry_after = rate_limit.throttle_signal(response.status_code, response.headers)
+            limiter.release(throttled=throttled, retry_after=retry_after)
+            if not throttled or attempt == limiter.config.max_throttle_retries:
+                return response
+            response.close()
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+    def _build_session(self, retry_post: bool = False) -> requests.Session:
+        retry = Retry(
+            total=self.config.max_retries,
+            backoff_factor=self.config.backoff_factor,
+            status_forcelist=self.config.retry_statuses,
+            # Les POST ne sont relancés que dans les sessions des requêtes
+            # marquées idempotentes (voir request)
+            allowed_methods=IDEMPOTENT_METHODS | ({"POST"} if retry_post else set()),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.config.pool_size,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+
+class AsyncClientRegistry:
+    def __init__(self, config: Optional[HTTPClientConfig] = None):
+        self.config = config or HTTPClientConfig()
+        # Un client httpx est lié à la boucle qui l'a créé
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, httpx.AsyncClient]]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        clients = self._clients.setdefault(asyncio.get_running_loop(), {})
+        client = clients.get(host)
+        if client is None:
+            client = clients[host] = self._build_client()
+        return client
+
+    async def request(self, method: str, url: str, idempotent: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """
+        Même politique que ClientRegistry : limiteur de l'API amont et relance
+        des 429 après Retry-After, relance des statuts retry_statuses avec
+        backoff pour les requêtes idempotentes.
+        """
+        kwargs.setdefault("timeout", self.config.timeout)
+        client = self.client_for(url)
+        limiter = rate_limit.limiter_for(url)
+        max_throttles = limiter.config.max_throttle_retries if limiter else 0
+        max_retries = self.config.max_retries if _is_idempotent(method, idempotent) else 0
+        attempt = throttles = 0
+        while True:
+            response = await self._send(client, limiter, method, url, **kwargs)
+            throttled, _ = rate_limit.throttle_signal(response.status_code, response.headers)
+            if limiter is not None and throttled and throttles < max_throttles:
+                throttles += 1   # l'attente du Retry-After est faite par le limiteur
+            elif response.status_code in self.config.retry_statuses and attempt < max_retries:
+                await asyncio.sleep(self.config.backoff_factor * (2 ** attempt))
+                attempt += 1
+            else:
+                return response
+            await response.aclose()
+
+    @staticmethod
+    async def _send(client: httpx.AsyncClient, limiter, method: str, url: str, **kwargs) -> httpx.Response:
+        if limiter is None:
+            return await client.request(method, url, **kwargs)
+        await limiter.aacquire()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except BaseException:
+            limiter.release()
+            raise
+        throttled, retry_after = rate_limit.throttle_signal(response.status_code, response.headers)
+        limiter.release(throttled=throttled, retry_after=retry_after)
+        return response
+
+    async def download(self, url: str, fileobj: BinaryIO, **kwargs) -> None:
+        """Écrit le corps de la réponse dans fileobj au fil de l'eau (gros fichiers, archives)."""
+        kwargs.setdefault("timeout", self.config.timeout)
+        async with self.client_for(url).stream("GET", url, **kwargs) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                fileobj.write(chunk)
+
+    async def aclose(self) -> None:
+        """Ferme les clients de la boucle courante."""
+        clients = self._clients.pop(asyncio.get_running_loop(), {})
+        for client in clients.values():
+            await client.aclose()
+
+    def _build_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=self.config.pool_size,
+            max_keepalive_connections=self.config.pool_size,
+        )
+        # retries du transport : erreurs de connexion uniquement
+        transport = httpx.AsyncHTTPTransport(limits=limits, retries=self.config.max_retries)
+        return httpx.AsyncClient(transport=transport, timeout=self.config.timeout)
+
+
+_registry = ClientRegistry()
+_async_registry = AsyncClientRegistry()
+
+
+def get_registry() -> ClientRegistry:
+    return _registry
+
+
+def get_async_registry() -> AsyncClientRegistry:
+    return _async_registry
+
+
+def configure_http_clients(config: Optional[HTTPClientConfig] = None) -> ClientRegistry:
+    """
+    Remplace les registres globaux (sync et async) ; les sessions du
+    registre sync précédent sont fermées.
+    """
+    global _registry, _async_registry
+    old, _registry = _registry, ClientRegistry(config)
+    _async_registry = AsyncClientRegistry(config)
+    old.close()
+    return _registry
+
+
+def close_http_clients() -> None:
+    _registry.close()
+
+
+async def aclose_http_clients() -> None:
+    await _async_registry.aclose()
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return _registry.request("GET", url, **kwargs)
+
+
+def post(url: str, idempotent: bool = False, **kwargs) -> requests.Response:
+    return _registry.request("POST", url, idempotent=idempotent, **kwargs)
+
+
+async def aget(url: str, **kwargs) -> httpx.Response:
+    return await _async_registry.request("GET", url, **kwargs)
+
+
+async def apost(url: str, idempotent: bool = False, **kwargs) -> httpx.Response:
+    return await _async_registry.request("POST", url, idempotent=idempotent, **kwargs)
+
+
+async def adownload(url: str, fileobj: BinaryIO, **kwargs) -> None:
+    await _async_registry.download(url, fileobj, **kwargs)
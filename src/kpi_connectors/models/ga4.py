@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import date
 
 class GA4QueryParams(BaseModel):
@@ -9,4 +9,9 @@ class GA4QueryParams(BaseModel):
     metrics: List[str] = Field(default_factory=lambda: ["activeUsers"])
     dimensions: Optional[List[str]] = None
     limit: int = 1000
-    event_name: Optional[str] = None
\ No newline at end of file
+    event_name: Optional[str] = None
+
+
+class GA4BatchQueryParams(BaseModel):
+    # {nom du rapport choisi par l'appelant: paramètres du rapport}
+    reports: Dict[str, GA4QueryParams]
@@ -1,5 +1,5 @@
 from typing import List
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class MailchimpAudience(BaseModel):
@@ -37,9 +37,11 @@ class MailchimpCampaignSummaryResponse(BaseModel):
 
 class MailchimpCampaignParams(BaseModel):
     status: str | None = "sent"
-    count: int = 1000
+    count: int | None = None              # nombre max de campagnes (None = toutes)
     since_send_time: str | None = None    # ex "2025-01-01T00:00:00+00:00"
     before_send_time: str | None = None
+    # Découpe [since_send_time, before_send_time] en N fenêtres lues en parallèle
+    partitions: int = Field(1, ge=1)
 
 
 class MailchimpClickDetail(BaseModel):
@@ -47,4 +49,17 @@ class MailchimpClickDetail(BaseModel):
     url: str
     total_clicks: int
     unique_clicks: int
-    click_percentage: float | None = None
\ No newline at end of file
+    click_percentage: float | None = None
+
+
+class MailchimpFailedCampaign(BaseModel):
+    campaign_id: str
+    error: str
+
+
+class MailchimpClickDetailsResponse(BaseModel):
+    total_click_details: int
+    click_details: List[MailchimpClickDetail]
+    # Campagnes en échec (absentes de click_details), à relancer via campaign_ids
+    failed_campaigns: List[MailchimpFailedCampaign] = []
+    cached_campaigns: int = 0
@@ -23,4 +23,21 @@ class VimeoQueryParams(BaseModel):
     query: Optional[str] = None       # recherche sur le nom
 
 class VimeoFollowerCountResponse(BaseModel):
-    follower_count: int
\ No newline at end of file
+    follower_count: int
+
+class VimeoVideoDay(BaseModel):
+    video_id: str
+    date: str
+    plays: int | None = None
+    impressions: int | None = None
+
+class VimeoAnalyticsCache(BaseModel):
+    cached_days: int
+    fetched_days: int
+
+class VimeoVideoAnalyticsResponse(BaseModel):
+    start_date: str
+    end_date: str
+    total_rows: int
+    rows: List[VimeoVideoDay]
+    cache: VimeoAnalyticsCache
@@ -0,0 +1,238 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+from pydantic import BaseModel
+
+"""
+Limiteurs de débit partagés par tout le processus, un par API amont.
+
+Chaque limiteur combine :
+- un token bucket (rate requêtes/s en régime établi, burst jetons d'avance) ;
+- un plafond de requêtes simultanées piloté en AIMD : +1 par "fenêtre" de
+  réponses réussies, divisé par deux (decrease_factor) à chaque limitation
+  (429, ou 503 avec Retry-After) ;
+- une pause commune à tous les appelants jusqu'à la fin du Retry-After.
+
+Les requêtes de tous les appels HTTP en cours (threads et boucles asyncio)
+passent par le même limiteur : le débit cumulé reste sous le quota de l'API
+au lieu de le dépasser puis d'échouer. http_client s'en sert pour chaque
+requête ; les appels faits par un SDK (Facebook) passent par slot().
+"""
+
+
+class RateLimit(BaseModel):
+    rate: float = 10.0                # requêtes/s en régime établi
+    burst: int = 10                   # jetons accumulables (rafale initiale)
+    max_concurrency: int = 10         # plafond de requêtes simultanées
+    min_concurrency: int = 1
+    decrease_factor: float = 0.5      # plafond x0.5 à chaque limitation
+    default_retry_after: float = 1.0  # pause si la réponse n'a pas de Retry-After
+    max_throttle_retries: int = 3     # relances d'une requête limitée (429)
+
+
+# Suffixe d'hôte -> (nom de l'API, quota par défaut). Valeurs volontairement
+# prudentes, ajustables par configure_rate_limits (ex. selon le plan Vimeo).
+DEFAULT_RATE_LIMITS: Dict[str, Tuple[str, RateLimit]] = {
+    "analyticsdata.googleapis.com": ("ga4", RateLimit(rate=10, burst=10, max_concurrency=10)),
+    "api.linkedin.com": ("linkedin", RateLimit(rate=5, burst=10, max_concurrency=8)),
+    # Mailchimp refuse plus de 10 connexions simultanées
+    ".api.mailchimp.com": ("mailchimp", RateLimit(rate=10, burst=10, max_concurrency=10)),
+    "api.vimeo.com": ("vimeo", RateLimit(rate=4, burst=8, max_concurrency=4)),
+    "graph.facebook.com": ("facebook", RateLimit(rate=5, burst=10, max_concurrency=10)),
+}
+
+# Délai entre deux vérifications quand on attend une place libre
+_SLOT_POLL_INTERVAL = 0.05
+
+
+class AdaptiveLimiter:
+    def __init__(self, config: Optional[RateLimit] = None):
+        self.config = config or RateLimit()
+        self._cond = threading.Condition()
+        self._tokens = float(self.config.burst)
+        self._refilled_at = time.monotonic()
+        self._concurrency = float(self.config.max_concurrency)
+        self._in_flight = 0
+        self._blocked_until = 0.0
+
+    @property
+    def concurrency(self) -> int:
+        """Plafond courant de requêtes simultanées."""
+        return int(self._concurrency)
+
+    def acquire(self) -> None:
+        """Bloque jusqu'à obtenir un jeton et une place (à libérer par release)."""
+        with self._cond:
+            while True:
+                wait = self._try_acquire(time.monotonic())
+                if wait <= 0:
+                    return
+                self._cond.wait(timeout=wait)
+
+    async def aacquire(self) -> None:
+        """Variante async de acquire (n'occupe pas la boucle pendant l'attente)."""
+        while True:
+            with self._cond:
+                wait = self._try_acquire(time.monotonic())
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def release(self, throttled: bool = False, retry_after: Optional[float] = None) -> None:
+        """
+        Libère la place prise par acquire. throttled : l'API a limité la
+        requête (le plafond baisse et tout le monde attend retry_after).
+        """
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                # Une seule baisse par épisode : les 429 d'une même rafale ne comptent qu'une fois
+                if now >= self._blocked_until:
+                    self._concurrency = max(
+                        float(self.config.min_concurrency),
+                        self._concurrency * self.config.decrease_factor,
+                    )
+                self._blocked_until = max(
+                    self._blocked_until,
+                    now + (retry_after if retry_after is not None else self.config.default_retry_after),
+                )
+                self._tokens = 0.0
+            else:
+                self._concurrency = min(
+                    float(self.config.max_concurrency),
+                    self._concurrency + 1 / self._concurrency,
+                )
+            self._cond.notify_all()
+
+    def _try_acquire(self, now: float) -> float:
+        """Prend un jeton et une place si possible (retourne 0), sinon le délai à attendre. Sous self._cond."""
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self._in_flight >= int(self._concurrency):
+            return _SLOT_POLL_INTERVAL  # en sync, release() réveille plus tôt
+
+        self._tokens = min(float(self.config.burst), self._tokens + (now - self._refilled_at) * self.config.rate)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.config.rate
+
+        self._tokens -= 1
+        self._in_flight += 1
+        return 0.0
+
+
+class LimiterRegistry:
+    def __init__(self, limits: Optional[Mapping[str, RateLimit]] = None, enabled: bool = True):
+        """
+        - limits : quotas par nom d'API ("ga4", "linkedin", "mailchimp",
+          "vimeo", "facebook") ; les API absentes gardent DEFAULT_RATE_LIMITS.
+        - enabled : False = aucun limiteur (limiter_for retourne None).
+        """
+        self.enabled = enabled
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._suffixes: Dict[str, str] = {}
+        for suffix, (name, default) in DEFAULT_RATE_LIMITS.items():
+            self._suffixes[suffix] = name
+            self._limiters[name] = AdaptiveLimiter((limits or {}).get(name, default))
+
+    def limiter_for(self, url: str) -> Optional[AdaptiveLimiter]:
+        """Limiteur de l'API amont de url, None si l'hôte n'est pas une API connue."""
+        if not self.enabled:
+            return None
+        host = urlsplit(url).hostname or ""
+        for suffix, name in self._suffixes.items():
+            domain = suffix.lstrip(".")
+            if host == domain or host.endswith("." + domain):
+                return self._limiters[name]
+        return None
+
+    def get(self, name: str) -> Optional[AdaptiveLimiter]:
+        return self._limiters.get(name) if self.enabled else None
+
+
+def retry_after_seconds(headers: Mapping[str, str]) -> Optional[float]:
+    """Retry-After (secondes ou date HTTP) en secondes, None s'il est absent ou illisible."""
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def throttle_signal(status_code: int, headers: Mapping[str, str]) -> Tuple[bool, Optional[float]]:
+    """(l'API a-t-elle limité la requête, délai Retry-After) pour une réponse HTTP."""
+    retry_after = retry_after_seconds(headers)
+    if status_code == 429 or (status_code == 503 and retry_after is not None):
+        return True, retry_after
+    return False, None
+
+
+class _Slot:
+    def __init__(self):
+        self.throttled_for: Optional[float] = None
+        self.was_throttled = False
+
+    def throttled(self, retry_after: Optional[float] = None) -> None:
+        """À appeler quand l'API a refusé l'appel pour dépassement de quota."""
+        self.was_throttled = True
+        self.throttled_for = retry_after
+
+
+@contextmanager
+def slot(url: str) -> Iterator[_Slot]:
+    """
+    Place dans le limiteur de l'API de url, pour les appels qui ne passent
+    pas par http_client (SDK). Signaler une limitation avec slot.throttled().
+    """
+    current = _Slot()
+    limiter = _registry.limiter_for(url)
+    if limiter is None:
+        yield current
+        return
+    limiter.acquire()
+    try:
+        yield current
+    finally:
+        limiter.release(throttled=current.was_throttled, retry_after=current.throttled_for)
+
+
+_registry = LimiterRegistry()
+
+
+def get_limiter_registry() -> LimiterRegistry:
+    return _registry
+
+
+def limiter_for(url: str) -> Optional[AdaptiveLimiter]:
+    return _registry.limiter_for(url)
+
+
+def configure_rate_limits(limits: Optional[Mapping[str, Mapping]] = None, enabled: bool = True) -> LimiterRegistry:
+    """
+    Remplace les limiteurs globaux. limits : {nom d'API: champs de RateLimit},
+    ex. {"vimeo": {"rate": 2, "max_concurrency": 2}} ; les champs absents
+    gardent les valeurs par défaut de l'API.
+    """
+    global _registry
+    resolved: Dict[str, RateLimit] = {}
+    for name, default in DEFAULT_RATE_LIMITS.values():
+        if limits and name in limits:
+            resolved[name] = RateLimit(**{**default.model_dump(), **limits[name]})
+    _registry = LimiterRegistry(resolved, enabled=enabled)
+    return _registry
@@ -0,0 +1,22 @@
+from datetime import date, timedelta
+from typing import List, Tuple
+
+"""
+Découpage en jours des caches partitionnés par jour (GA4, LinkedIn).
+"""
+
+
+def days_between(start_date: date, end_date: date) -> List[date]:
+    """Jours de start_date à end_date inclus."""
+    return [start_date + timedelta(days=n) for n in range((end_date - start_date).days + 1)]
+
+
+def contiguous_spans(days: List[date]) -> List[Tuple[date, date]]:
+    """[j1, j2, j3, j7, j8] -> [(j1, j3), (j7, j8)] (days trié)."""
+    spans: List[Tuple[date, date]] = []
+    for day in days:
+        if spans and day - spans[-1][1] == timedelta(days=1):
+            spans[-1] = (spans[-1][0], day)
+        else:
+            spans.append((day, day))
+    return spans
@@ -0,0 +1,155 @@
+import hashlib
+import json
+import time
+import zlib
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from kpi_connectors.models.ga4 import GA4QueryParams
+from kpi_connectors.storage.sqlite import SQLiteStore
+
+"""
+Cache persistant des rapports GA4, partitionné par jour.
+
+Chaque partition contient les lignes brutes GA4 (format runReport) d'un jour
+pour une requête donnée (propriété, métriques, dimensions, filtre) et un
+propriétaire (hash des credentials OAuth : des données en cache ne sont
+jamais servies à d'autres credentials que ceux qui les ont obtenues). Seuls
+les jours définitifs sont stockés : les derniers jours, encore recalculés
+par GA4, sont toujours redemandés (voir GA4Service.volatile_days).
+"""
+
+
+class GA4DayStore(SQLiteStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS ga4_partitions (
+            key TEXT NOT NULL,
+            owner TEXT NOT NULL,
+            property_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            payload BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            last_access REAL NOT NULL,
+            PRIMARY KEY (key, day)
+        );
+        CREATE INDEX IF NOT EXISTS ga4_partitions_last_access ON ga4_partitions (last_access);
+    """
+
+    def __init__(self, path: str | Path, max_bytes: Optional[int] = None):
+        """
+        - max_bytes : taille max (données compressées) ; au-delà, les
+          partitions les moins récemment utilisées sont supprimées.
+        """
+        super().__init__(path)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key_for(params: GA4QueryParams, owner: str) -> str:
+        """Clé d'une requête, indépendante des dates et de la taille de page."""
+        raw = json.dumps({
+            "owner": owner,
+            "property_id": params.property_id,
+            "metrics": params.metrics,
+            "dimensions": params.dimensions or [],
+            "event_name": params.event_name,
+        }, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(raw).hexdigest()
+
+    def get_days(self, key: str, days: Iterable[date]) -> Dict[date, Dict[str, Any]]:
+        """Partitions en cache parmi days : {jour: page GA4 brute}."""
+        by_iso = {d.isoformat(): d for d in days}
+        if not by_iso:
+            return {}
+
+        found: Dict[date, Dict[str, Any]] = {}
+        with self._transaction() as conn:
+            placeholders = ",".join("?" * len(by_iso))
+            rows = conn.execute(
+                f"SELECT day, payload FROM ga4_partitions WHERE key = ? AND day IN ({placeholders})",
+                [key, *by_iso],
+            ).fetchall()
+            conn.execute(
+                f"UPDATE ga4_partitions SET last_access = ? WHERE key = ? AND day IN ({placeholders})",
+                [time.time(), key, *by_iso],
+            )
+        for day, payload in rows:
+            found[by_iso[day]] = json.loads(zlib.decompress(payload))
+        return found
+
+    def put_days(self, key: str, owner: str, property_id: str, pages: Dict[date, Dict[str, Any]]) -> None:
+        if not pages:
+            return
+        now = time.time()
+        records = []
+        for day, page in pages.items():
+            payload = zlib.compress(json.dumps(page, separators=(",", ":")).encode("utf-8"))
+            records.append((key, owner, property_id, day.isoformat(), payload, len(payload), now))
+
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO ga4_partitions "
+                "(key, owner, property_id, day, payload, size, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                records,
+            )
+            self._evict(conn)
+
+    def invalidate(
+        self,
+        property_id: Optional[str] = None,
+        owner: Optional[str] = None,
+        key: Optional[str] = None,
+    ) -> int:
+        """
+        Supprime les partitions correspondant aux filtres donnés (propriété,
+        propriétaire, requête), ou tout le cache si aucun filtre n'est donné.
+        Retourne le nombre de partitions supprimées.
+        """
+        clauses, args = [], []
+        for column, value in (("property_id", property_id), ("owner", owner), ("key", key)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._transaction() as conn:
+            return conn.execute(f"DELETE FROM ga4_partitions{where}", args).rowcount
+
+    def total_size(self) -> int:
+        with self._transaction() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM ga4_partitions").fetchone()[0]
+
+    def _evict(self, conn) -> None:
+        """Supprime les partitions LRU jusqu'à repasser sous max_bytes."""
+        if not self.max_bytes:
+            return
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM ga4_partitions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        to_delete = []
+        for key, day, size in conn.execute(
+            "SELECT key, day, size FROM ga4_partitions ORDER BY last_access ASC"
+        ).fetchall():
+            to_delete.append((key, day))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        conn.executemany("DELETE FROM ga4_partitions WHERE key = ? AND day = ?", to_delete)
+
+
+_default_store: Optional[GA4DayStore] = None
+
+
+def get_ga4_store() -> Optional[GA4DayStore]:
+    """Cache global configuré par configure_ga4_store (None = désactivé)."""
+    return _default_store
+
+
+def configure_ga4_store(path: Optional[str | Path], max_bytes: Optional[int] = None) -> Optional[GA4DayStore]:
+    """Ouvre (ou désactive si path est vide) le cache global."""
+    global _default_store
+    if _default_store is not None:
+        _default_store.close()
+    _default_store = GA4DayStore(path, max_bytes=max_bytes) if path else None
+    return _default_store
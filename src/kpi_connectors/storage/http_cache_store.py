@@ -0,0 +1,87 @@
+import json
+import time
+import zlib
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from kpi_connectors.storage.sqlite import SQLiteStore
+
+"""
+Niveau disque du cache HTTP conditionnel (voir kpi_connectors.http_cache) :
+validateurs (ETag / Last-Modified) et résultat décodé de chaque réponse.
+"""
+
+
+class CachedResponse(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    value: Any
+    size: int     # taille du corps de la réponse d'origine
+
+
+class HTTPCacheStore(SQLiteStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS http_cache (
+            key TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            payload BLOB NOT NULL,
+            body_size INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            last_access REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS http_cache_last_access ON http_cache (last_access);
+    """
+
+    def __init__(self, path: str | Path, max_bytes: Optional[int] = None):
+        """
+        - max_bytes : taille max (données compressées) ; au-delà, les
+          entrées les moins récemment utilisées sont supprimées.
+        """
+        super().__init__(path)
+        self.max_bytes = max_bytes
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT etag, last_modified, payload, body_size FROM http_cache WHERE key = ?", (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE http_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+        etag, last_modified, payload, body_size = row
+        return CachedResponse(etag, last_modified, json.loads(zlib.decompress(payload)), body_size)
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        payload = zlib.compress(json.dumps(entry.value, separators=(",", ":")).encode("utf-8"))
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO http_cache "
+                "(key, etag, last_modified, payload, body_size, size, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, entry.etag, entry.last_modified, payload, entry.size, len(payload), time.time()),
+            )
+            self._evict(conn)
+
+    def touch(self, key: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("UPDATE http_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+
+    def clear(self) -> int:
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM http_cache").rowcount
+
+    def _evict(self, conn) -> None:
+        """Supprime les entrées LRU jusqu'à repasser sous max_bytes."""
+        if not self.max_bytes:
+            return
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM http_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        to_delete = []
+        for key, size in conn.execute("SELECT key, size FROM http_cache ORDER BY last_access ASC").fetchall():
+            to_delete.append((key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+        conn.executemany("DELETE FROM http_cache WHERE key = ?", to_delete)
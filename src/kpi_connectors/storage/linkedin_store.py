@@ -0,0 +1,242 @@
+import json
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from kpi_connectors.storage.sqlite import SQLiteStore
+
+"""
+Cache persistant des posts LinkedIn d'une organisation et de leurs stats,
+et des statistiques quotidiennes de l'organisation (LinkedInShareStatsStore).
+
+Les posts sont indexés par organisation et par propriétaire (hash des
+credentials OAuth, comme pour le cache GA4). Le watermark est le plus grand
+publishedAt connu : une synchro ne pagine /posts que jusqu'à lui. Il n'est
+écrit qu'avec les posts d'une synchro terminée, pour qu'une synchro
+interrompue ne fasse pas sauter une partie de l'historique.
+
+Les stats de chaque post ont leur propre date de mise à jour : les posts
+récents sont rafraîchis souvent, les anciens rarement (voir stale_stats).
+"""
+
+
+class LinkedInPostStore(SQLiteStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS linkedin_posts (
+            owner TEXT NOT NULL,
+            organization_urn TEXT NOT NULL,
+            post_id TEXT NOT NULL,
+            published_at INTEGER,
+            post TEXT NOT NULL,
+            stats TEXT,
+            stats_fetched_at REAL,
+            PRIMARY KEY (owner, organization_urn, post_id)
+        );
+        CREATE INDEX IF NOT EXISTS linkedin_posts_published
+            ON linkedin_posts (owner, organization_urn, published_at);
+        CREATE TABLE IF NOT EXISTS linkedin_sync (
+            owner TEXT NOT NULL,
+            organization_urn TEXT NOT NULL,
+            watermark INTEGER,
+            synced_at REAL NOT NULL,
+            PRIMARY KEY (owner, organization_urn)
+        );
+    """
+
+    def watermark(self, owner: str, organization_urn: str) -> Optional[int]:
+        """publishedAt (epoch ms) du post le plus récent connu, None si jamais synchronisé."""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT watermark FROM linkedin_sync WHERE owner = ? AND organization_urn = ?",
+                (owner, organization_urn),
+            ).fetchone()
+        return row[0] if row else None
+
+    def merge_posts(self, owner: str, organization_urn: str, posts: List[Dict[str, Any]]) -> Optional[int]:
+        """
+        Ajoute ou met à jour posts (format _parse_post) sans toucher à leurs
+        stats, puis avance le watermark. Retourne le nouveau watermark.
+        """
+        records = [
+            (owner, organization_urn, p["id"], p.get("published_at"), json.dumps(p))
+            for p in posts if p.get("id")
+        ]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO linkedin_posts (owner, organization_urn, post_id, published_at, post) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (owner, organization_urn, post_id) DO UPDATE SET "
+                "published_at = excluded.published_at, post = excluded.post",
+                records,
+            )
+            watermark = conn.execute(
+                "SELECT MAX(published_at) FROM linkedin_posts WHERE owner = ? AND organization_urn = ?",
+                (owner, organization_urn),
+            ).fetchone()[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO linkedin_sync (owner, organization_urn, watermark, synced_at) "
+                "VALUES (?, ?, ?, ?)",
+                (owner, organization_urn, watermark, time.time()),
+            )
+        return watermark
+
+    def stale_stats(
+        self,
+        owner: str,
+        organization_urn: str,
+        recent_days: int,
+        recent_ttl: float,
+        old_ttl: float,
+    ) -> List[str]:
+        """
+        Posts dont les stats sont à (re)demander : jamais récupérées, ou plus
+        vieilles que recent_ttl secondes pour un post publié il y a moins de
+        recent_days jours, que old_ttl secondes pour les autres.
+        """
+        now = time.time()
+        recent_since = int((now - recent_days * 86400) * 1000)
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT post_id FROM linkedin_posts "
+                "WHERE owner = ? AND organization_urn = ? AND ("
+                "  stats_fetched_at IS NULL"
+                "  OR (COALESCE(published_at, 0) >= ? AND stats_fetched_at < ?)"
+                "  OR (COALESCE(published_at, 0) < ? AND stats_fetched_at < ?)"
+                ") ORDER BY published_at DESC",
+                (owner, organization_urn, recent_since, now - recent_ttl, recent_since, now - old_ttl),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def put_stats(
+        self,
+        owner: str,
+        organization_urn: str,
+        post_ids: List[str],
+        stats_by_urn: Dict[str, Dict[str, Any]],
+    ) -> None:
+        """
+        Enregistre les stats de post_ids. Un post absent de stats_by_urn
+        (LinkedIn ne renvoie rien pour lui) est quand même marqué à jour,
+        pour ne pas le redemander à chaque synchro.
+        """
+        now = time.time()
+        records = []
+        for post_id in post_ids:
+            stats = stats_by_urn.get(post_id)
+            records.append((json.dumps(stats) if stats else None, now, owner, organization_urn, post_id))
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE linkedin_posts SET stats = ?, stats_fetched_at = ? "
+                "WHERE owner = ? AND organization_urn = ? AND post_id = ?",
+                records,
+            )
+
+    def posts(self, owner: str, organization_urn: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Posts connus, du plus récent au plus ancien, avec leurs stats sous "stats"."""
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT post, stats FROM linkedin_posts WHERE owner = ? AND organization_urn = ? "
+                "ORDER BY published_at DESC, post_id LIMIT ?",
+                (owner, organization_urn, -1 if limit is None else limit),
+            ).fetchall()
+        posts = []
+        for post, stats in rows:
+            item = json.loads(post)
+            item["stats"] = json.loads(stats) if stats else None
+            posts.append(item)
+        return posts
+
+    def invalidate(self, owner: Optional[str] = None, organization_urn: Optional[str] = None) -> int:
+        """Supprime les posts (et le watermark) correspondant aux filtres. Retourne le nombre de posts supprimés."""
+        clauses, args = [], []
+        for column, value in (("owner", owner), ("organization_urn", organization_urn)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._transaction() as conn:
+            conn.execute(f"DELETE FROM linkedin_sync{where}", args)
+            return conn.execute(f"DELETE FROM linkedin_posts{where}", args).rowcount
+
+
+class LinkedInShareStatsStore(SQLiteStore):
+    """
+    Statistiques quotidiennes (organizationalEntityShareStatistics, granularité
+    DAY) par organisation et propriétaire. Un jour sans élément côté LinkedIn
+    est enregistré avec stats NULL, pour ne pas être redemandé.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS linkedin_share_stats (
+            owner TEXT NOT NULL,
+            organization_urn TEXT NOT NULL,
+            day TEXT NOT NULL,
+            stats TEXT,
+            PRIMARY KEY (owner, organization_urn, day)
+        );
+    """
+
+    def get_days(self, owner: str, organization_urn: str, days: Iterable[date]) -> Dict[date, Optional[Dict[str, Any]]]:
+        """Jours en cache parmi days : {jour: stats du jour ou None}."""
+        by_iso = {d.isoformat(): d for d in days}
+        if not by_iso:
+            return {}
+        placeholders = ",".join("?" * len(by_iso))
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f"SELECT day, stats FROM linkedin_share_stats "
+                f"WHERE owner = ? AND organization_urn = ? AND day IN ({placeholders})",
+                [owner, organization_urn, *by_iso],
+            ).fetchall()
+        return {by_iso[day]: json.loads(stats) if stats else None for day, stats in rows}
+
+    def put_days(self, owner: str, organization_urn: str, days: Dict[date, Optional[Dict[str, Any]]]) -> None:
+        records = [
+            (owner, organization_urn, day.isoformat(), json.dumps(stats) if stats else None)
+            for day, stats in days.items()
+        ]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO linkedin_share_stats (owner, organization_urn, day, stats) "
+                "VALUES (?, ?, ?, ?)",
+                records,
+            )
+
+    def invalidate(self, owner: Optional[str] = None, organization_urn: Optional[str] = None) -> int:
+        """Supprime les jours correspondant aux filtres. Retourne le nombre de jours supprimés."""
+        clauses, args = [], []
+        for column, value in (("owner", owner), ("organization_urn", organization_urn)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._transaction() as conn:
+            return conn.execute(f"DELETE FROM linkedin_share_stats{where}", args).rowcount
+
+
+_default_store: Optional[LinkedInPostStore] = None
+_default_stats_store: Optional[LinkedInShareStatsStore] = None
+
+
+def get_linkedin_store() -> Optional[LinkedInPostStore]:
+    """Cache global des posts configuré par configure_linkedin_store (None = désactivé)."""
+    return _default_store
+
+
+def get_linkedin_stats_store() -> Optional[LinkedInShareStatsStore]:
+    """Cache global des stats quotidiennes (même fichier que les posts)."""
+    return _default_stats_store
+
+
+def configure_linkedin_store(path: Optional[str | Path]) -> Optional[LinkedInPostStore]:
+    """Ouvre (ou désactive si path est vide) les caches globaux des posts et des stats."""
+    global _default_store, _default_stats_store
+    for store in (_default_store, _default_stats_store):
+        if store is not None:
+            store.close()
+    _default_store = LinkedInPostStore(path) if path else None
+    _default_stats_store = LinkedInShareStatsStore(path) if path else None
+    return _default_store
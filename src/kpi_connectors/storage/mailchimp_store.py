@@ -0,0 +1,105 @@
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from kpi_connectors.storage.sqlite import SQLiteStore
+
+"""
+Cache persistant des click-details Mailchimp, une entrée par campagne.
+
+Les entrées sont indexées par propriétaire (hash de la clé d'API, voir
+owner_for) : des données en cache ne sont jamais servies à une autre clé.
+La fraîcheur dépend de l'âge de la campagne (voir
+connectors.mailchimp._click_details_fresh) : les campagnes récentes sont
+toujours redemandées, les anciennes ne le sont plus.
+"""
+
+
+class CachedClickDetails(NamedTuple):
+    send_time: Optional[str]
+    fetched_at: float
+    details: List[Dict[str, Any]]
+
+
+def owner_for(api_key: str) -> str:
+    """Propriétaire des entrées en cache pour une clé d'API Mailchimp."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+class MailchimpClickStore(SQLiteStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS mailchimp_click_details (
+            owner TEXT NOT NULL,
+            campaign_id TEXT NOT NULL,
+            send_time TEXT,
+            fetched_at REAL NOT NULL,
+            details TEXT NOT NULL,
+            PRIMARY KEY (owner, campaign_id)
+        );
+    """
+
+    def get_campaigns(self, owner: str, campaign_ids: Iterable[str]) -> Dict[str, CachedClickDetails]:
+        """Campagnes en cache parmi campaign_ids."""
+        ids = list(dict.fromkeys(campaign_ids))
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f"SELECT campaign_id, send_time, fetched_at, details FROM mailchimp_click_details "
+                f"WHERE owner = ? AND campaign_id IN ({placeholders})",
+                [owner, *ids],
+            ).fetchall()
+        return {
+            cid: CachedClickDetails(send_time, fetched_at, json.loads(details))
+            for cid, send_time, fetched_at, details in rows
+        }
+
+    def put_campaigns(
+        self,
+        owner: str,
+        details_by_campaign: Dict[str, List[Dict[str, Any]]],
+        send_times: Dict[str, Optional[str]],
+    ) -> None:
+        now = time.time()
+        records = [
+            (owner, cid, send_times.get(cid), now, json.dumps(details))
+            for cid, details in details_by_campaign.items()
+        ]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO mailchimp_click_details "
+                "(owner, campaign_id, send_time, fetched_at, details) VALUES (?, ?, ?, ?, ?)",
+                records,
+            )
+
+    def invalidate(self, owner: Optional[str] = None, campaign_id: Optional[str] = None) -> int:
+        """Supprime les campagnes correspondant aux filtres. Retourne le nombre de campagnes supprimées."""
+        clauses, args = [], []
+        for column, value in (("owner", owner), ("campaign_id", campaign_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._transaction() as conn:
+            return conn.execute(f"DELETE FROM mailchimp_click_details{where}", args).rowcount
+
+
+_default_store: Optional[MailchimpClickStore] = None
+
+
+def get_mailchimp_store() -> Optional[MailchimpClickStore]:
+    """Cache global configuré par configure_mailchimp_store (None = désactivé)."""
+    return _default_store
+
+
+def configure_mailchimp_store(path: Optional[str | Path]) -> Optional[MailchimpClickStore]:
+    """Ouvre (ou désactive si path est vide) le cache global des click-details."""
+    global _default_store
+    if _default_store is not None:
+        _default_store.close()
+    _default_store = MailchimpClickStore(path) if path else None
+    return _default_store
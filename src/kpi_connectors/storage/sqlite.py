@@ -0,0 +1,34 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+"""
+Base commune des caches locaux persistants (un fichier SQLite par cache).
+"""
+
+
+class SQLiteStore:
+    # Script CREATE TABLE IF NOT EXISTS ... exécuté à l'ouverture
+    SCHEMA = ""
+
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # Une connexion partagée entre threads, protégée par un verrou
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.RLock()
+        with self._transaction() as conn:
+            conn.executescript(self.SCHEMA)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Connexion verrouillée ; commit à la sortie, rollback sur exception."""
+        with self._lock, self._conn:
+            yield self._conn
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
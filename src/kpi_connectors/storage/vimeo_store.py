@@ -0,0 +1,101 @@
+import hashlib
+import json
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from kpi_connectors.storage.sqlite import SQLiteStore
+
+"""
+Cache persistant des statistiques quotidiennes Vimeo (plays, impressions...)
+par vidéo et par jour.
+
+Les entrées sont indexées par propriétaire (hash du token, voir owner_for) :
+des données en cache ne sont jamais servies à un autre token. Seuls les
+jours définitifs sont stockés ; un jour sans ligne côté Vimeo est enregistré
+avec stats NULL, pour ne pas être redemandé.
+"""
+
+
+def owner_for(access_token: str) -> str:
+    """Propriétaire des entrées en cache pour un token Vimeo."""
+    return hashlib.sha256(access_token.encode("utf-8")).hexdigest()
+
+
+class VimeoAnalyticsStore(SQLiteStore):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS vimeo_video_days (
+            owner TEXT NOT NULL,
+            video_id TEXT NOT NULL,
+            day TEXT NOT NULL,
+            stats TEXT,
+            PRIMARY KEY (owner, video_id, day)
+        );
+    """
+
+    def get_days(
+        self,
+        owner: str,
+        video_ids: Iterable[str],
+        days: Iterable[date],
+    ) -> Dict[str, Dict[date, Optional[Dict[str, Any]]]]:
+        """Jours en cache parmi days, par vidéo : {video_id: {jour: stats du jour ou None}}."""
+        ids = list(dict.fromkeys(video_ids))
+        by_iso = {d.isoformat(): d for d in days}
+        if not ids or not by_iso:
+            return {}
+        id_placeholders = ",".join("?" * len(ids))
+        day_placeholders = ",".join("?" * len(by_iso))
+        with self._transaction() as conn:
+            rows = conn.execute(
+                f"SELECT video_id, day, stats FROM vimeo_video_days "
+                f"WHERE owner = ? AND video_id IN ({id_placeholders}) AND day IN ({day_placeholders})",
+                [owner, *ids, *by_iso],
+            ).fetchall()
+        found: Dict[str, Dict[date, Optional[Dict[str, Any]]]] = {}
+        for video_id, day, stats in rows:
+            found.setdefault(video_id, {})[by_iso[day]] = json.loads(stats) if stats else None
+        return found
+
+    def put_days(self, owner: str, days_by_video: Dict[str, Dict[date, Optional[Dict[str, Any]]]]) -> None:
+        records = [
+            (owner, video_id, day.isoformat(), json.dumps(stats) if stats else None)
+            for video_id, days in days_by_video.items()
+            for day, stats in days.items()
+        ]
+        if not records:
+            return
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO vimeo_video_days (owner, video_id, day, stats) VALUES (?, ?, ?, ?)",
+                records,
+            )
+
+    def invalidate(self, owner: Optional[str] = None, video_id: Optional[str] = None) -> int:
+        """Supprime les jours correspondant aux filtres. Retourne le nombre de jours supprimés."""
+        clauses, args = [], []
+        for column, value in (("owner", owner), ("video_id", video_id)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self._transaction() as conn:
+            return conn.execute(f"DELETE FROM vimeo_video_days{where}", args).rowcount
+
+
+_default_store: Optional[VimeoAnalyticsStore] = None
+
+
+def get_vimeo_store() -> Optional[VimeoAnalyticsStore]:
+    """Cache global configuré par configure_vimeo_store (None = désactivé)."""
+    return _default_store
+
+
+def configure_vimeo_store(path: Optional[str | Path]) -> Optional[VimeoAnalyticsStore]:
+    """Ouvre (ou désactive si path est vide) le cache global des statistiques quotidiennes."""
+    global _default_store
+    if _default_store is not None:
+        _default_store.close()
+    _default_store = VimeoAnalyticsStore(path) if path else None
+    return _default_store